@@ -0,0 +1,181 @@
+"""Activity of a user: their reviews and comments, newest first.
+
+Both streams are read on request with the (author, -pub_date, -id)
+indexes, each limited to one page past the cursor, and merged.
+Items are ordered by (pub_date, kind, id), reviews before comments
+of the same instant. The head of a timeline, ACTIVITY_HEAD_SIZE
+items, is cached per user until the user writes a review or
+a comment, later pages read from it while it lasts.
+"""
+import heapq
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as DecodeError
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.settings import api_settings
+
+from .cache import bump_generation, get_cache, get_generation
+from .models import Comment, Review
+
+"""
+KINDS: item types, the position of a type ranks it in the order.
+"""
+KINDS = ('comment', 'review')
+
+
+def position(item):
+    return item['pub_date'], KINDS.index(item['type']), item['id']
+
+
+def encode_cursor(item):
+    pub_date, _, pk = position(item)
+    return urlsafe_b64encode(
+        f'{pub_date.isoformat()}|{item["type"]}|{pk}'.encode()
+    ).decode()
+
+
+def decode_cursor(encoded):
+    """Position of an encoded cursor, ValueError if it's malformed."""
+
+    try:
+        pub_date, kind, pk = (
+            urlsafe_b64decode(encoded.encode()).decode().split('|')
+        )
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except (DecodeError, UnicodeDecodeError, TypeError) as error:
+        raise ValueError(error)
+    if pub_date is None or kind not in KINDS:
+        raise ValueError(encoded)
+    return pub_date, KINDS.index(kind), pk
+
+
+def after(cursor, rank):
+    """Rows of the kind `rank` ordered after the `cursor` position."""
+
+    pub_date, cursor_rank, pk = cursor
+    if rank < cursor_rank:
+        return Q(pub_date__lte=pub_date)
+    if rank > cursor_rank:
+        return Q(pub_date__lt=pub_date)
+    return Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, id__lt=pk)
+
+
+def review_items(user_id, cursor, limit):
+    reviews = Review.objects.filter(author_id=user_id)
+    if cursor is not None:
+        reviews = reviews.filter(after(cursor, KINDS.index('review')))
+    return [
+        {
+            'type': 'review',
+            'id': row['id'],
+            'title': row['title_id'],
+            'text': row['text'],
+            'score': row['score'],
+            'pub_date': row['pub_date'],
+        }
+        for row in reviews.order_by('-pub_date', '-id').values(
+            'id', 'title_id', 'text', 'score', 'pub_date',
+        )[:limit]
+    ]
+
+
+def comment_items(user_id, cursor, limit):
+    comments = Comment.objects.filter(author_id=user_id)
+    if cursor is not None:
+        comments = comments.filter(after(cursor, KINDS.index('comment')))
+    return [
+        {
+            'type': 'comment',
+            'id': row['id'],
+            'title': row['review__title_id'],
+            'review': row['review_id'],
+            'text': row['text'],
+            'pub_date': row['pub_date'],
+        }
+        for row in comments.order_by('-pub_date', '-id').values(
+            'id', 'review__title_id', 'review_id', 'text', 'pub_date',
+        )[:limit]
+    ]
+
+
+def read_activity(user_id, cursor, limit):
+    """Up to `limit` items after the cursor, two queries."""
+
+    return list(islice(
+        heapq.merge(
+            review_items(user_id, cursor, limit),
+            comment_items(user_id, cursor, limit),
+            key=position,
+            reverse=True,
+        ),
+        limit,
+    ))
+
+
+def activity_generation(user_id):
+    return f'activity:{user_id}'
+
+
+def invalidate_activity(user_id, using=None):
+    """Drop the cached head once the transaction on `using` commits."""
+
+    transaction.on_commit(
+        lambda: bump_generation(activity_generation(user_id)), using=using,
+    )
+
+
+def head_cache_key(user_id):
+    generation = get_generation(activity_generation(user_id))
+    return f'activity:{generation}:{user_id}'
+
+
+def timeline_head(user_id, build=False):
+    """Cached (items, complete) head of the timeline, or None.
+
+    `complete` tells the head holds the whole timeline. The head is
+    read from the database only with `build`, when a first page is
+    requested.
+    """
+
+    cache = get_cache()
+    key = head_cache_key(user_id)
+    head = cache.get(key)
+    if head is None and build:
+        size = settings.ACTIVITY_HEAD_SIZE
+        items = read_activity(user_id, None, size + 1)
+        head = items[:size], len(items) <= size
+        cache.set(key, head, settings.ACTIVITY_HEAD_TIMEOUT)
+    return head
+
+
+def from_head(head, cursor, limit):
+    """Up to `limit` items after the cursor, None if beyond the head."""
+
+    items, complete = head
+    start = 0
+    if cursor is not None:
+        while start < len(items) and position(items[start]) >= cursor:
+            start += 1
+    page = items[start:start + limit]
+    if len(page) == limit or complete:
+        return page
+    return None
+
+
+def activity_page(user_id, cursor=None, size=None):
+    """A page of the activity after the cursor and if there's more."""
+
+    size = size or api_settings.PAGE_SIZE
+    items = None
+    if size < settings.ACTIVITY_HEAD_SIZE:
+        head = timeline_head(user_id, build=cursor is None)
+        if head is not None:
+            items = from_head(head, cursor, size + 1)
+    if items is None:
+        items = read_activity(user_id, cursor, size + 1)
+    return items[:size], len(items) > size
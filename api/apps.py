@@ -1,5 +1,21 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
+
+
+def setup_search_index(using='default', **kwargs):
+    from .search import create_search_index
+
+    create_search_index(using)
 
 
 class ApiConfig(AppConfig):
     name = 'api'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .db import apply_sqlite_pragmas, restore_sqlite_pragmas
+
+        connection_created.connect(apply_sqlite_pragmas)
+        post_migrate.connect(setup_search_index, sender=self)
+        post_migrate.connect(restore_sqlite_pragmas, sender=self)
@@ -0,0 +1,165 @@
+"""ASGI layer answering anonymous catalog reads without Django views.
+
+Django 3.0 has no async views or async ORM: its ASGI handler runs
+every view through `sync_to_async`, one request at a time on a
+shared thread. Anonymous GETs of the read-heavy routes below are
+instead answered from rendered responses kept in the API cache,
+natively on the event loop. Misses and every other request go to
+the wrapped Django application, whose 200 responses fill the cache.
+"""
+from hashlib import md5
+from urllib.parse import parse_qsl
+
+from django.conf import settings
+from django.urls import Resolver404, resolve
+
+from .cache import get_cache, get_generation
+
+"""
+CACHED_ROUTES: URL names served from rendered responses and the
+models whose cache generations invalidate them. Nested routes also
+depend on their parent, whose deletion turns them into 404s.
+"""
+CACHED_ROUTES = {
+    'categorie-list': ('api.categorie',),
+    'genre-list': ('api.genre',),
+    'title-list': ('api.title',),
+    'title-detail': ('api.title',),
+    'title-facets': ('api.facetcount', 'api.categorie', 'api.genre'),
+    'title-top': ('api.titleranking', 'api.title'),
+    'title-trending': ('api.titleranking', 'api.title'),
+    'review-list': ('api.review', 'api.title'),
+    'review-detail': ('api.review', 'api.title'),
+    'comment-list': ('api.comment', 'api.review'),
+    'comment-detail': ('api.comment', 'api.review'),
+}
+
+JSON_MEDIA_TYPES = (b'*/*', b'application/*', b'application/json')
+
+
+def route_labels(path):
+    """Model labels a cached route depends on, None for other paths."""
+
+    try:
+        match = resolve(path)
+    except Resolver404:
+        return None
+    return CACHED_ROUTES.get(match.url_name)
+
+
+def accepts_json(accept):
+    """Whether DRF would render JSON for the Accept header."""
+
+    if not accept:
+        return True
+    media_types = [
+        media_type.split(b';')[0].strip()
+        for media_type in accept.split(b',')
+    ]
+    return b'text/html' not in media_types and any(
+        media_type in JSON_MEDIA_TYPES for media_type in media_types
+    )
+
+
+def rendered_cache_key(scope, headers, labels):
+    """Key of a rendered response: stamps, host, path and sorted query."""
+
+    generation = '-'.join(str(get_generation(label)) for label in labels)
+    query = sorted(parse_qsl(scope['query_string'].decode('latin-1')))
+    url = (
+        f'{scope.get("scheme", "http")}://'
+        f'{headers.get(b"host", b"").decode("latin-1")}{scope["path"]}'
+    )
+    digest = md5(f'{url}?{query!r}'.encode()).hexdigest()
+    return f'rendered:{generation}:{digest}'
+
+
+def is_pinned(headers):
+    """Whether the request may carry a replica pin, see ReplicaMiddleware.
+
+    Rendered responses may come from replicas, pinned clients read
+    their own writes from the primary.
+    """
+
+    pin = f'{settings.REPLICA_PIN_COOKIE}='.encode()
+    return any(
+        cookie.strip().startswith(pin)
+        for cookie in headers.get(b'cookie', b'').split(b';')
+    )
+
+
+def is_cacheable(scope, headers):
+    return (
+        scope['type'] == 'http'
+        and scope['method'] == 'GET'
+        and b'authorization' not in headers
+        and b'format=' not in scope['query_string']
+        and accepts_json(headers.get(b'accept'))
+        and not is_pinned(headers)
+    )
+
+
+class CachedReadMiddleware:
+    """ASGI middleware serving cached anonymous reads on the event loop.
+
+    Cache lookups use the synchronous cache API, which doesn't block
+    with the default local memory backend.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        headers = dict(scope.get('headers', ()))
+        labels = None
+        if is_cacheable(scope, headers):
+            labels = route_labels(scope['path'])
+        if labels is None:
+            return await self.app(scope, receive, send)
+
+        cache = get_cache()
+        key = rendered_cache_key(scope, headers, labels)
+        cached = cache.get(key)
+        if cached is not None:
+            return await self.send_cached(
+                send, cached, headers.get(b'if-none-match'),
+            )
+
+        start = {}
+        body = []
+
+        async def capture(message):
+            if message['type'] == 'http.response.start':
+                start.update(message)
+            elif message['type'] == 'http.response.body':
+                body.append(message.get('body', b''))
+            await send(message)
+
+        await self.app(scope, receive, capture)
+        if start.get('status') == 200:
+            cache.set(
+                key,
+                (start['headers'], b''.join(body)),
+                settings.RESPONSE_CACHE_TIMEOUT,
+            )
+
+    async def send_cached(self, send, cached, if_none_match):
+        response_headers, body = cached
+        etag = next((
+            value for name, value in response_headers
+            if name.lower() == b'etag'
+        ), None)
+        if etag is not None and if_none_match == etag:
+            await send({
+                'type': 'http.response.start',
+                'status': 304,
+                'headers': [(b'ETag', etag)],
+            })
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': response_headers,
+        })
+        await send({'type': 'http.response.body', 'body': body})
@@ -0,0 +1,604 @@
+"""Synthetic dataset and per-endpoint measurements for benchmarks.
+
+The dataset is generated from the sample rows in `data/*.csv`,
+so texts, scores and years keep their real shapes at any scale.
+"""
+import asyncio
+import csv
+import os
+import platform
+import random
+import sqlite3
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from statistics import median
+from urllib.parse import quote, unquote
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+from django.db import connection
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from users.authentication import ClaimsAccessToken
+
+from .bulk import bulk_insert, next_id
+from .cache import invalidate_cache
+from .db import with_related
+from .facets import rebuild_facets
+from .models import Categorie, Comment, Genre, Review, Title
+from .rankings import update_rankings
+from .ratings import recalculate_title_ratings
+
+User = get_user_model()
+
+DATA_DIR = os.path.join(settings.BASE_DIR, 'data')
+START_DATE = datetime(2019, 1, 1, tzinfo=timezone.utc)
+
+DEFAULT_SCALE = {
+    'users': 1000,
+    'titles': 1000,
+    'reviews': 10000,
+    'comments': 50000,
+}
+
+TITLE_FILTERS = (
+    'year',
+    'category',
+    'genre',
+    'name',
+    'search',
+    'min_rating',
+    'ordering',
+)
+
+
+@contextmanager
+def scratch_database(database_file=None, keepdb=False):
+    """Run against a test database, the real one is never touched.
+
+    The SQLite database is in memory unless `database_file` is given.
+    """
+
+    if database_file:
+        connection.settings_dict['TEST']['NAME'] = database_file
+    old_name = connection.creation.create_test_db(
+        verbosity=0,
+        autoclobber=True,
+        serialize=False,
+        keepdb=keepdb,
+    )
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(
+            old_name, verbosity=0, keepdb=keepdb,
+        )
+
+
+def read_samples(name):
+    path = os.path.join(DATA_DIR, f'{name}.csv')
+    with open(path, encoding='utf-8', newline='') as csv_file:
+        return list(csv.DictReader(csv_file))
+
+
+def seed_dataset(
+    users, titles, reviews, comments, seed=0, stdout=None,
+):
+    """Fill the database with a synthetic catalog of the given size.
+
+    Every review gets a distinct (title, author) pair, so `reviews`
+    must not exceed `titles * users`. Returns the generated sizes.
+    """
+
+    if reviews > titles * users:
+        raise ValueError('Not enough titles and users for unique reviews.')
+    rand = random.Random(seed)
+
+    def log(message):
+        if stdout is not None:
+            stdout.write(message)
+
+    categories = [
+        Categorie.objects.get_or_create(slug=row['slug'], defaults={
+            'name': row['name'],
+        })[0].pk
+        for row in read_samples('category')
+    ]
+    genres = [
+        Genre.objects.get_or_create(slug=row['slug'], defaults={
+            'name': row['name'],
+        })[0].pk
+        for row in read_samples('genre')
+    ]
+
+    first_user = next_id(User)
+    user_names = [row['username'] for row in read_samples('users')]
+    bulk_insert(User, (
+        User(
+            pk=first_user + i,
+            username=f'{user_names[i % len(user_names)]}_{first_user + i}',
+            email=f'user_{first_user + i}@yamdb.fake',
+            password='!',
+        )
+        for i in range(users)
+    ))
+    log(f'users: {users}')
+
+    first_title = next_id(Title)
+    title_rows = read_samples('titles')
+    bulk_insert(Title, (
+        Title(
+            pk=first_title + i,
+            name=f'{title_rows[i % len(title_rows)]["name"]} {i}',
+            year=int(title_rows[i % len(title_rows)]['year']),
+            category_id=rand.choice(categories),
+        )
+        for i in range(titles)
+    ))
+    bulk_insert(Title.genre.through, (
+        Title.genre.through(title_id=first_title + i, genre_id=genre_id)
+        for i in range(titles)
+        for genre_id in rand.sample(genres, rand.randint(1, 3))
+    ))
+    log(f'titles: {titles}')
+
+    review_rows = read_samples('review')
+    first_review = next_id(Review)
+    bulk_insert(Review, (
+        Review(
+            pk=first_review + i,
+            title_id=first_title + i % titles,
+            author_id=first_user + (i // titles) % users,
+            text=review_rows[i % len(review_rows)]['text'],
+            score=int(review_rows[i % len(review_rows)]['score']),
+            pub_date=START_DATE + timedelta(seconds=i),
+        )
+        for i in range(reviews)
+    ))
+    log(f'reviews: {reviews}')
+
+    comment_rows = read_samples('comments')
+    bulk_insert(Comment, (
+        Comment(
+            review_id=first_review + rand.randrange(reviews),
+            author_id=first_user + rand.randrange(users),
+            text=comment_rows[i % len(comment_rows)]['text'],
+            pub_date=START_DATE + timedelta(seconds=i),
+        )
+        for i in range(comments if reviews else 0)
+    ))
+    log(f'comments: {comments}')
+
+    recalculate_title_ratings()
+    rebuild_facets()
+    update_rankings()
+    invalidate_cache(Categorie, Genre, Title, Review, Comment)
+    return {
+        'users': users,
+        'titles': titles,
+        'reviews': reviews,
+        'comments': comments,
+    }
+
+
+def sample_kwargs():
+    """URL kwargs of the busiest objects of the dataset."""
+
+    title = Title.objects.order_by('-rating_count', 'pk').first()
+    review = (
+        Review.objects
+        .filter(comments__isnull=False)
+        .order_by('pk')
+        .first()
+    ) or Review.objects.order_by('pk').first()
+    if title is None or review is None:
+        raise ValueError('Seed the database before benchmarking.')
+    return {
+        'title_id': review.title_id,
+        'review_id': review.pk,
+        'title-pk': title.pk,
+        'review-pk': review.pk,
+        'comment-pk': review.comments.values_list('pk', flat=True).first(),
+        'username': review.author.username,
+    }
+
+
+def read_routes():
+    """GET endpoints of api/urls.py and users/urls.py.
+
+    Returns (name, url) pairs, name is stable between datasets.
+    """
+
+    from api.urls import router_v1 as api_router
+    from users.urls import router_v1 as users_router
+
+    samples = sample_kwargs()
+    routes = []
+    for router in (api_router, users_router):
+        for pattern in router.urls:
+            actions = getattr(pattern.callback, 'actions', {})
+            groups = pattern.pattern.regex.groupindex
+            if 'get' not in actions or 'format' in groups:
+                continue
+            basename = pattern.name.rsplit('-', 1)[0]
+            kwargs = {
+                group: samples.get(group, samples.get(f'{basename}-{group}'))
+                for group in groups
+            }
+            if None in kwargs.values():
+                continue
+            routes.append((pattern.name, reverse(pattern.name, kwargs=kwargs)))
+
+    title = Title.objects.select_related('category').get(
+        pk=samples['title-pk'],
+    )
+    values = {
+        'year': title.year,
+        'category': title.category.slug,
+        'genre': title.genre.values_list('slug', flat=True).first(),
+        'name': title.name.split()[0],
+        'search': title.name.split()[0][:3],
+        'min_rating': int(title.rating or 0),
+        'ordering': '-rating',
+    }
+    for field in TITLE_FILTERS:
+        routes.append((
+            f'title-list?{field}',
+            f'{reverse("title-list")}?{field}={values[field]}',
+        ))
+    return routes
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def query_plan(sql, params):
+    """Plan of a query: EXPLAIN QUERY PLAN details on SQLite."""
+
+    prefix = 'EXPLAIN QUERY PLAN' if connection.vendor == 'sqlite' else (
+        'EXPLAIN'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(f'{prefix} {sql}', params)
+        return [str(row[-1]) for row in cursor.fetchall()]
+
+
+def measure(client, method, url, repeat, data=None):
+    """Latency, query count, peak memory and query plans of one endpoint.
+
+    Plans are collected for the SELECTs of the first, uncached call
+    of a read endpoint; the query count is of a warm call.
+    """
+
+    call = getattr(client, method.lower())
+    queries = []
+
+    def capture_query(execute, sql, params, many, context):
+        queries.append((sql, params))
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(capture_query):
+        call(url, data)
+    plans = [
+        query_plan(sql, params)
+        for sql, params in queries
+        if sql.lstrip().upper().startswith('SELECT')
+    ]
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = call(url, data)
+        timings.append((time.perf_counter() - started) * 1000)
+    queries = []
+    with connection.execute_wrapper(capture_query):
+        call(url, data)
+    tracemalloc.start()
+    call(url, data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result = {
+        'status': response.status_code,
+        'p50_ms': round(median(timings), 3),
+        'p95_ms': round(percentile(timings, 0.95), 3),
+        'queries': len(queries),
+        'peak_kib': round(peak / 1024, 1),
+    }
+    if method == 'GET':
+        result['plans'] = plans
+    return result
+
+
+def auth_measurements(repeat):
+    """Signup and token endpoints, without rate limits.
+
+    Repeated signups for one address are answered from the signup
+    dedup window, the first one is the warm-up call of `measure`.
+    """
+
+    unthrottled = {**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {}}
+    client = APIClient()
+    with override_settings(REST_FRAMEWORK=unthrottled):
+        result = {
+            'user-create-with-email': measure(
+                client, 'POST', reverse('user-create-with-email'), repeat,
+                {'email': 'bench@yamdb.fake', 'username': 'bench'},
+            ),
+        }
+        user = User.objects.get(username='bench')
+        result['access-token-obtain'] = measure(
+            client, 'POST', reverse('access-token-obtain'), repeat,
+            {
+                'email': user.email,
+                'confirmation_code': default_token_generator.make_token(user),
+            },
+        )
+    return result
+
+
+def run_benchmark(repeat=20):
+    """Measure every route against the current database."""
+
+    admin, _ = User.objects.get_or_create(
+        username='bench_admin',
+        defaults={'email': 'bench_admin@yamdb.fake', 'role': 'admin'},
+    )
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {ClaimsAccessToken.for_user(admin)}',
+    )
+    routes = {
+        f'GET {name}': measure(client, 'GET', url, repeat)
+        for name, url in read_routes()
+    }
+    for name, result in auth_measurements(repeat).items():
+        routes[f'POST {name}'] = result
+    return {
+        'meta': {
+            'django': django.get_version(),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'repeat': repeat,
+            'rows': {
+                'users': User.objects.count(),
+                'titles': Title.objects.count(),
+                'reviews': Review.objects.count(),
+                'comments': Comment.objects.count(),
+            },
+        },
+        'routes': routes,
+    }
+
+
+def compare_reports(baseline, current, threshold):
+    """Routes that got slower or heavier than the baseline.
+
+    Latency regressions are relative (`threshold` of 0.2 is +20%),
+    query count regressions are any increase.
+    """
+
+    regressions = []
+    for route, result in current['routes'].items():
+        before = baseline['routes'].get(route)
+        if before is None:
+            continue
+        if result['queries'] > before['queries']:
+            regressions.append(
+                f'{route}: queries {before["queries"]} -> {result["queries"]}'
+            )
+        for metric in ('p50_ms', 'p95_ms', 'peak_kib'):
+            if result[metric] > before[metric] * (1 + threshold):
+                regressions.append(
+                    f'{route}: {metric} {before[metric]} -> {result[metric]}'
+                )
+    return regressions
+
+
+def plan_changes(baseline, current):
+    """Queries whose plan differs from the baseline, as readable diffs."""
+
+    changes = []
+    for route, result in current['routes'].items():
+        before = baseline['routes'].get(route, {}).get('plans')
+        after = result.get('plans')
+        if before is None or after is None or before == after:
+            continue
+        for index in range(max(len(before), len(after))):
+            old = before[index] if index < len(before) else []
+            new = after[index] if index < len(after) else []
+            if old != new:
+                changes.append(
+                    f'{route} query {index + 1}:\n'
+                    f'  - {"; ".join(old) or "(none)"}\n'
+                    f'  + {"; ".join(new) or "(none)"}'
+                )
+    return changes
+
+
+def anonymous_read_routes():
+    """Routes of read_routes() the ASGI layer can serve from its cache."""
+
+    from .asgi import CACHED_ROUTES
+
+    return [
+        (name, url)
+        for name, url in read_routes()
+        if name.split('?')[0] in CACHED_ROUTES
+    ]
+
+
+def throughput_wsgi(urls, clients, requests):
+    """Requests per second of `clients` threads, each a WSGI client."""
+
+    from django.db import connections
+    from django.test import Client
+
+    def run_client(offset):
+        client = Client()
+        try:
+            return [
+                client.get(urls[(offset + i) % len(urls)]).status_code
+                for i in range(requests)
+            ]
+        finally:
+            connections.close_all()
+
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        started = time.perf_counter()
+        statuses = list(pool.map(run_client, range(clients)))
+        elapsed = time.perf_counter() - started
+    return throughput(statuses, elapsed)
+
+
+async def asgi_get(application, url):
+    """Status of a GET through an ASGI application."""
+
+    path, _, query = url.partition('?')
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': unquote(path),
+        'raw_path': path.encode(),
+        'query_string': quote(query, safe='=&').encode(),
+        'root_path': '',
+        'headers': [(b'host', b'testserver')],
+        'client': ('127.0.0.1', 0),
+        'server': ('testserver', 80),
+    }
+    status = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+
+    await application(scope, receive, send)
+    return status[0]
+
+
+def throughput_asgi(application, urls, clients, requests):
+    """Requests per second of `clients` concurrent ASGI clients."""
+
+    async def run_client(offset):
+        return [
+            await asgi_get(application, urls[(offset + i) % len(urls)])
+            for i in range(requests)
+        ]
+
+    async def run_clients():
+        return await asyncio.gather(*(run_client(i) for i in range(clients)))
+
+    started = time.perf_counter()
+    statuses = asyncio.run(run_clients())
+    return throughput(statuses, time.perf_counter() - started)
+
+
+def throughput(statuses, elapsed):
+    """Summary of per-client status lists measured over `elapsed`."""
+
+    requests = sum(len(client) for client in statuses)
+    return {
+        'requests': requests,
+        'errors': sum(
+            status != 200 for client in statuses for status in client
+        ),
+        'seconds': round(elapsed, 3),
+        'rps': round(requests / elapsed, 1),
+    }
+
+
+def run_throughput_benchmark(clients=16, requests=50):
+    """Anonymous read throughput: WSGI, Django ASGI, cached ASGI."""
+
+    from django.core.asgi import get_asgi_application
+
+    from .asgi import CachedReadMiddleware
+
+    urls = [url for _, url in anonymous_read_routes()]
+    django_asgi = get_asgi_application()
+    deployments = {
+        'wsgi': lambda: throughput_wsgi(urls, clients, requests),
+        'asgi': lambda: throughput_asgi(
+            django_asgi, urls, clients, requests,
+        ),
+        'asgi-cached-reads': lambda: throughput_asgi(
+            CachedReadMiddleware(django_asgi), urls, clients, requests,
+        ),
+    }
+    report = {'clients': clients, 'urls': urls}
+    for name, run in deployments.items():
+        invalidate_cache(Categorie, Genre, Title, Review, Comment)
+        report[name] = run()
+    return report
+
+
+def serializer_querysets():
+    """Querysets of the list serializers, as their views build them."""
+
+    from .serializers import (
+        CommentSerializer,
+        ReviewSerializer,
+        TitleSerializer,
+    )
+
+    return {
+        'titles': (
+            TitleSerializer,
+            Title.objects.select_related('category')
+            .prefetch_related('genre'),
+        ),
+        'reviews': (ReviewSerializer, with_related(Review.objects, 'author')),
+        'comments': (
+            CommentSerializer,
+            with_related(Comment.objects, 'author'),
+        ),
+    }
+
+
+def run_serializer_benchmark(page_size=100, repeat=20):
+    """Time one list page through the serializer and its row encoder.
+
+    Both timings include the queries of the page.
+    """
+
+    from .encoders import get_encoder
+
+    report = {'page_size': page_size, 'repeat': repeat}
+    for name, (serializer_class, queryset) in serializer_querysets().items():
+        encoder = get_encoder(serializer_class)
+        queryset = queryset.order_by('-pk')
+        paths = {
+            'serializer': lambda: serializer_class(
+                queryset[:page_size], many=True,
+            ).data,
+            'encoder': lambda: encoder.encode(
+                encoder.values(queryset)[:page_size],
+            ),
+        }
+        result = {}
+        for path, encode in paths.items():
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                encode()
+                timings.append((time.perf_counter() - started) * 1000)
+            result[f'{path}_p50_ms'] = round(median(timings), 3)
+        result['speedup'] = round(
+            result['serializer_p50_ms'] / result['encoder_p50_ms'], 2,
+        )
+        report[name] = result
+    return report
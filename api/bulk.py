@@ -0,0 +1,66 @@
+from itertools import islice
+
+from django.db import router, transaction
+from django.db.models import Max
+
+DEFAULT_BATCH_SIZE = 5000
+
+
+def chunked(iterable, size):
+    """Yield lists of at most `size` items from any iterable."""
+
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def next_id(model):
+    """First free primary key of the model's table."""
+
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+def bulk_create_with_pks(model, objs):
+    """`bulk_create` that sets primary keys of the objects everywhere.
+
+    Backends that can't return them from the INSERT, SQLite on
+    Django 3.0, read them back as the last `len(objs)` ids: keys
+    are ascending and the transaction, required here, holds the
+    write lock since the INSERT, so no other rows came after them.
+    """
+
+    if not transaction.get_connection().in_atomic_block:
+        raise transaction.TransactionManagementError(
+            'bulk_create_with_pks() must run in a transaction.'
+        )
+    model.objects.bulk_create(objs)
+    if not objs or objs[0].pk is not None:
+        return objs
+    pks = list(
+        model.objects.order_by('-pk').values_list('pk', flat=True)[
+            :len(objs)
+        ]
+    )
+    for obj, pk in zip(objs, reversed(pks)):
+        obj.pk = pk
+    return objs
+
+
+def bulk_insert(model, objs, batch_size=DEFAULT_BATCH_SIZE):
+    """Insert objects with `bulk_create`, one transaction per batch.
+
+    `objs` may be a generator, only one batch is kept in memory.
+    Statement size is left to the backend limits. Signals are not
+    sent. Returns the number of inserted rows.
+    """
+
+    inserted = 0
+    using = router.db_for_write(model)
+    for chunk in chunked(objs, batch_size):
+        with transaction.atomic(using=using):
+            model.objects.bulk_create(chunk)
+        inserted += len(chunk)
+    return inserted
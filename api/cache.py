@@ -0,0 +1,128 @@
+import time
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+from .db import read_replica
+
+
+"""
+WRITES: stamp of the last committed write to cached models, replicas
+missing it are stale, see api/replicas.py.
+"""
+WRITES = 'replication:writes'
+
+
+def get_cache():
+    """Cache backend of the API, `API_CACHE` alias of `CACHES`."""
+
+    return caches[settings.API_CACHE]
+
+
+def generation_key(name):
+    return f'generation:{name}'
+
+
+def get_generation(name):
+    """Version stamp of a group of cached values.
+
+    Stamps are timestamps rather than counters, so a stamp lost
+    to cache eviction or a restart never comes back with the same
+    value and can't revive stale entries.
+    """
+
+    cache = get_cache()
+    key = generation_key(name)
+    value = cache.get(key)
+    if value is None:
+        cache.add(key, time.time_ns(), None)
+        value = cache.get(key, time.time_ns())
+    return value
+
+
+def bump_generation(*names):
+    """Invalidate everything cached under the given stamps."""
+
+    get_cache().set_many(
+        {generation_key(name): time.time_ns() for name in names},
+        None,
+    )
+
+
+def invalidate_cache(*models):
+    """Drop cached counts and responses of the models.
+
+    With read replicas, also stamps WRITES in the same write, so no
+    replica counts as fresh under the new stamps without the change.
+    """
+
+    names = [model._meta.label_lower for model in models]
+    if settings.REPLICA_DATABASES:
+        names.append(WRITES)
+    bump_generation(*names)
+
+
+def invalidate_on_commit(*models, using=None):
+    """invalidate_cache() once the transaction on `using` commits.
+
+    A stamp bumped before the commit lets concurrent reads cache the
+    old rows under the new stamp.
+    """
+
+    transaction.on_commit(lambda: invalidate_cache(*models), using=using)
+
+
+def response_cache_key(request, generation):
+    """Key of a response: stamp, replica, absolute URL and sorted query.
+
+    Responses read from replicas are kept apart, clients pinned to
+    the primary never get them.
+    """
+
+    query = sorted(request.query_params.lists())
+    url = request.build_absolute_uri(request.path)
+    digest = md5(f'{url}?{query!r}'.encode()).hexdigest()
+    return f'response:{generation}:{read_replica() or ""}:{digest}'
+
+
+def cached_response(view, handler, request, *args, **kwargs):
+    """Serve the response data of a read action from the cache.
+
+    Only successful responses are stored. Authentication and
+    permissions have already run, rendering still runs per request.
+    """
+
+    cache = get_cache()
+    name = view.get_queryset().model._meta.label_lower
+    key = response_cache_key(request, get_generation(name))
+    data = cache.get(key)
+    if data is not None:
+        return Response(data)
+    response = handler(request, *args, **kwargs)
+    if response.status_code == 200:
+        cache.set(key, response.data, settings.RESPONSE_CACHE_TIMEOUT)
+    return response
+
+
+class CachedListMixin:
+    """Cache `list()` responses until a write to the listed models.
+
+    Stamps are bumped from api/signals.py, see CACHE_DEPENDENCIES.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return cached_response(
+            self, super().list, request, *args, **kwargs,
+        )
+
+
+class CachedRetrieveMixin:
+    """Cache `retrieve()` responses until a write to the model."""
+
+    def retrieve(self, request, *args, **kwargs):
+        return cached_response(
+            self, super().retrieve, request, *args, **kwargs,
+        )
@@ -0,0 +1,113 @@
+import pickle
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.utils.functional import cached_property
+from django.utils.module_loading import import_string
+
+
+class RedisCache(BaseCache):
+    """Cache backend on top of any redis-py compatible client.
+
+    LOCATION is the server URL, OPTIONS['CLIENT_CLASS'] the dotted
+    path of a client class with `from_url()` (default `redis.Redis`,
+    which needs the `redis` package installed). Integers are stored
+    as plain numbers so `incr()` runs as one atomic INCRBY.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._location = location
+        self._client_class = params.get('OPTIONS', {}).get(
+            'CLIENT_CLASS', 'redis.Redis',
+        )
+
+    @cached_property
+    def client(self):
+        return import_string(self._client_class).from_url(self._location)
+
+    def expiry(self, timeout):
+        """Relative timeout in seconds, None for keys that never expire."""
+
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            return None
+        return max(int(timeout), 0)
+
+    def key(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    @staticmethod
+    def dumps(value):
+        if type(value) is int:
+            return value
+        return pickle.dumps(value)
+
+    @staticmethod
+    def loads(value):
+        try:
+            return int(value)
+        except ValueError:
+            return pickle.loads(value)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        expiry = self.expiry(timeout)
+        if expiry == 0:
+            return False
+        return bool(self.client.set(
+            self.key(key, version), self.dumps(value), ex=expiry, nx=True,
+        ))
+
+    def get(self, key, default=None, version=None):
+        value = self.client.get(self.key(key, version))
+        return default if value is None else self.loads(value)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        expiry = self.expiry(timeout)
+        if expiry == 0:
+            self.delete(key, version=version)
+            return
+        self.client.set(self.key(key, version), self.dumps(value), ex=expiry)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.key(key, version)
+        expiry = self.expiry(timeout)
+        if expiry is None:
+            return bool(self.client.persist(key)) or self.has_key(key)
+        return bool(self.client.expire(key, expiry))
+
+    def delete(self, key, version=None):
+        return bool(self.client.delete(self.key(key, version)))
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        values = self.client.mget([self.key(key, version) for key in keys])
+        return {
+            key: self.loads(value)
+            for key, value in zip(keys, values)
+            if value is not None
+        }
+
+    def incr(self, key, delta=1, version=None):
+        key = self.key(key, version)
+        if not self.client.exists(key):
+            raise ValueError(f"Key '{key}' not found")
+        return self.client.incrby(key, delta)
+
+    def has_key(self, key, version=None):
+        return bool(self.client.exists(self.key(key, version)))
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        for key, value in data.items():
+            self.set(key, value, timeout, version=version)
+        return []
+
+    def delete_many(self, keys, version=None):
+        keys = [self.key(key, version) for key in keys]
+        if keys:
+            self.client.delete(*keys)
+
+    def clear(self):
+        self.client.flushdb()
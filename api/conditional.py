@@ -0,0 +1,70 @@
+from datetime import datetime, timezone
+from hashlib import md5
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .cache import get_generation
+
+
+def make_etag(request, version):
+    """Strong ETag of a representation: URL, query, media type, version."""
+
+    query = sorted(request.query_params.lists())
+    raw = f'{request.path}|{query!r}|{request.accepted_media_type}|{version}'
+    return quote_etag(md5(raw.encode()).hexdigest())
+
+
+def conditional_response(view, handler, request, *args, **kwargs):
+    """Answer If-None-Match / If-Modified-Since before running `handler`.
+
+    The version comes from `view.get_version()`, a datetime read
+    without running the action's queryset or serializer.
+    """
+
+    version = view.get_version()
+    etag = make_etag(request, version.isoformat())
+    last_modified = int(version.timestamp())
+    not_modified = get_conditional_response(
+        request, etag=etag, last_modified=last_modified,
+    )
+    if not_modified is not None:
+        return not_modified
+
+    response = handler(request, *args, **kwargs)
+    if response.status_code == 200:
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+class ConditionalMixin:
+    """Version of a viewset's data: its cache generation by default.
+
+    The stamp is the time of the last write that invalidated the
+    cached responses of the model, so no database query is needed.
+    """
+
+    def get_version(self):
+        label = self.get_queryset().model._meta.label_lower
+        return datetime.fromtimestamp(
+            get_generation(label) / 1e9, tz=timezone.utc,
+        )
+
+
+class ConditionalListMixin(ConditionalMixin):
+    """Conditional GET for `list()`."""
+
+    def list(self, request, *args, **kwargs):
+        return conditional_response(
+            self, super().list, request, *args, **kwargs,
+        )
+
+
+class ConditionalRetrieveMixin(ConditionalMixin):
+    """Conditional GET for `retrieve()`."""
+
+    def retrieve(self, request, *args, **kwargs):
+        return conditional_response(
+            self, super().retrieve, request, *args, **kwargs,
+        )
@@ -0,0 +1,154 @@
+"""SQLite connection setup and the database router of the API.
+
+Every new SQLite connection gets SQLITE_PRAGMAS: write-ahead logging
+lets readers run alongside the writer, and the busy timeout makes a
+writer wait for the lock instead of failing with "database is
+locked". SQLite still runs one writer per file at a time, so
+FEED_DATABASE moves reviews and comments, the most written tables,
+to a file of their own.
+
+Reads of safe requests can also go to copies of the default
+database, see api/replicas.py.
+"""
+from contextlib import contextmanager
+
+from asgiref.local import Local
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, router
+
+"""
+FEED_MODELS: models stored in FEED_DATABASE when it's set.
+"""
+FEED_MODELS = ('api.review', 'api.comment')
+
+"""
+replica: `alias` of the replica reads of the current request go to,
+set by ReplicaMiddleware.
+"""
+replica = Local()
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """Configure a new SQLite connection, see SQLITE_PRAGMAS.
+
+    Foreign keys are only enforced in the default database, rows of
+    other databases point to rows which live in the default one.
+    """
+
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = dict(settings.SQLITE_PRAGMAS)
+    if connection.alias != DEFAULT_DB_ALIAS:
+        pragmas['foreign_keys'] = 'OFF'
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def restore_sqlite_pragmas(using=DEFAULT_DB_ALIAS, **kwargs):
+    """Reapply pragmas of a connection `migrate` has reset.
+
+    Schema changes on SQLite turn foreign keys back on when they end.
+    """
+
+    connection = connections[using]
+    if connection.connection is not None:
+        apply_sqlite_pragmas(None, connection)
+
+
+def same_database(*models):
+    """Whether reads of the models go to one database, to join them."""
+
+    return len({router.db_for_read(model) for model in models}) == 1
+
+
+def with_related(queryset, *fields):
+    """Join to-one relations, or prefetch those of other databases."""
+
+    model = queryset.model
+    joined = []
+    fetched = []
+    for name in fields:
+        related = model._meta.get_field(name).related_model
+        if same_database(model, related):
+            joined.append(name)
+        else:
+            fetched.append(name)
+    if joined:
+        queryset = queryset.select_related(*joined)
+    if fetched:
+        queryset = queryset.prefetch_related(*fetched)
+    return queryset
+
+
+class FeedRouter:
+    """Reviews and comments in FEED_DATABASE, if it's set.
+
+    Other models stay in the default database, also when they are
+    reached from a review or a comment. Every database has all the
+    tables, so deletes cascading in the default database find empty
+    review and comment tables there: rows of deleted titles and
+    users are deleted by api/signals.py.
+    """
+
+    def db_for_read(self, model, **hints):
+        feed = settings.FEED_DATABASE
+        if not feed:
+            return None
+        if model._meta.label_lower in FEED_MODELS:
+            return feed
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db == feed:
+            return DEFAULT_DB_ALIAS
+        return None
+
+    db_for_write = db_for_read
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if settings.FEED_DATABASE:
+            return True
+        return None
+
+
+def read_replica():
+    """Replica alias of the current reads, None for the primary."""
+
+    return getattr(replica, 'alias', None)
+
+
+@contextmanager
+def reading_from(alias):
+    """Send reads of the block to the replica `alias`, or the primary."""
+
+    previous = read_replica()
+    replica.alias = alias
+    try:
+        yield
+    finally:
+        replica.alias = previous
+
+
+class ReplicaRouter:
+    """Reads of models of the default database from the read replica.
+
+    Replicas are copies of the default database, objects read from
+    one are written to the default database.
+    """
+
+    def db_for_read(self, model, **hints):
+        return read_replica()
+
+    def db_for_write(self, model, **hints):
+        instance = hints.get('instance')
+        if (
+            instance is not None
+            and instance._state.db in settings.REPLICA_DATABASES
+        ):
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.REPLICA_DATABASES}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
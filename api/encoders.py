@@ -0,0 +1,181 @@
+"""Row encoders: serializer output straight from `.values()` rows.
+
+A `RowEncoder` is compiled once per serializer class from its
+fields. It selects only the columns the serializer reads, with
+related values joined in as `relation__field` lookups, and builds
+the same dicts the serializer would, without model instances.
+Nested many-to-many serializers are filled from one extra query
+per page, like `prefetch_related`. Relations to models of another
+database can't be joined, lists of them go through the serializer.
+"""
+from collections import defaultdict
+from operator import itemgetter
+
+from django.db import router
+from rest_framework import serializers
+from rest_framework.response import Response
+
+"""
+IDENTITY_FIELDS: fields whose `to_representation` returns the
+database value unchanged, read without a call.
+"""
+IDENTITY_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.IntegerField,
+)
+
+
+def converted(get, convert):
+    def get_converted(row):
+        value = get(row)
+        return None if value is None else convert(value)
+    return get_converted
+
+
+def nested(get_key, encode):
+    def get_nested(row):
+        return None if get_key(row) is None else encode(row)
+    return get_nested
+
+
+class RowEncoder:
+    """Serializer output of `.values()` rows, read-only.
+
+    Supports plain fields, `SlugRelatedField` and nested model
+    serializers, to-one or `many=True` over a many-to-many field.
+    Anything else raises TypeError when the encoder is compiled.
+    """
+
+    def __init__(self, serializer_class, prefix=''):
+        model = serializer_class.Meta.model
+        self.model = model
+        self.lookups = []
+        self.getters = []
+        self.many = []
+        self.relations = {}
+        for key, field in serializer_class().fields.items():
+            if field.write_only:
+                continue
+            lookup = prefix + field.source
+            if isinstance(field, serializers.ListSerializer):
+                self.add_many(key, field)
+            elif isinstance(field, serializers.ModelSerializer):
+                child = RowEncoder(type(field), prefix=f'{lookup}__')
+                self.relations[lookup] = child.model
+                self.relations.update(child.relations)
+                self.lookups.append(lookup)
+                self.lookups.extend(child.lookups)
+                self.getters.append(
+                    (key, nested(itemgetter(lookup), child.encode_row)),
+                )
+            elif isinstance(field, serializers.SlugRelatedField):
+                self.relations[lookup] = (
+                    model._meta.get_field(field.source).related_model
+                )
+                self.add_column(key, f'{lookup}__{field.slug_field}')
+            elif isinstance(field, serializers.RelatedField):
+                raise TypeError(f'Unsupported related field {key!r}.')
+            elif isinstance(field, IDENTITY_FIELDS):
+                self.add_column(key, lookup)
+            else:
+                self.add_column(key, lookup, field.to_representation)
+
+    def add_column(self, key, lookup, convert=None):
+        self.lookups.append(lookup)
+        get = itemgetter(lookup)
+        if convert is not None:
+            get = converted(get, convert)
+        self.getters.append((key, get))
+
+    def add_many(self, key, field):
+        model_field = self.model._meta.get_field(field.source)
+        if not model_field.many_to_many or model_field.auto_created:
+            raise TypeError(f'Unsupported many field {key!r}.')
+        child = RowEncoder(type(field.child))
+        if 'pk' not in self.lookups:
+            self.lookups.append('pk')
+        self.getters.append((key, None))
+        self.many.append((key, model_field.related_query_name(), child))
+
+    def can_join(self, queryset):
+        """Whether related models are in the queryset's database."""
+
+        return all(
+            router.db_for_read(related) == queryset.db
+            for related in self.relations.values()
+        )
+
+    def values(self, queryset):
+        """The queryset as rows of the columns this encoder reads."""
+
+        return queryset.prefetch_related(None).values(*self.lookups)
+
+    def encode_row(self, row):
+        return {key: get(row) for key, get in self.getters if get}
+
+    def encode(self, rows):
+        """Serializer output of a list of rows, `.data` of `many=True`."""
+
+        rows = list(rows)
+        related = {
+            key: self.fetch_many(query_name, child, rows)
+            for key, query_name, child in self.many
+        }
+        if not related:
+            return [self.encode_row(row) for row in rows]
+        encoded = []
+        for row in rows:
+            item = {}
+            for key, get in self.getters:
+                if get is None:
+                    item[key] = related[key].get(row['pk'], [])
+                else:
+                    item[key] = get(row)
+            encoded.append(item)
+        return encoded
+
+    @staticmethod
+    def fetch_many(query_name, child, rows):
+        """Encoded related items of every row, by the row's pk."""
+
+        if not rows:
+            return {}
+        pks = [row['pk'] for row in rows]
+        items = defaultdict(list)
+        for related in child.model.objects.filter(
+            **{f'{query_name}__in': pks},
+        ).values(query_name, *child.lookups):
+            items[related[query_name]].append(child.encode_row(related))
+        return items
+
+
+encoders = {}
+
+
+def get_encoder(serializer_class):
+    """The compiled encoder of a serializer class."""
+
+    encoder = encoders.get(serializer_class)
+    if encoder is None:
+        encoder = encoders[serializer_class] = RowEncoder(serializer_class)
+    return encoder
+
+
+class EncodedListMixin:
+    """Render `list()` pages from `.values()` rows, see RowEncoder.
+
+    The output is the serializer's, without instantiating models
+    or the serializer per object.
+    """
+
+    def list(self, request, *args, **kwargs):
+        encoder = get_encoder(self.get_serializer_class())
+        queryset = self.filter_queryset(self.get_queryset())
+        if not encoder.can_join(queryset):
+            return super().list(request, *args, **kwargs)
+        queryset = encoder.values(queryset)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(encoder.encode(page))
+        return Response(encoder.encode(queryset))
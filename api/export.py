@@ -0,0 +1,160 @@
+"""Catalog exports streamed as NDJSON or CSV.
+
+Titles are read with `.iterator(chunk_size=...)` and encoded by the
+row encoders of the list serializers, one chunk at a time, so memory
+depends on the chunk size rather than on the catalog size. Nested
+reviews and comments are read in chunks too, see add_reviews().
+"""
+import csv
+import json
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connections, router
+from django.db.models import prefetch_related_objects
+
+from .bulk import chunked
+from .encoders import get_encoder
+from .models import Comment, Review, Title
+from .serializers import CommentSerializer, ReviewSerializer, TitleSerializer
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+CSV_COLUMNS = (
+    'id', 'name', 'year', 'description', 'category', 'genre', 'rating',
+)
+
+
+def related_rows(model, serializer_class, parent, queryset, chunk_size):
+    """Yield (parent id, encoded object) pairs in the queryset order."""
+
+    encoder = get_encoder(serializer_class)
+    if not encoder.can_join(queryset):
+        parent_id = model._meta.get_field(parent).attname
+        for objs in chunked(queryset.iterator(chunk_size), chunk_size):
+            prefetch_related_objects(objs, *encoder.relations)
+            for obj in objs:
+                yield getattr(obj, parent_id), serializer_class(obj).data
+        return
+    for row in queryset.values(parent, *encoder.lookups).iterator(
+        chunk_size,
+    ):
+        yield row[parent], encoder.encode_row(row)
+
+
+def id_chunk_size(model, chunk_size):
+    """Chunk size of `id__in` lists within the bound variables limit."""
+
+    features = connections[router.db_for_read(model)].features
+    return min(chunk_size, features.max_query_params or chunk_size)
+
+
+def add_reviews(titles, chunk_size):
+    """Yield a chunk of titles with reviews and comments nested.
+
+    Titles come ordered by id, so their reviews are read by id range
+    in title order, and nested a chunk at a time with the comments of
+    the chunk. Memory holds a chunk of reviews besides the reviews of
+    the title being filled, whatever the size of the title chunk.
+    """
+
+    reviews = related_rows(
+        Review,
+        ReviewSerializer,
+        'title',
+        Review.objects.filter(
+            title__gte=titles[0]['id'], title__lte=titles[-1]['id'],
+        ).order_by('title_id', '-pub_date', '-id'),
+        chunk_size,
+    )
+    pending = iter(titles)
+    title = None
+    for chunk in chunked(reviews, id_chunk_size(Comment, chunk_size)):
+        comments = defaultdict(list)
+        for review_id, comment in related_rows(
+            Comment,
+            CommentSerializer,
+            'review',
+            Comment.objects.filter(
+                review__in=[review['id'] for _, review in chunk],
+            ).order_by('-pub_date', '-id'),
+            chunk_size,
+        ):
+            comments[review_id].append(comment)
+        for title_id, review in chunk:
+            review['comments'] = comments.get(review['id'], [])
+            while title is None or title['id'] != title_id:
+                if title is not None:
+                    yield title
+                title = next(pending)
+                title['reviews'] = []
+            title['reviews'].append(review)
+    if title is not None:
+        yield title
+    for title in pending:
+        title['reviews'] = []
+        yield title
+
+
+def export_titles(with_reviews=False, chunk_size=None):
+    """Yield every title as in the title list, ordered by id.
+
+    With `with_reviews`, titles carry their `reviews`, each with its
+    `comments`, in the order of the review and comment lists.
+    """
+
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    encoder = get_encoder(TitleSerializer)
+    rows = encoder.values(Title.objects.order_by('pk')).iterator(
+        chunk_size=chunk_size,
+    )
+    for chunk in chunked(rows, chunk_size):
+        titles = encoder.encode(chunk)
+        if with_reviews:
+            titles = add_reviews(titles, chunk_size)
+        yield from titles
+
+
+def ndjson_lines(titles):
+    for title in titles:
+        yield json.dumps(title, ensure_ascii=False) + '\n'
+
+
+class Echo:
+    """A file-like object returning what is written, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(titles):
+    """One CSV row per title, category and genres as slugs."""
+
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_COLUMNS)
+    for title in titles:
+        yield writer.writerow((
+            title['id'],
+            title['name'],
+            title['year'],
+            title['description'],
+            title['category']['slug'] if title['category'] else '',
+            ','.join(genre['slug'] for genre in title['genre']),
+            title['rating'],
+        ))
+
+
+def export_lines(export_format, with_reviews=False, chunk_size=None):
+    """Lines of a catalog export, reviews are only nested in NDJSON."""
+
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f'Unknown export format {export_format!r}.')
+    if with_reviews and export_format != 'ndjson':
+        raise ValueError('Reviews are only exported as NDJSON.')
+    titles = export_titles(with_reviews, chunk_size)
+    if export_format == 'csv':
+        return csv_lines(titles)
+    return ndjson_lines(titles)
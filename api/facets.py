@@ -0,0 +1,201 @@
+"""Facet counts of the title filter, kept in FacetCount.
+
+Counts follow every title write as deltas: the facet keys of the
+changed titles are read before and after the change, and only the
+difference is applied. Facets of a filter combination are then
+sums of a few FacetCount rows, each facet counted with the filters
+of the other facets, in a single query.
+"""
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import (
+    CharField,
+    Count,
+    ExpressionWrapper,
+    F,
+    IntegerField,
+    Sum,
+    Value,
+)
+from django.db.models.functions import Cast
+
+from .cache import invalidate_on_commit
+from .models import FacetCount, Title
+
+"""
+NONE: sentinel of FacetCount keys, no category or year, any genre.
+"""
+NONE = 0
+
+"""
+FACET_FILTERS: query parameters of TitleFilterSet facets answer for.
+"""
+FACET_FILTERS = ('category', 'genre', 'year')
+
+
+def facet_keys(title_ids):
+    """FacetCount keys of the titles: (category, genre, year) counts."""
+
+    keys = Counter()
+    if not title_ids:
+        return keys
+    titles = {
+        pk: (category_id or NONE, year or NONE)
+        for pk, category_id, year in Title.objects.filter(
+            pk__in=title_ids,
+        ).values_list('pk', 'category_id', 'year')
+    }
+    for category_id, year in titles.values():
+        keys[category_id, NONE, year] += 1
+    for title_id, genre_id in Title.genre.through.objects.filter(
+        title_id__in=titles,
+    ).values_list('title_id', 'genre_id'):
+        category_id, year = titles[title_id]
+        keys[category_id, genre_id, year] += 1
+    return keys
+
+
+def apply_facet_changes(before, after):
+    """Shift counts from the keys `before` a change to those `after`."""
+
+    changes = Counter(after)
+    changes.subtract(before)
+    changed = False
+    for (category_id, genre_id, year), delta in changes.items():
+        if delta:
+            add_count(category_id, genre_id, year, delta)
+            changed = True
+    if changed:
+        invalidate_on_commit(FacetCount)
+
+
+def add_count(category_id, genre_id, year, delta):
+    rows = FacetCount.objects.filter(
+        category_id=category_id, genre_id=genre_id, year=year,
+    )
+    if rows.update(count=F('count') + delta):
+        return
+    try:
+        with transaction.atomic():
+            FacetCount.objects.create(
+                category_id=category_id,
+                genre_id=genre_id,
+                year=year,
+                count=delta,
+            )
+    except IntegrityError:
+        rows.update(count=F('count') + delta)
+
+
+def remove_category(category_id):
+    """Count titles of a deleted category as uncategorized."""
+
+    rows = FacetCount.objects.filter(category_id=category_id)
+    moved = Counter({
+        (NONE, genre_id, year): count
+        for genre_id, year, count in rows.values_list(
+            'genre_id', 'year', 'count',
+        )
+    })
+    rows.delete()
+    apply_facet_changes(Counter(), moved)
+
+
+def remove_genre(genre_id):
+    FacetCount.objects.filter(genre_id=genre_id).delete()
+    invalidate_on_commit(FacetCount)
+
+
+def rebuild_facets():
+    """Recount every facet from titles, returns the number of rows."""
+
+    keys = Counter()
+    for category_id, year, count in (
+        Title.objects.order_by().values_list('category_id', 'year')
+        .annotate(count=Count('pk'))
+    ):
+        keys[category_id or NONE, NONE, year or NONE] += count
+    for category_id, genre_id, year, count in (
+        Title.genre.through.objects.order_by()
+        .values_list('title__category_id', 'genre_id', 'title__year')
+        .annotate(count=Count('pk'))
+    ):
+        keys[category_id or NONE, genre_id, year or NONE] += count
+    with transaction.atomic():
+        FacetCount.objects.all().delete()
+        FacetCount.objects.bulk_create(
+            FacetCount(
+                category_id=category_id,
+                genre_id=genre_id,
+                year=year,
+                count=count,
+            )
+            for (category_id, genre_id, year), count in keys.items()
+        )
+        invalidate_on_commit(FacetCount)
+    return len(keys)
+
+
+def facet_rows(queryset, facet, key, label):
+    return (
+        queryset
+        .annotate(
+            facet=Value(facet, output_field=CharField()),
+            key=Cast(key, CharField()),
+            label=label,
+        )
+        .values('facet', 'key', 'label')
+        .annotate(total=Sum('count'))
+        .filter(total__gt=0)
+        .order_by()
+    )
+
+
+def title_facets(category=None, genre=None, year=None):
+    """Title counts per category, genre and decade, in one query.
+
+    Each facet is counted under the filters of the other ones:
+    category counts ignore `category`, and so on.
+    """
+
+    counts = FacetCount.objects.all()
+    by_category = counts.filter(genre__slug=genre) if genre else (
+        counts.filter(genre_id=NONE)
+    )
+    by_genre = counts.exclude(genre_id=NONE)
+    by_decade = by_category
+    if year:
+        by_category = by_category.filter(year=year)
+        by_genre = by_genre.filter(year=year)
+    if category:
+        by_genre = by_genre.filter(category__slug=category)
+        by_decade = by_decade.filter(category__slug=category)
+
+    decade = ExpressionWrapper(
+        F('year') / 10 * 10, output_field=IntegerField(),
+    )
+    rows = facet_rows(
+        by_category.exclude(category_id=NONE),
+        'category', F('category__slug'), F('category__name'),
+    ).union(
+        facet_rows(by_genre, 'genre', F('genre__slug'), F('genre__name')),
+        facet_rows(
+            by_decade.exclude(year=NONE),
+            'year', decade, Value(None, output_field=CharField()),
+        ),
+        all=True,
+    )
+
+    facets = {'category': [], 'genre': [], 'year': []}
+    for row in rows:
+        if row['facet'] == 'year':
+            item = {'decade': int(row['key'])}
+        else:
+            item = {'slug': row['key'], 'name': row['label']}
+        item['count'] = row['total']
+        facets[row['facet']].append(item)
+    facets['category'].sort(key=lambda item: item['name'])
+    facets['genre'].sort(key=lambda item: item['name'])
+    facets['year'].sort(key=lambda item: item['decade'])
+    return facets
@@ -1,6 +1,17 @@
 from django_filters import rest_framework
 
 from .models import Title
+from .search import search_titles
+
+
+class StableOrderingFilter(rest_framework.OrderingFilter):
+    """Ordering filter breaking ties by id, so pages don't overlap."""
+
+    def filter(self, qs, value):
+        qs = super().filter(qs, value)
+        if value:
+            qs = qs.order_by(*qs.query.order_by, 'pk')
+        return qs
 
 
 class TitleFilterSet(rest_framework.FilterSet):
@@ -8,6 +19,9 @@ class TitleFilterSet(rest_framework.FilterSet):
 
     fields: year, genre__slug, category__slug: exact filter
     field: name: contains filter
+    field: search: full-text prefix search, best matches first
+    field: min_rating: stored rating at least the value
+    field: ordering: by stored rating or review stats, `-` descending
     """
 
     year = rest_framework.NumberFilter(field_name='year')
@@ -17,6 +31,14 @@ class TitleFilterSet(rest_framework.FilterSet):
         field_name='name',
         lookup_expr='contains',
     )
+    search = rest_framework.CharFilter(method='filter_search')
+    min_rating = rest_framework.NumberFilter(
+        field_name='rating',
+        lookup_expr='gte',
+    )
+    ordering = StableOrderingFilter(
+        fields=('rating', 'review_count', 'last_review_date', 'year', 'name'),
+    )
 
     class Meta:
         model = Title
@@ -25,4 +47,10 @@ class TitleFilterSet(rest_framework.FilterSet):
             'year',
             'category',
             'genre',
+            'search',
+            'min_rating',
+            'ordering',
         )
+
+    def filter_search(self, queryset, name, value):
+        return search_titles(queryset, value)
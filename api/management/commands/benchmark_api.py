@@ -0,0 +1,89 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmark import (
+    DEFAULT_SCALE,
+    compare_reports,
+    plan_changes,
+    run_benchmark,
+    scratch_database,
+    seed_dataset,
+)
+from api.models import Title
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a scratch database with a synthetic catalog and measure '
+        'latency, queries, memory and query plans of every API endpoint.'
+    )
+
+    def add_arguments(self, parser):
+        for name, default in DEFAULT_SCALE.items():
+            parser.add_argument(
+                f'--{name}',
+                type=int,
+                default=default,
+                help=f'Number of synthetic {name} (default {default}).',
+            )
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--database-file',
+            help=(
+                'SQLite file for the scratch database, in memory by '
+                'default. Use a file for large datasets.'
+            ),
+        )
+        parser.add_argument(
+            '--keepdb',
+            action='store_true',
+            help='Keep the scratch database and reuse its dataset.',
+        )
+        parser.add_argument('--output', help='Write the JSON report here.')
+        parser.add_argument(
+            '--compare',
+            help=(
+                'Baseline JSON report, show query plan changes and fail '
+                'on regressions against it.'
+            ),
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=0.2,
+            help='Allowed relative latency/memory growth (default 0.2).',
+        )
+
+    def handle(self, *args, **options):
+        with scratch_database(options['database_file'], options['keepdb']):
+            if not Title.objects.exists():
+                seed_dataset(
+                    **{name: options[name] for name in DEFAULT_SCALE},
+                    seed=options['seed'],
+                    stdout=self.stdout,
+                )
+            report = run_benchmark(repeat=options['repeat'])
+
+        dump = json.dumps(report, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w') as report_file:
+                report_file.write(dump + '\n')
+        else:
+            self.stdout.write(dump)
+
+        if options['compare']:
+            with open(options['compare']) as baseline_file:
+                baseline = json.load(baseline_file)
+            for change in plan_changes(baseline, report):
+                self.stdout.write(f'Plan changed: {change}')
+            regressions = compare_reports(
+                baseline, report, options['threshold'],
+            )
+            if regressions:
+                raise CommandError(
+                    'Regressions against the baseline:\n'
+                    + '\n'.join(regressions)
+                )
+            self.stdout.write(self.style.SUCCESS('No regressions.'))
@@ -0,0 +1,54 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from api.benchmark import (
+    run_throughput_benchmark,
+    scratch_database,
+    seed_dataset,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare anonymous read throughput of concurrent clients under '
+        'WSGI, the Django ASGI handler and ASGI with cached reads.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=16)
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=50,
+            help='Requests per client.',
+        )
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--titles', type=int, default=200)
+        parser.add_argument('--reviews', type=int, default=2000)
+        parser.add_argument('--comments', type=int, default=5000)
+        parser.add_argument(
+            '--database-file',
+            help='SQLite file for the scratch database, in memory by default.',
+        )
+        parser.add_argument('--output', help='Write the JSON report here.')
+
+    def handle(self, *args, **options):
+        with scratch_database(options['database_file']):
+            seed_dataset(
+                users=options['users'],
+                titles=options['titles'],
+                reviews=options['reviews'],
+                comments=options['comments'],
+                stdout=self.stdout,
+            )
+            report = run_throughput_benchmark(
+                clients=options['clients'], requests=options['requests'],
+            )
+
+        dump = json.dumps(report, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w') as report_file:
+                report_file.write(dump + '\n')
+        else:
+            self.stdout.write(dump)
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.export import EXPORT_FORMATS, export_lines
+
+
+class Command(BaseCommand):
+    help = (
+        'Stream every title, with category, genres and rating, as NDJSON '
+        'or CSV. With --reviews, NDJSON titles nest their reviews and '
+        'comments.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--format', choices=tuple(EXPORT_FORMATS), default='ndjson',
+        )
+        parser.add_argument('--reviews', action='store_true')
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            help='Rows per database round trip, EXPORT_CHUNK_SIZE by default.',
+        )
+        parser.add_argument('--output', help='Write the export here.')
+
+    def handle(self, *args, **options):
+        try:
+            lines = export_lines(
+                options['format'], options['reviews'], options['chunk_size'],
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        if options['output']:
+            with open(
+                options['output'], 'w', encoding='utf-8', newline='',
+            ) as export_file:
+                export_file.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
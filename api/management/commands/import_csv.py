@@ -0,0 +1,302 @@
+import csv
+import os
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils.dateparse import parse_datetime
+
+from api.bulk import DEFAULT_BATCH_SIZE, bulk_insert, next_id
+from api.cache import invalidate_cache
+from api.facets import rebuild_facets
+from api.models import Categorie, Comment, Genre, Review, Title
+from api.ratings import recalculate_title_ratings
+
+User = get_user_model()
+
+"""
+IMPORT_ORDER: CSV files of the data directory in dependency order,
+each file is imported after the files its foreign keys point to.
+"""
+IMPORT_ORDER = (
+    'users',
+    'category',
+    'genre',
+    'titles',
+    'genre_title',
+    'review',
+    'comments',
+)
+
+
+def read_rows(path):
+    """Stream rows of a CSV file as dicts."""
+
+    with open(path, encoding='utf-8', newline='') as csv_file:
+        yield from csv.DictReader(csv_file)
+
+
+def optional_int(value):
+    return int(value) if value else None
+
+
+def index_definitions(tables):
+    """Droppable secondary indexes of the tables: (name, create SQL)."""
+
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                'SELECT name, sql FROM sqlite_master '
+                "WHERE type = 'index' AND sql IS NOT NULL AND tbl_name IN "
+                f'({", ".join(["%s"] * len(tables))})',
+                tables,
+            )
+        elif connection.vendor == 'postgresql':
+            cursor.execute(
+                'SELECT i.indexname, i.indexdef FROM pg_indexes i '
+                'WHERE i.tablename = ANY(%s) AND NOT EXISTS ('
+                'SELECT 1 FROM pg_constraint c '
+                'WHERE c.conname = i.indexname)',
+                [list(tables)],
+            )
+        else:
+            raise CommandError(
+                f'Dropping indexes is not supported on {connection.vendor}.'
+            )
+        return cursor.fetchall()
+
+
+@contextmanager
+def dropped_indexes(tables):
+    """Drop secondary indexes for the import and rebuild them after."""
+
+    definitions = index_definitions(tables)
+    with connection.cursor() as cursor:
+        for name, _ in definitions:
+            cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            for _, sql in definitions:
+                cursor.execute(sql)
+
+
+class Command(BaseCommand):
+    help = (
+        'Import data/*.csv with batched bulk inserts. CSV ids are mapped '
+        'to new primary keys, existing users, categories and genres are '
+        'matched by username/email and slug, repeated reviews of a title '
+        'by one author are skipped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=os.path.join(settings.BASE_DIR, 'data'),
+            help='Directory with the CSV files (default: data/).',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Rows per transaction.',
+        )
+        parser.add_argument(
+            '--drop-indexes',
+            action='store_true',
+            help='Drop secondary indexes during the import, rebuild after.',
+        )
+
+    def handle(self, *args, **options):
+        self.batch_size = options['batch_size']
+        self.ids = {name: {} for name in IMPORT_ORDER}
+        self.skipped = 0
+        tables = [
+            model._meta.db_table
+            for model in (User, Title, Title.genre.through, Review, Comment)
+        ]
+
+        started = time.perf_counter()
+        if options['drop_indexes']:
+            with dropped_indexes(tables):
+                total = self.import_all(options['path'])
+            self.stdout.write('Indexes rebuilt.')
+        else:
+            total = self.import_all(options['path'])
+        recalculate_title_ratings()
+        rebuild_facets()
+        invalidate_cache(Categorie, Genre, Title, Review, Comment)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {total} rows in {elapsed:.2f}s '
+            f'({total / elapsed:.0f} rows/s), skipped {self.skipped}.'
+        ))
+
+    def import_all(self, path):
+        total = 0
+        for name in IMPORT_ORDER:
+            csv_path = os.path.join(path, f'{name}.csv')
+            if not os.path.exists(csv_path):
+                continue
+            started = time.perf_counter()
+            rows = getattr(self, f'import_{name}')(read_rows(csv_path))
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'{name}: {rows} rows in {elapsed:.2f}s '
+                f'({rows / elapsed if elapsed else rows:.0f} rows/s)'
+            )
+            total += rows
+        return total
+
+    def insert(self, model, objs):
+        return bulk_insert(model, objs, batch_size=self.batch_size)
+
+    def resolve(self, name, csv_id):
+        """Primary key of an imported row, None if it wasn't imported."""
+
+        pk = self.ids[name].get(int(csv_id)) if csv_id else None
+        if csv_id and pk is None:
+            self.skipped += 1
+        return pk
+
+    def new_rows(
+        self, name, model, rows, existing_pk, build, remember=None,
+    ):
+        """Map rows to existing objects or build new ones with known pks.
+
+        New objects get consecutive primary keys, so the id map is
+        filled without reading inserted rows back. `remember(row, pk)`
+        records the keys of each new object, so later rows repeating
+        them map to it instead of failing the insert.
+        """
+
+        pk = next_id(model)
+        for row in rows:
+            found = existing_pk(row)
+            if found is not None:
+                self.ids[name][int(row['id'])] = found
+                continue
+            obj = build(row)
+            if obj is None:
+                continue
+            obj.pk = pk
+            self.ids[name][int(row['id'])] = pk
+            if remember is not None:
+                remember(row, pk)
+            pk += 1
+            yield obj
+
+    def import_users(self, rows):
+        by_username = dict(User.objects.values_list('username', 'pk'))
+        by_email = dict(User.objects.values_list('email', 'pk'))
+
+        def remember(row, pk):
+            by_username[row['username']] = pk
+            by_email[row['email']] = pk
+
+        return self.insert(User, self.new_rows(
+            'users',
+            User,
+            rows,
+            lambda row: by_username.get(
+                row['username'], by_email.get(row['email']),
+            ),
+            lambda row: User(
+                username=row['username'],
+                email=row['email'],
+                role=row['role'] or User._meta.get_field('role').default,
+                bio=row.get('description') or row.get('bio') or None,
+                first_name=row.get('first_name', ''),
+                last_name=row.get('last_name', ''),
+                password='!',
+            ),
+            remember,
+        ))
+
+    def import_slugged(self, name, model, rows):
+        by_slug = dict(model.objects.values_list('slug', 'pk'))
+        return self.insert(model, self.new_rows(
+            name,
+            model,
+            rows,
+            lambda row: by_slug.get(row['slug']),
+            lambda row: model(name=row['name'], slug=row['slug']),
+            lambda row, pk: by_slug.setdefault(row['slug'], pk),
+        ))
+
+    def import_category(self, rows):
+        return self.import_slugged('category', Categorie, rows)
+
+    def import_genre(self, rows):
+        return self.import_slugged('genre', Genre, rows)
+
+    def import_titles(self, rows):
+        return self.insert(Title, self.new_rows(
+            'titles',
+            Title,
+            rows,
+            lambda row: None,
+            lambda row: Title(
+                name=row['name'],
+                year=optional_int(row['year']),
+                description=row.get('description') or None,
+                category_id=self.resolve('category', row['category']),
+            ),
+        ))
+
+    def import_genre_title(self, rows):
+        def links():
+            for row in rows:
+                title_id = self.resolve('titles', row['title_id'])
+                genre_id = self.resolve('genre', row['genre_id'])
+                if title_id and genre_id:
+                    yield Title.genre.through(
+                        title_id=title_id, genre_id=genre_id,
+                    )
+
+        return self.insert(Title.genre.through, links())
+
+    def import_review(self, rows):
+        authors = set()
+
+        def build(row):
+            title_id = self.resolve('titles', row['title_id'])
+            author_id = self.resolve('users', row['author_id'])
+            if not title_id or not author_id:
+                return None
+            if (title_id, author_id) in authors:
+                self.skipped += 1
+                return None
+            authors.add((title_id, author_id))
+            return Review(
+                title_id=title_id,
+                author_id=author_id,
+                text=row['text'],
+                score=optional_int(row['score']),
+                pub_date=parse_datetime(row['pub_date']),
+            )
+
+        return self.insert(Review, self.new_rows(
+            'review', Review, rows, lambda row: None, build,
+        ))
+
+    def import_comments(self, rows):
+        def comments():
+            for row in rows:
+                review_id = self.resolve('review', row['review_id'])
+                author_id = self.resolve(
+                    'users', row.get('author_id', row.get('author')),
+                )
+                if review_id and author_id:
+                    yield Comment(
+                        review_id=review_id,
+                        author_id=author_id,
+                        text=row['text'],
+                        pub_date=parse_datetime(row['pub_date']),
+                    )
+
+        return self.insert(Comment, comments())
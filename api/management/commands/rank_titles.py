@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.rankings import update_rankings
+
+
+class Command(BaseCommand):
+    help = (
+        'Settle reviews published since the last run into title '
+        'activity and rebuild the top rated and trending rankings.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=float,
+            help='Keep running, rebuilding every this many seconds.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            counted, rows = update_rankings()
+            self.stdout.write(
+                f'Settled {counted} reviews, stored {rows} positions.'
+            )
+            if options['interval'] is None:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS('Rankings updated.'))
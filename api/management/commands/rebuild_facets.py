@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from api.facets import rebuild_facets
+
+
+class Command(BaseCommand):
+    help = 'Recount the title facet counts from titles and their genres.'
+
+    def handle(self, *args, **options):
+        rows = rebuild_facets()
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt {rows} facet counts.')
+        )
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.cache import invalidate_cache
+from api.models import Title
+from api.ratings import recalculate_title_ratings
+
+
+class Command(BaseCommand):
+    help = 'Rebuild stored title ratings from reviews.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            updated = recalculate_title_ratings()
+        invalidate_cache(Title)
+        self.stdout.write(
+            self.style.SUCCESS(f'Recalculated ratings of {updated} titles.')
+        )
@@ -0,0 +1,34 @@
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from api.replicas import sync_replica
+
+
+class Command(BaseCommand):
+    help = (
+        'Copy the default SQLite database into every replica of '
+        'REPLICA_DATABASES, a stand-in for replication.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=float,
+            help='Keep running, syncing every this many seconds.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            for alias in settings.REPLICA_DATABASES:
+                try:
+                    sync_replica(alias)
+                except ImproperlyConfigured as error:
+                    raise CommandError(error)
+                self.stdout.write(f'Synced {alias}.')
+            if options['interval'] is None:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS('Replicas synced.'))
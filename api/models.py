@@ -2,7 +2,8 @@ from datetime import datetime as dt
 
 from django.contrib.auth import get_user_model
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, router, transaction
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 User = get_user_model()
@@ -14,6 +15,12 @@ Relevant for upcoming movies, books, etc.
 """
 MAX_YEARS_TITLES = dt.now().year + 10
 
+"""
+SCORES: review scores, each counted by a `score_<n>` field of Title.
+"""
+SCORES = range(1, 11)
+SCORE_FIELDS = tuple(f'score_{score}' for score in SCORES)
+
 
 class Categorie(models.Model):
     """Model for categories titles: films, books, etc."""
@@ -110,12 +117,112 @@ class Title(models.Model):
         related_name='titles',
         verbose_name=_('title category'),
     )
+    rating_sum = models.PositiveIntegerField(
+        _('sum of review scores'),
+        default=0,
+        editable=False,
+    )
+    rating_count = models.PositiveIntegerField(
+        _('number of review scores'),
+        default=0,
+        editable=False,
+    )
+    rating = models.FloatField(
+        _('title rating'),
+        null=True,
+        blank=True,
+        editable=False,
+    )
+    review_count = models.PositiveIntegerField(
+        _('number of reviews'),
+        default=0,
+        editable=False,
+    )
+    last_review_date = models.DateTimeField(
+        _('publication date of the latest review'),
+        null=True,
+        blank=True,
+        editable=False,
+    )
+    update_date = models.DateTimeField(
+        _('update date of the title or its reviews'),
+        auto_now=True,
+    )
+    score_1 = models.PositiveIntegerField(
+        _('number of reviews scored 1'),
+        default=0,
+        editable=False,
+    )
+    score_2 = models.PositiveIntegerField(
+        _('number of reviews scored 2'),
+        default=0,
+        editable=False,
+    )
+    score_3 = models.PositiveIntegerField(
+        _('number of reviews scored 3'),
+        default=0,
+        editable=False,
+    )
+    score_4 = models.PositiveIntegerField(
+        _('number of reviews scored 4'),
+        default=0,
+        editable=False,
+    )
+    score_5 = models.PositiveIntegerField(
+        _('number of reviews scored 5'),
+        default=0,
+        editable=False,
+    )
+    score_6 = models.PositiveIntegerField(
+        _('number of reviews scored 6'),
+        default=0,
+        editable=False,
+    )
+    score_7 = models.PositiveIntegerField(
+        _('number of reviews scored 7'),
+        default=0,
+        editable=False,
+    )
+    score_8 = models.PositiveIntegerField(
+        _('number of reviews scored 8'),
+        default=0,
+        editable=False,
+    )
+    score_9 = models.PositiveIntegerField(
+        _('number of reviews scored 9'),
+        default=0,
+        editable=False,
+    )
+    score_10 = models.PositiveIntegerField(
+        _('number of reviews scored 10'),
+        default=0,
+        editable=False,
+    )
 
     def __str__(self):
         return self.name
 
     class Meta:
         ordering = ('name',)
+        indexes = (
+            models.Index(
+                fields=('category', 'name'),
+                name='title_category_name_idx',
+            ),
+            models.Index(
+                fields=('year', 'name'),
+                name='title_year_name_idx',
+            ),
+            models.Index(fields=('rating',), name='title_rating_idx'),
+            models.Index(
+                fields=('review_count',),
+                name='title_review_count_idx',
+            ),
+            models.Index(
+                fields=('last_review_date',),
+                name='title_last_review_idx',
+            ),
+        )
         verbose_name = 'Title'
         verbose_name_plural = 'Titles'
 
@@ -150,15 +257,59 @@ class Review(models.Model):
     )
     pub_date = models.DateTimeField(
         _('publication date'),
-        auto_now_add=True,
+        default=timezone.now,
+        editable=False,
         db_index=True,
     )
+    update_date = models.DateTimeField(
+        _('update date of the review or its comments'),
+        auto_now=True,
+    )
 
     def __str__(self):
         return self.text
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'score' in instance.__dict__:
+            instance._stored_score = instance.score
+        return instance
+
+    def save(self, *args, **kwargs):
+        """Save the review and the title rating in one transaction.
+
+        With FEED_DATABASE set the review is saved in another database
+        than its title, and the rating, stats, facet and activity
+        updates of its signals commit separately. A failure between
+        the two commits lets stored counters drift from the reviews,
+        the `recalculate_ratings` command rebuilds them.
+        """
+
+        using = kwargs.get('using') or router.db_for_write(
+            type(self), instance=self,
+        )
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+
     class Meta:
         ordering = ('-pub_date',)
+        constraints = (
+            models.UniqueConstraint(
+                fields=('title', 'author'),
+                name='unique_review_title_author',
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('title', '-pub_date', '-id'),
+                name='review_title_pub_date_idx',
+            ),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='review_author_pub_date_idx',
+            ),
+        )
         verbose_name = 'Review'
         verbose_name_plural = 'Reviews'
 
@@ -185,14 +336,152 @@ class Comment(models.Model):
     )
     pub_date = models.DateTimeField(
         _('publication date'),
-        auto_now_add=True,
+        default=timezone.now,
+        editable=False,
         db_index=True,
     )
+    update_date = models.DateTimeField(
+        _('update date'),
+        auto_now=True,
+    )
 
     def __str__(self):
         return self.text
 
     class Meta:
         ordering = ('-pub_date',)
+        indexes = (
+            models.Index(
+                fields=('review', '-pub_date', '-id'),
+                name='comment_review_pub_date_idx',
+            ),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='comment_author_pub_date_idx',
+            ),
+        )
         verbose_name = 'Comment'
         verbose_name_plural = 'Comments'
+
+
+class TitleTrend(models.Model):
+    """Review activity of a title, the input of trending rankings.
+
+    `activity` sums 2 ** (age / half-life) of the title's reviews
+    published before `RankingState.settled`, ages counted from
+    `RankingState.epoch`: its decay is one factor shared by every
+    title.
+    """
+
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trend',
+        verbose_name=_('trend title'),
+    )
+    activity = models.FloatField(_('review activity'), default=0)
+
+    class Meta:
+        verbose_name = 'Title trend'
+        verbose_name_plural = 'Title trends'
+
+
+class RankingState(models.Model):
+    """Progress of the ranking job, a single row."""
+
+    epoch = models.DateTimeField(_('reference time of activities'))
+    settled = models.DateTimeField(
+        _('reviews published before are counted in activities'),
+        null=True,
+        blank=True,
+    )
+    computed = models.DateTimeField(
+        _('time rankings were computed'),
+        null=True,
+        blank=True,
+    )
+
+    class Meta:
+        verbose_name = 'Ranking state'
+        verbose_name_plural = 'Ranking states'
+
+
+class TitleRanking(models.Model):
+    """A position of a title in a precomputed ranking.
+
+    Rankings are rebuilt by `manage.py rank_titles`, pages of one
+    are read from the (kind, scope, position) unique index.
+    """
+
+    TOP = 'top'
+    TRENDING = 'trending'
+    KINDS = (
+        (TOP, _('top rated')),
+        (TRENDING, _('trending')),
+    )
+
+    kind = models.CharField(_('ranking kind'), max_length=16, choices=KINDS)
+    scope = models.CharField(
+        _('ranking scope'),
+        max_length=140,
+        blank=True,
+        help_text=_(
+            'Empty for all titles, category:<slug> or genre:<slug>.'
+        ),
+    )
+    position = models.PositiveIntegerField(_('position'))
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='rankings',
+        verbose_name=_('ranked title'),
+    )
+    score = models.FloatField(_('ranking score'))
+
+    class Meta:
+        ordering = ('kind', 'scope', 'position')
+        constraints = (
+            models.UniqueConstraint(
+                fields=('kind', 'scope', 'position'),
+                name='unique_ranking_position',
+            ),
+        )
+        verbose_name = 'Title ranking'
+        verbose_name_plural = 'Title rankings'
+
+
+class FacetCount(models.Model):
+    """Number of titles of a category, genre and year, see api/facets.py.
+
+    Every title is counted once with `genre_id` 0, for any genre, and
+    once per genre. A `category_id` or `year` of 0 stands for none;
+    sentinels rather than NULLs keep the key unique.
+    """
+
+    category = models.ForeignKey(
+        Categorie,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+',
+        verbose_name=_('facet category'),
+    )
+    genre = models.ForeignKey(
+        Genre,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+',
+        verbose_name=_('facet genre'),
+    )
+    year = models.PositiveSmallIntegerField(_('facet year'))
+    count = models.IntegerField(_('number of titles'), default=0)
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('genre', 'category', 'year'),
+                name='unique_facet_count',
+            ),
+        )
+        verbose_name = 'Facet count'
+        verbose_name_plural = 'Facet counts'
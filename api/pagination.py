@@ -0,0 +1,276 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as DecodeError
+from collections import OrderedDict
+from functools import partial
+from hashlib import md5
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from .cache import get_cache, get_generation
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator taking the total count from the cache when it's there."""
+
+    def __init__(self, *args, cache_key=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache_key = cache_key
+
+    @cached_property
+    def count(self):
+        cache = get_cache()
+        count = cache.get(self.cache_key)
+        if count is None:
+            count = super().count
+            cache.set(self.cache_key, count, settings.COUNT_CACHE_TIMEOUT)
+        return count
+
+
+class UncountedPage(list):
+    """Page of a paginator which never counted its rows."""
+
+    paginator = None
+
+    def __init__(self, rows, number, has_next):
+        super().__init__(rows)
+        self.number = number
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self.number > 1
+
+    def next_page_number(self):
+        return self.number + 1
+
+    def previous_page_number(self):
+        return self.number - 1
+
+
+class CachedCountPagination(PageNumberPagination):
+    """Page number pagination with cached or skipped total counts.
+
+    Counts are cached per model and SQL of the filtered queryset
+    for `COUNT_CACHE_TIMEOUT` seconds and dropped on every write
+    to the model (see api/signals.py). `?count=false` skips the
+    count, `count` is null then.
+    """
+
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if request.query_params.get(self.count_query_param) in (
+            'false', '0',
+        ):
+            return self.paginate_without_count(queryset, request)
+        self.django_paginator_class = partial(
+            CachedCountPaginator, cache_key=self.count_cache_key(queryset),
+        )
+        return super().paginate_queryset(queryset, request, view)
+
+    def count_cache_key(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        digest = md5(f'{sql}{params!r}'.encode()).hexdigest()
+        label = queryset.model._meta.label_lower
+        generation = get_generation(label)
+        return f'count:{label}:{generation}:{queryset.db}:{digest}'
+
+    def paginate_without_count(self, queryset, request):
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        number = request.query_params.get(self.page_query_param, 1)
+        try:
+            number = int(number)
+            if number < 1:
+                raise ValueError
+        except ValueError:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=number, message='That page number is invalid.',
+            ))
+
+        offset = (number - 1) * page_size
+        rows = list(queryset[offset:offset + page_size + 1])
+        if not rows and number > 1:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=number, message='That page contains no results.',
+            ))
+        self.page = UncountedPage(
+            rows[:page_size], number, has_next=len(rows) > page_size,
+        )
+        self.request = request
+        self.display_page_controls = False
+        return list(self.page)
+
+    def get_paginated_response(self, data):
+        if self.page.paginator is not None:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict((
+            ('count', None),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        )))
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination over `-pub_date` with an `-id` tiebreak.
+
+    A cursor holds the position of the last (or first) row of
+    a page, the next page is a range scan from that position,
+    so every page costs the same and rows inserted meanwhile
+    don't shift pages. No total count is returned.
+    """
+
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        cursor = self.decode_cursor(request)
+        limit = self.page_size + 1
+
+        if cursor is None:
+            rows = list(queryset.order_by('-pub_date', '-id')[:limit])
+            self.has_previous = False
+            self.has_next = len(rows) > self.page_size
+            self.page = rows[:self.page_size]
+            return self.page
+
+        direction, pub_date, pk = cursor
+        if direction == 'n':
+            rows = list(
+                queryset
+                .filter(
+                    Q(pub_date__lt=pub_date)
+                    | Q(pub_date=pub_date, id__lt=pk)
+                )
+                .order_by('-pub_date', '-id')[:limit]
+            )
+            self.has_previous = True
+            self.has_next = len(rows) > self.page_size
+            self.page = rows[:self.page_size]
+        else:
+            rows = list(
+                queryset
+                .filter(
+                    Q(pub_date__gt=pub_date)
+                    | Q(pub_date=pub_date, id__gt=pk)
+                )
+                .order_by('pub_date', 'id')[:limit]
+            )
+            self.has_previous = len(rows) > self.page_size
+            self.has_next = True
+            self.page = rows[:self.page_size][::-1]
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.link('n', self.page[-1])
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.link('p', self.page[0])
+
+    def link(self, direction, row):
+        pub_date, pk = self.position(row)
+        cursor = urlsafe_b64encode(
+            f'{direction}|{pub_date.isoformat()}|{pk}'.encode()
+        ).decode()
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, cursor,
+        )
+
+    @staticmethod
+    def position(row):
+        if isinstance(row, dict):
+            return row['pub_date'], row['id']
+        return row.pub_date, row.pk
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            direction, pub_date, pk = (
+                urlsafe_b64decode(encoded.encode()).decode().split('|')
+            )
+            pub_date = parse_datetime(pub_date)
+            pk = int(pk)
+        except (DecodeError, UnicodeDecodeError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if direction not in ('n', 'p') or pub_date is None:
+            raise NotFound(self.invalid_cursor_message)
+        return direction, pub_date, pk
+
+
+class FeedPagination(BasePagination):
+    """Page numbers by default, keyset cursors on request.
+
+    `?pagination=cursor` starts a cursor feed, the links it returns
+    carry a `cursor` parameter which keeps the feed in that mode.
+    """
+
+    mode_query_param = 'pagination'
+    cursor_class = KeysetPagination
+    page_number_class = CachedCountPagination
+
+    def __init__(self):
+        self.delegate = self.page_number_class()
+
+    def cursor_requested(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or self.cursor_class.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_requested(request):
+            self.delegate = self.cursor_class()
+        else:
+            self.delegate = self.page_number_class()
+        return self.delegate.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.delegate.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.delegate.get_paginated_response_schema(schema)
+
+    @property
+    def display_page_controls(self):
+        return getattr(self.delegate, 'display_page_controls', False)
+
+    def to_html(self):
+        return self.delegate.to_html()
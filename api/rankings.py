@@ -0,0 +1,215 @@
+"""Top rated and trending rankings of titles, computed by a job.
+
+Top rated ranks the stored rating sums and counts with Bayesian
+smoothing: every title starts with RANKING_PRIOR_REVIEWS reviews of
+the mean score, so a single 10 doesn't beat a hundred 9s. Trending
+ranks review activity decayed with RANKING_TREND_HALF_LIFE. Reviews
+are settled into TitleTrend by publication date once they are
+RANKING_TREND_SETTLE old, each run adding those published since the
+last one, so reviews committed late are still counted. Activity of
+newer reviews is recomputed by every run, and deleted reviews are
+subtracted by forget_review(). Rankings of all titles, of every
+category and of every genre are stored in TitleRanking, the API
+reads them by position.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .bulk import chunked
+from .cache import invalidate_cache
+from .models import RankingState, Review, Title, TitleRanking, TitleTrend
+
+"""
+REBASE_HALF_LIVES: age of the activity epoch, in half-lives, after
+which activities are rescaled to a new epoch, far below the float
+overflow at about 1024 half-lives.
+"""
+REBASE_HALF_LIVES = 64
+
+
+def bayesian_score(rating_sum, rating_count, mean, prior):
+    return (prior * mean + rating_sum) / (prior + rating_count)
+
+
+def decay(seconds):
+    """Weight of something `seconds` old, relative to a new one."""
+
+    return 2 ** (-seconds / settings.RANKING_TREND_HALF_LIFE)
+
+
+def get_state(now):
+    state = RankingState.objects.select_for_update().first()
+    if state is None:
+        state = RankingState.objects.create(epoch=now)
+    return state
+
+
+def rebase(state, now):
+    """Move the epoch to `now` once it's REBASE_HALF_LIVES old."""
+
+    age = (now - state.epoch).total_seconds()
+    if age < REBASE_HALF_LIVES * settings.RANKING_TREND_HALF_LIFE:
+        return
+    TitleTrend.objects.update(activity=F('activity') * decay(age))
+    state.epoch = now
+
+
+def recent_reviews(state):
+    """Reviews not yet counted in TitleTrend activities."""
+
+    if state.settled is None:
+        return Review.objects.all()
+    return Review.objects.filter(pub_date__gte=state.settled)
+
+
+def review_activity(reviews, now):
+    """Decayed activity of the reviews at `now` by title id, and count."""
+
+    activity = defaultdict(float)
+    counted = 0
+    for title_id, pub_date in reviews.values_list(
+        'title_id', 'pub_date',
+    ).iterator():
+        activity[title_id] += decay((now - pub_date).total_seconds())
+        counted += 1
+    return activity, counted
+
+
+def accumulate_activity(state, now):
+    """Settle reviews RANKING_TREND_SETTLE old into title activities.
+
+    Returns the number of settled reviews.
+    """
+
+    settled = now - timedelta(seconds=settings.RANKING_TREND_SETTLE)
+    if state.settled is not None and settled <= state.settled:
+        return 0
+    added, counted = review_activity(
+        recent_reviews(state).filter(pub_date__lt=settled), state.epoch,
+    )
+    state.settled = settled
+
+    trends = TitleTrend.objects.in_bulk(list(added))
+    for title_id, trend in trends.items():
+        trend.activity += added.pop(title_id)
+    TitleTrend.objects.bulk_update(trends.values(), ('activity',))
+    TitleTrend.objects.bulk_create(
+        TitleTrend(title_id=title_id, activity=activity)
+        for title_id, activity in added.items()
+    )
+    return counted
+
+
+def forget_review(review):
+    """Subtract a deleted review from the activity it is settled into."""
+
+    with transaction.atomic():
+        state = RankingState.objects.select_for_update().first()
+        if (
+            state is None
+            or state.settled is None
+            or review.pub_date >= state.settled
+        ):
+            return
+        TitleTrend.objects.filter(title_id=review.title_id).update(
+            activity=F('activity') - decay(
+                (state.epoch - review.pub_date).total_seconds(),
+            ),
+        )
+
+
+def title_scopes():
+    """Ranking scopes of every title: all, its category and genres."""
+
+    scopes = {
+        pk: ['', f'category:{category}'] if category else ['']
+        for pk, category in Title.objects.values_list('pk', 'category__slug')
+    }
+    for pk, genre in Title.genre.through.objects.values_list(
+        'title_id', 'genre__slug',
+    ):
+        scopes[pk].append(f'genre:{genre}')
+    return scopes
+
+
+def top_scores():
+    """Smoothed ratings of rated titles, by title id."""
+
+    totals = Title.objects.aggregate(
+        rating_sum=Sum('rating_sum'), rating_count=Sum('rating_count'),
+    )
+    if not totals['rating_count']:
+        return {}
+    mean = totals['rating_sum'] / totals['rating_count']
+    prior = settings.RANKING_PRIOR_REVIEWS
+    return {
+        pk: bayesian_score(rating_sum, rating_count, mean, prior)
+        for pk, rating_sum, rating_count in Title.objects.filter(
+            rating_count__gt=0,
+        ).values_list('pk', 'rating_sum', 'rating_count')
+    }
+
+
+def trending_scores(state, now):
+    """Decayed review activity of active titles, by title id."""
+
+    factor = decay((now - state.epoch).total_seconds())
+    scores, _ = review_activity(recent_reviews(state), now)
+    for title_id, activity in TitleTrend.objects.filter(
+        activity__gt=0,
+    ).values_list('title_id', 'activity'):
+        scores[title_id] += activity * factor
+    return dict(scores)
+
+
+def ranking_rows(kind, scores, scopes):
+    """TitleRanking rows of every scope, best first, ties by id."""
+
+    ranked = defaultdict(list)
+    for pk, score in scores.items():
+        for scope in scopes.get(pk, ('',)):
+            ranked[scope].append((-score, pk))
+    for scope, items in ranked.items():
+        items.sort()
+        for position, (score, pk) in enumerate(
+            items[:settings.RANKING_SIZE], start=1,
+        ):
+            yield TitleRanking(
+                kind=kind,
+                scope=scope,
+                position=position,
+                title_id=pk,
+                score=-score,
+            )
+
+
+def update_rankings(now=None):
+    """Settle reviews into activities and rebuild every ranking.
+
+    Returns (settled reviews, stored ranking rows).
+    """
+
+    now = now or timezone.now()
+    with transaction.atomic():
+        state = get_state(now)
+        rebase(state, now)
+        counted = accumulate_activity(state, now)
+        scopes = title_scopes()
+        rows = 0
+        TitleRanking.objects.all().delete()
+        for kind, scores in (
+            (TitleRanking.TOP, top_scores()),
+            (TitleRanking.TRENDING, trending_scores(state, now)),
+        ):
+            for chunk in chunked(ranking_rows(kind, scores, scopes), 5000):
+                TitleRanking.objects.bulk_create(chunk)
+                rows += len(chunk)
+        state.computed = now
+        state.save()
+    invalidate_cache(TitleRanking)
+    return counted, rows
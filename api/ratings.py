@@ -0,0 +1,163 @@
+from collections import defaultdict
+
+from django.db.models import (
+    Avg,
+    Count,
+    DateTimeField,
+    ExpressionWrapper,
+    F,
+    FloatField,
+    Max,
+    OuterRef,
+    Subquery,
+    Sum,
+    Value,
+)
+from django.db.models.functions import Cast, Coalesce, Greatest, NullIf
+from django.utils import timezone
+
+from .bulk import chunked
+from .db import same_database
+from .models import SCORE_FIELDS, SCORES, Review, Title
+
+STATS_CHUNK_SIZE = 500
+
+
+def apply_score_change(
+    title_id, old_score, new_score, review_delta=0, pub_date=None,
+):
+    """Apply a review change to its title.
+
+    Shifts the stored rating and score histogram by one review score
+    change and stamps the title's update date. `old_score` is None
+    for a new review, `new_score` is None for a deleted one.
+    `review_delta` is 1 for a new review, with its `pub_date`, and
+    -1 for a deleted one. Runs a single UPDATE with F expressions,
+    so concurrent reviews of the same title don't lose updates.
+    Returns whether the rating or the review stats changed.
+    """
+
+    changes = {'update_date': timezone.now()}
+    sum_delta = (new_score or 0) - (old_score or 0)
+    count_delta = (new_score is not None) - (old_score is not None)
+    if old_score != new_score:
+        for score, delta in ((old_score, -1), (new_score, 1)):
+            if score is not None:
+                changes[f'score_{score}'] = F(f'score_{score}') + delta
+    if review_delta:
+        changes['review_count'] = F('review_count') + review_delta
+    if review_delta > 0:
+        pub_date = Value(pub_date, output_field=DateTimeField())
+        changes['last_review_date'] = Greatest(
+            Coalesce('last_review_date', pub_date), pub_date,
+        )
+    elif review_delta < 0:
+        latest = Review.objects.filter(title=title_id).order_by('-pub_date')
+        if same_database(Review, Title):
+            latest = Subquery(latest.values('pub_date')[:1])
+        else:
+            latest = latest.values_list('pub_date', flat=True).first()
+        changes['last_review_date'] = latest
+    if sum_delta or count_delta:
+        rating_sum = F('rating_sum') + sum_delta
+        rating_count = F('rating_count') + count_delta
+        changes.update(
+            rating_sum=rating_sum,
+            rating_count=rating_count,
+            rating=ExpressionWrapper(
+                Cast(rating_sum, FloatField())
+                / NullIf(rating_count, Value(0)),
+                output_field=FloatField(),
+            ),
+        )
+    Title.objects.filter(pk=title_id).update(**changes)
+    return len(changes) > 1
+
+
+def recalculate_title_ratings(queryset=None):
+    """Rebuild stored ratings and review stats of titles from reviews.
+
+    Returns the number of updated titles.
+    """
+
+    if queryset is None:
+        queryset = Title.objects.all()
+    if not same_database(Review, Title):
+        return copy_title_ratings(queryset)
+    reviews = (
+        Review.objects
+        .filter(title=OuterRef('pk'))
+        .order_by()
+        .values('title')
+    )
+    scores = reviews.filter(score__isnull=False)
+    histogram = {
+        f'score_{score}': Coalesce(
+            Subquery(
+                scores.filter(score=score)
+                .annotate(total=Count('pk'))
+                .values('total')
+            ),
+            0,
+        )
+        for score in SCORES
+    }
+    return queryset.update(
+        **histogram,
+        review_count=Coalesce(
+            Subquery(reviews.annotate(total=Count('pk')).values('total')),
+            0,
+        ),
+        last_review_date=Subquery(
+            reviews.annotate(last=Max('pub_date')).values('last')
+        ),
+        rating_sum=Coalesce(
+            Subquery(scores.annotate(total=Sum('score')).values('total')),
+            0,
+        ),
+        rating_count=Coalesce(
+            Subquery(scores.annotate(total=Count('score')).values('total')),
+            0,
+        ),
+        rating=Subquery(scores.annotate(avg=Avg('score')).values('avg')),
+    )
+
+
+def copy_title_ratings(queryset):
+    """recalculate_title_ratings() of reviews in another database."""
+
+    fields = (
+        *SCORE_FIELDS, 'review_count', 'last_review_date',
+        'rating_sum', 'rating_count', 'rating',
+    )
+    updated = 0
+    title_ids = queryset.order_by('pk').values_list('pk', flat=True)
+    for chunk in chunked(title_ids.iterator(), STATS_CHUNK_SIZE):
+        titles = {pk: Title(pk=pk) for pk in chunk}
+        stats = defaultdict(list)
+        for row in (
+            Review.objects
+            .filter(title_id__in=chunk)
+            .order_by()
+            .values('title_id', 'score')
+            .annotate(total=Count('pk'), last=Max('pub_date'))
+        ):
+            stats[row['title_id']].append(row)
+        for pk, rows in stats.items():
+            title = titles[pk]
+            for row in rows:
+                title.review_count += row['total']
+                if (
+                    title.last_review_date is None
+                    or row['last'] > title.last_review_date
+                ):
+                    title.last_review_date = row['last']
+                if row['score'] is not None:
+                    setattr(title, f'score_{row["score"]}', row['total'])
+                    title.rating_sum += row['score'] * row['total']
+                    title.rating_count += row['total']
+            if title.rating_count:
+                title.rating = title.rating_sum / title.rating_count
+        Title.objects.bulk_update(titles.values(), fields)
+        updated += len(titles)
+    return updated
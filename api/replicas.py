@@ -0,0 +1,111 @@
+"""Read replicas of the default database, for safe requests.
+
+ReplicaMiddleware sends the reads of GET, HEAD and OPTIONS requests
+to one of REPLICA_DATABASES, see ReplicaRouter. A client that writes
+gets a signed cookie pinning its reads to the primary for
+REPLICA_PIN_SECONDS, so it reads its own writes. A replica serves
+reads only while it misses at most REPLICA_MAX_LAG seconds of the
+writes made through the API, otherwise reads fall back to the
+primary: the stamps of the last write, WRITES bumped along with the
+cache stamps when a write commits, and of every replica's last sync
+are kept in the API cache.
+
+On SQLite, sync_replica() stands in for replication, copying the
+default database into a replica with the backup API.
+"""
+import random
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+
+from .cache import WRITES, get_cache, get_generation
+from .db import reading_from
+
+PIN_SALT = 'replica-pin'
+
+
+def synced_key(alias):
+    return f'replication:synced:{alias}'
+
+
+def fresh_replicas():
+    """Replicas missing at most REPLICA_MAX_LAG seconds of writes."""
+
+    aliases = settings.REPLICA_DATABASES
+    if not aliases:
+        return []
+    oldest = get_generation(WRITES) - settings.REPLICA_MAX_LAG * 10 ** 9
+    synced = get_cache().get_many([synced_key(alias) for alias in aliases])
+    return [
+        alias for alias in aliases
+        if synced.get(synced_key(alias), oldest - 1) >= oldest
+    ]
+
+
+def sync_replica(alias):
+    """Copy the default database into the replica `alias`.
+
+    The replica is stamped with the time the copy started, so it
+    never looks newer than it is. Other backends replicate on their
+    own, ImproperlyConfigured is raised for them.
+    """
+
+    source = connections[DEFAULT_DB_ALIAS]
+    target = connections[alias]
+    if source.vendor != 'sqlite' or target.vendor != 'sqlite':
+        raise ImproperlyConfigured('Replicas are only synced on SQLite.')
+    started = time.time_ns()
+    source.ensure_connection()
+    target.ensure_connection()
+    source.connection.backup(target.connection)
+    get_cache().set(synced_key(alias), started, None)
+
+
+class ReplicaMiddleware:
+    """Route reads of a request to a fresh replica, unless pinned.
+
+    Responses streamed after the view returns read from the primary.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.REPLICA_DATABASES:
+            return self.get_response(request)
+        if request.method not in SAFE_METHODS:
+            response = self.get_response(request)
+            if response.status_code < 400:
+                self.pin(response)
+            return response
+
+        alias = None
+        if not self.is_pinned(request):
+            replicas = fresh_replicas()
+            if replicas:
+                alias = random.choice(replicas)
+        with reading_from(alias):
+            return self.get_response(request)
+
+    @staticmethod
+    def is_pinned(request):
+        return request.get_signed_cookie(
+            settings.REPLICA_PIN_COOKIE,
+            default=None,
+            salt=PIN_SALT,
+            max_age=settings.REPLICA_PIN_SECONDS,
+        ) is not None
+
+    @staticmethod
+    def pin(response):
+        response.set_signed_cookie(
+            settings.REPLICA_PIN_COOKIE,
+            '1',
+            salt=PIN_SALT,
+            max_age=settings.REPLICA_PIN_SECONDS,
+            httponly=True,
+            samesite='Lax',
+        )
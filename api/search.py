@@ -0,0 +1,175 @@
+import re
+
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import Title
+
+SEARCH_TABLE = f'{Title._meta.db_table}_search'
+SEARCH_FIELDS = ('name', 'description')
+SEARCH_WEIGHTS = (10.0, 1.0)
+"""
+SEARCH_CONFIG, SEARCH_LABELS: text search configuration and weight
+labels of SEARCH_FIELDS on PostgreSQL.
+"""
+SEARCH_CONFIG = 'simple'
+SEARCH_LABELS = ('A', 'B')
+
+WORD_RE = re.compile(r'\w+')
+
+
+def search_terms(text):
+    """Words of a search query, punctuation and operators dropped."""
+
+    return WORD_RE.findall(text.lower())
+
+
+def sqlite_search_sql(connection):
+    """Statements creating the FTS5 index of titles and its triggers.
+
+    The index is an external content table over the title table,
+    triggers keep it in sync with every insert, update and delete,
+    including bulk inserts and raw SQL. Its `rank` is bm25 with
+    the columns weighted by SEARCH_WEIGHTS.
+    """
+
+    qn = connection.ops.quote_name
+    index = qn(SEARCH_TABLE)
+    table = qn(Title._meta.db_table)
+    columns = ', '.join(qn(field) for field in SEARCH_FIELDS)
+    new = ', '.join(f'new.{qn(field)}' for field in SEARCH_FIELDS)
+    old = ', '.join(f'old.{qn(field)}' for field in SEARCH_FIELDS)
+    insert = (
+        f'INSERT INTO {index}(rowid, {columns}) VALUES (new.id, {new});'
+    )
+    delete = (
+        f"INSERT INTO {index}({index}, rowid, {columns}) "
+        f"VALUES ('delete', old.id, {old});"
+    )
+    weights = ', '.join(str(weight) for weight in SEARCH_WEIGHTS)
+    return (
+        f'CREATE VIRTUAL TABLE {index} USING fts5({columns}, '
+        f"content={table}, content_rowid='id', tokenize='unicode61')",
+        f'CREATE TRIGGER {qn(SEARCH_TABLE + "_ai")} AFTER INSERT ON {table} '
+        f'BEGIN {insert} END',
+        f'CREATE TRIGGER {qn(SEARCH_TABLE + "_ad")} AFTER DELETE ON {table} '
+        f'BEGIN {delete} END',
+        f'CREATE TRIGGER {qn(SEARCH_TABLE + "_au")} '
+        f'AFTER UPDATE OF {columns} ON {table} BEGIN {delete} {insert} END',
+        f'INSERT INTO {index}({index}, rank) '
+        f"VALUES ('rank', 'bm25({weights})')",
+        f"INSERT INTO {index}({index}) VALUES ('rebuild')",
+    )
+
+
+def postgresql_search_sql(connection):
+    """Statement creating the GIN index of the title search vector.
+
+    The indexed expression is the SQL search_vector() compiles to,
+    so searches filtering on it read the index.
+    """
+
+    qn = connection.ops.quote_name
+    vector = ' || '.join(
+        f"setweight(to_tsvector('{SEARCH_CONFIG}'::regconfig, "
+        f"COALESCE({qn(field)}, '')), '{label}')"
+        for field, label in zip(SEARCH_FIELDS, SEARCH_LABELS)
+    )
+    return (
+        f'CREATE INDEX {qn(SEARCH_TABLE)} ON {qn(Title._meta.db_table)} '
+        f'USING gin (({vector}))',
+    )
+
+
+def search_index_exists(connection):
+    if connection.vendor == 'sqlite':
+        return SEARCH_TABLE in connection.introspection.table_names()
+    with connection.cursor() as cursor:
+        return SEARCH_TABLE in connection.introspection.get_constraints(
+            cursor, Title._meta.db_table,
+        )
+
+
+def create_search_index(using='default'):
+    """Create the search index of titles if the backend needs one.
+
+    SQLite keeps an FTS5 table, PostgreSQL a GIN index of the search
+    vector, other backends search the title table directly. Returns
+    whether the index was created.
+    """
+
+    connection = connections[using]
+    if connection.vendor == 'sqlite':
+        statements = sqlite_search_sql
+    elif connection.vendor == 'postgresql':
+        statements = postgresql_search_sql
+    else:
+        return False
+    if search_index_exists(connection):
+        return False
+    with connection.cursor() as cursor:
+        for sql in statements(connection):
+            cursor.execute(sql)
+    return True
+
+
+def search_vector():
+    """Weighted search vector of SEARCH_FIELDS, for PostgreSQL."""
+
+    from django.contrib.postgres.search import SearchVector
+
+    vector = None
+    for field, label in zip(SEARCH_FIELDS, SEARCH_LABELS):
+        part = SearchVector(field, weight=label, config=SEARCH_CONFIG)
+        vector = part if vector is None else vector + part
+    return vector
+
+
+def search_titles(queryset, text):
+    """Titles matching every word of `text` as a prefix, best first.
+
+    SQLite matches the FTS5 index and ranks by bm25, PostgreSQL
+    matches the indexed `simple` text search vector and ranks by
+    ts_rank, other backends fall back to unranked case-insensitive
+    `icontains`.
+    Ranked results are annotated with `search_rank`.
+    """
+
+    terms = search_terms(text)
+    if not terms:
+        return queryset.none()
+
+    connection = connections[queryset.db]
+    if connection.vendor == 'sqlite':
+        qn = connection.ops.quote_name
+        index = qn(SEARCH_TABLE)
+        match = ' '.join(f'"{term}"*' for term in terms)
+        return queryset.filter(id__in=RawSQL(
+            f'SELECT rowid FROM {index} WHERE {index} MATCH %s', (match,),
+        )).annotate(search_rank=RawSQL(
+            f'SELECT rank FROM {index} WHERE {index} MATCH %s '
+            f'AND rowid = {qn(Title._meta.db_table)}.id',
+            (match,),
+        )).order_by('search_rank', 'pk')
+
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+
+        vector = search_vector()
+        query = SearchQuery(
+            ' & '.join(f'{term}:*' for term in terms),
+            search_type='raw',
+            config=SEARCH_CONFIG,
+        )
+        return queryset.annotate(
+            search_vector=vector,
+            search_rank=SearchRank(vector, query),
+        ).filter(search_vector=query).order_by('-search_rank', 'pk')
+
+    condition = Q()
+    for term in terms:
+        condition &= (
+            Q(name__icontains=term) | Q(description__icontains=term)
+        )
+    return queryset.filter(condition)
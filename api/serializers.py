@@ -1,7 +1,22 @@
-from django.shortcuts import get_object_or_404
+from collections import Counter
+
+from django.conf import settings
+from django.db import IntegrityError, router, transaction
+from django.utils import timezone
 from rest_framework import serializers
+from rest_framework.settings import api_settings
+
+from .bulk import bulk_create_with_pks
+from .cache import invalidate_cache
+from .facets import apply_facet_changes, facet_keys
+from .models import SCORE_FIELDS, Categorie, Comment, Genre, Review, Title
+from .slugs import assign_slugs, slug_bases, taken_slugs
+
 
-from .models import Categorie, Comment, Genre, Review, Title
+"""
+STATS_FIELDS: review stats of titles, only in TitleStatsSerializer.
+"""
+STATS_FIELDS = ('review_count', 'last_review_date', *SCORE_FIELDS)
 
 
 class CategorieSerializer(serializers.ModelSerializer):
@@ -20,6 +35,105 @@ class GenreSerializer(serializers.ModelSerializer):
         exclude = ('id',)
 
 
+class BatchListSerializer(serializers.ListSerializer):
+    """A list of at most BULK_WRITE_MAX_ITEMS items."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, list) and len(data) > (
+            settings.BULK_WRITE_MAX_ITEMS
+        ):
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    f'Ensure this list has at most '
+                    f'{settings.BULK_WRITE_MAX_ITEMS} items.',
+                ],
+            })
+        return super().to_internal_value(data)
+
+
+class SlugBatchListSerializer(BatchListSerializer):
+    """Create categories or genres in bulk, slugs made from names.
+
+    Names and given slugs are checked against the table with one
+    query each, see api/slugs.py for generated slugs. Errors are
+    reported per item, and nothing is saved unless every item is
+    valid.
+    """
+
+    def to_internal_value(self, data):
+        items = super().to_internal_value(data)
+        model = self.child.Meta.model
+        max_length = model._meta.get_field('slug').max_length
+        names = [item['name'] for item in items]
+        given = [item.get('slug') for item in items]
+        taken = taken_slugs(
+            model, slug_bases(names, given, max_length), max_length,
+        )
+        slugs = assign_slugs(names, given, taken, max_length)
+        existing = set(
+            model.objects.filter(name__in=names)
+            .values_list('name', flat=True)
+        )
+
+        errors = []
+        seen = set()
+        for name, slug, given_slug in zip(names, slugs, given):
+            item_errors = {}
+            if name in existing or name in seen:
+                item_errors['name'] = [
+                    f'{model._meta.verbose_name} with this name '
+                    f'already exists.',
+                ]
+            if slug is None:
+                item_errors['slug'] = [
+                    'This slug is already taken.' if given_slug
+                    else 'Could not make a slug of this name.',
+                ]
+            seen.add(name)
+            errors.append(item_errors)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+
+        for item, slug in zip(items, slugs):
+            item['slug'] = slug
+        return items
+
+    @transaction.atomic
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        objs = model.objects.bulk_create(
+            model(**item) for item in validated_data
+        )
+        transaction.on_commit(lambda: invalidate_cache(model))
+        return objs
+
+
+class CategorieBatchSerializer(serializers.ModelSerializer):
+    """One item of a categorie batch, uniqueness checked by the list."""
+
+    class Meta:
+        model = Categorie
+        fields = ('name', 'slug')
+        extra_kwargs = {
+            'name': {'validators': []},
+            'slug': {'validators': [], 'required': False},
+        }
+        list_serializer_class = SlugBatchListSerializer
+
+
+class GenreBatchSerializer(serializers.ModelSerializer):
+    """One item of a genre batch, uniqueness checked by the list."""
+
+    class Meta:
+        model = Genre
+        fields = ('name', 'slug')
+        extra_kwargs = {
+            'name': {'validators': []},
+            'slug': {'validators': [], 'required': False},
+        }
+        list_serializer_class = SlugBatchListSerializer
+
+
 class TitleSerializer(serializers.ModelSerializer):
     """Serializer for title models."""
 
@@ -29,7 +143,18 @@ class TitleSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Title
-        fields = '__all__'
+        exclude = ('rating_sum', 'rating_count', 'update_date', *STATS_FIELDS)
+
+
+class TitleStatsSerializer(TitleSerializer):
+    """Serializer for title models with their review stats.
+
+    `score_<n>` fields count the reviews scored n.
+    """
+
+    class Meta:
+        model = Title
+        exclude = ('rating_sum', 'rating_count', 'update_date')
 
 
 class TitleSerializerNoSafeMethods(serializers.ModelSerializer):
@@ -48,7 +173,145 @@ class TitleSerializerNoSafeMethods(serializers.ModelSerializer):
 
     class Meta:
         model = Title
-        fields = '__all__'
+        exclude = (
+            'rating_sum',
+            'rating_count',
+            'rating',
+            'update_date',
+            *STATS_FIELDS,
+        )
+
+
+class TitleBatchListSerializer(BatchListSerializer):
+    """Create and update titles in bulk, items with an `id` are updates.
+
+    Slugs of all items are resolved with one query per model and the
+    titles to update are loaded with one query. Errors are reported
+    per item, and nothing is saved unless every item is valid.
+    """
+
+    def to_internal_value(self, data):
+        items = super().to_internal_value(data)
+        for item in items:
+            if 'genre' in item:
+                item['genre'] = list(dict.fromkeys(item['genre']))
+        ids = Counter(item['id'] for item in items if 'id' in item)
+        repeated = {pk for pk, count in ids.items() if count > 1}
+        categories = Categorie.objects.in_bulk(
+            {item['category'] for item in items if item.get('category')},
+            field_name='slug',
+        )
+        genres = Genre.objects.in_bulk(
+            {slug for item in items for slug in item.get('genre', ())},
+            field_name='slug',
+        )
+        titles = Title.objects.in_bulk(list(ids))
+        errors = [
+            self.item_errors(item, categories, genres, titles, repeated)
+            for item in items
+        ]
+        if any(errors):
+            raise serializers.ValidationError(errors)
+
+        for item in items:
+            if 'id' in item:
+                item['instance'] = titles[item.pop('id')]
+            if item.get('category'):
+                item['category'] = categories[item['category']]
+            if 'genre' in item:
+                item['genre'] = [genres[slug] for slug in item['genre']]
+        return items
+
+    @staticmethod
+    def item_errors(item, categories, genres, titles, repeated):
+        errors = {}
+        if 'id' in item and item['id'] not in titles:
+            errors['id'] = ['Not found.']
+        elif item.get('id') in repeated:
+            errors['id'] = ['Updated more than once in the batch.']
+        if 'id' not in item and 'name' not in item:
+            errors['name'] = ['This field is required.']
+        if item.get('category') and item['category'] not in categories:
+            errors['category'] = [
+                f'Object with slug={item["category"]} does not exist.',
+            ]
+        missing = [
+            slug for slug in item.get('genre', ()) if slug not in genres
+        ]
+        if missing:
+            errors['genre'] = [
+                f'Object with slug={slug} does not exist.' for slug in missing
+            ]
+        return errors
+
+    @transaction.atomic
+    def create(self, validated_data):
+        facets_before = facet_keys([
+            item['instance'].pk for item in validated_data
+            if 'instance' in item
+        ])
+        now = timezone.now()
+        saved = []
+        created = []
+        updated = []
+        update_fields = set()
+        for item in validated_data:
+            item = dict(item)
+            instance = item.pop('instance', None)
+            genres = item.pop('genre', None)
+            if instance is None:
+                instance = Title(**item)
+                created.append((instance, genres or []))
+            else:
+                for field, value in item.items():
+                    setattr(instance, field, value)
+                instance.update_date = now
+                update_fields.update(item, ('update_date',))
+                updated.append((instance, genres))
+            saved.append(instance)
+
+        bulk_create_with_pks(Title, [title for title, _ in created])
+        if updated:
+            Title.objects.bulk_update(
+                [title for title, _ in updated], sorted(update_fields),
+            )
+        through = Title.genre.through
+        replaced = [
+            title.pk for title, genres in updated if genres is not None
+        ]
+        through.objects.filter(title_id__in=replaced).delete()
+        through.objects.bulk_create(
+            through(title_id=title.pk, genre_id=genre.pk)
+            for title, genres in created + updated
+            for genre in genres or ()
+        )
+        apply_facet_changes(
+            facets_before, facet_keys([title.pk for title in saved]),
+        )
+        transaction.on_commit(lambda: invalidate_cache(Title))
+        return saved
+
+
+class TitleBatchSerializer(serializers.ModelSerializer):
+    """One item of a title batch, related objects given by slug."""
+
+    id = serializers.IntegerField(required=False)
+    name = serializers.CharField(max_length=128, required=False)
+    category = serializers.SlugField(allow_null=True, required=False)
+    genre = serializers.ListField(
+        child=serializers.SlugField(), required=False,
+    )
+
+    class Meta:
+        model = Title
+        exclude = (
+            'rating_sum',
+            'rating_count',
+            'rating',
+            'update_date',
+            *STATS_FIELDS,
+        )
+        list_serializer_class = TitleBatchListSerializer
 
 
 class CommentSerializer(serializers.ModelSerializer):
@@ -60,7 +323,7 @@ class CommentSerializer(serializers.ModelSerializer):
     )
 
     class Meta:
-        exclude = ('review',)
+        exclude = ('review', 'update_date')
         model = Comment
 
 
@@ -73,18 +336,28 @@ class ReviewSerializer(serializers.ModelSerializer):
     )
 
     class Meta:
-        exclude = ('title',)
+        exclude = ('title', 'update_date')
         model = Review
 
-    def validate(self, data):
-        request = self.context.get('request')
-        if not request.method == 'POST':
-            return data
+    def create(self, validated_data):
+        """Create the review, one per title and author.
 
-        title_id = request.parser_context['kwargs']['title_id']
-        title = get_object_or_404(Title, id=title_id)
-        if title.reviews.filter(author=request.user).exists():
-            raise serializers.ValidationError(
-                'Your review for this title is already exists'
-            )
-        return data
+        Duplicates are rejected by the unique constraint on
+        (title, author), so concurrent requests can't both pass.
+        Other integrity errors are raised as they are.
+        """
+
+        try:
+            with transaction.atomic(using=router.db_for_write(Review)):
+                return super().create(validated_data)
+        except IntegrityError:
+            if not Review.objects.filter(
+                title=validated_data['title'],
+                author=validated_data['author'],
+            ).exists():
+                raise
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    'Your review for this title is already exists',
+                ],
+            })
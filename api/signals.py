@@ -0,0 +1,223 @@
+from collections import Counter
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .activity import invalidate_activity
+from .cache import invalidate_on_commit
+from .db import same_database
+from .facets import (
+    apply_facet_changes,
+    facet_keys,
+    remove_category,
+    remove_genre,
+)
+from .models import Categorie, Comment, Genre, Review, Title, User
+from .rankings import forget_review
+from .ratings import apply_score_change
+
+"""
+CACHE_DEPENDENCIES: for every model, the models whose cached counts
+(CachedCountPagination) and responses (CachedListMixin and
+CachedRetrieveMixin) its writes make stale. Titles nest their
+category and genres and are filtered by their slugs. Reviews and
+comments show the username of their author, which only renames make
+stale, see invalidate_feeds_on_rename().
+
+Review writes change the stored rating of their title, which every
+title list shows and sorts by. A list page can't tell whether it
+holds the title, so rating changes drop every cached title response,
+details of other titles included: titles are written far less often
+than read, and a finer stamp would cost a lookup per cached read.
+"""
+CACHE_DEPENDENCIES = {
+    Title: (Title,),
+    Categorie: (Categorie, Title),
+    Genre: (Genre, Title),
+    Title.genre.through: (Title,),
+    Review: (Review,),
+    Comment: (Comment,),
+}
+
+
+@receiver(pre_save, sender=Review)
+def remember_review_score(sender, instance, raw, **kwargs):
+    """Load the stored score of reviews not fetched through the ORM."""
+
+    if raw or instance._state.adding or hasattr(instance, '_stored_score'):
+        return
+    instance._stored_score = (
+        Review.objects
+        .filter(pk=instance.pk)
+        .values_list('score', flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_review_save(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    old_score = None if created else instance._stored_score
+    if apply_score_change(
+        instance.title_id,
+        old_score,
+        instance.score,
+        review_delta=int(created),
+        pub_date=instance.pub_date,
+    ):
+        invalidate_on_commit(Title, using=kwargs['using'])
+    instance._stored_score = instance.score
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_review_delete(sender, instance, using, **kwargs):
+    old_score = getattr(instance, '_stored_score', instance.score)
+    if apply_score_change(
+        instance.title_id, old_score, None, review_delta=-1,
+    ):
+        invalidate_on_commit(Title, using=using)
+
+
+@receiver(post_delete, sender=Review)
+def update_trend_on_review_delete(sender, instance, **kwargs):
+    forget_review(instance)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def touch_comment_review(sender, instance, **kwargs):
+    Review.objects.filter(pk=instance.review_id).update(
+        update_date=timezone.now(),
+    )
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Review)
+@receiver(post_delete, sender=Comment)
+def invalidate_author_activity(sender, instance, using, **kwargs):
+    invalidate_activity(instance.author_id, using=using)
+
+
+@receiver(post_delete, sender=Title)
+def delete_title_reviews(sender, instance, **kwargs):
+    """Cascade to reviews kept in another database, see FeedRouter.
+
+    Runs once the title delete commits, so a rolled back delete
+    keeps its reviews.
+    """
+
+    if not same_database(Review, Title):
+        reviews = Review.objects.filter(title_id=instance.pk)
+        transaction.on_commit(reviews.delete, using=DEFAULT_DB_ALIAS)
+
+
+@receiver(pre_save, sender=User)
+def remember_username(sender, instance, raw, **kwargs):
+    if raw or instance._state.adding:
+        return
+    instance._stored_username = (
+        User.objects
+        .filter(pk=instance.pk)
+        .values_list('username', flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=User)
+def invalidate_feeds_on_rename(sender, instance, created, raw, **kwargs):
+    """Drop cached reviews and comments showing the old username.
+
+    New users have no reviews or comments yet.
+    """
+
+    if raw or created:
+        return
+    if instance._stored_username != instance.username:
+        invalidate_on_commit(Review, Comment, using=kwargs['using'])
+
+
+@receiver(post_delete, sender=User)
+def delete_user_feed(sender, instance, **kwargs):
+    if not same_database(Review, User):
+        user_id = instance.pk
+        transaction.on_commit(
+            lambda: delete_author_feed(user_id), using=DEFAULT_DB_ALIAS,
+        )
+
+
+def delete_author_feed(user_id):
+    Comment.objects.filter(author_id=user_id).delete()
+    Review.objects.filter(author_id=user_id).delete()
+
+
+@receiver(pre_save, sender=Title)
+@receiver(pre_delete, sender=Title)
+def remember_title_facets(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    instance._facet_keys = (
+        Counter() if instance._state.adding else facet_keys([instance.pk])
+    )
+
+
+@receiver(post_save, sender=Title)
+def update_facets_on_title_save(sender, instance, raw, **kwargs):
+    if raw:
+        return
+    apply_facet_changes(instance._facet_keys, facet_keys([instance.pk]))
+
+
+@receiver(post_delete, sender=Title)
+def update_facets_on_title_delete(sender, instance, **kwargs):
+    apply_facet_changes(instance._facet_keys, Counter())
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def update_facets_on_genre_change(
+    sender, instance, action, reverse, pk_set, **kwargs,
+):
+    if not reverse:
+        title_ids = [instance.pk]
+    elif pk_set is not None:
+        title_ids = list(pk_set)
+    else:
+        title_ids = list(instance.titles.values_list('pk', flat=True))
+    if action.startswith('pre_'):
+        instance._facet_titles = title_ids
+        instance._facet_keys = facet_keys(title_ids)
+    else:
+        title_ids = getattr(instance, '_facet_titles', title_ids)
+        apply_facet_changes(instance._facet_keys, facet_keys(title_ids))
+
+
+@receiver(pre_delete, sender=Categorie)
+def update_facets_on_categorie_delete(sender, instance, **kwargs):
+    remove_category(instance.pk)
+
+
+@receiver(pre_delete, sender=Genre)
+def update_facets_on_genre_delete(sender, instance, **kwargs):
+    remove_genre(instance.pk)
+
+
+def invalidate_dependent_cache(sender, using, action='post_', **kwargs):
+    if action.startswith('post_'):
+        invalidate_on_commit(*CACHE_DEPENDENCIES[sender], using=using)
+
+
+for model in CACHE_DEPENDENCIES:
+    if model._meta.auto_created:
+        m2m_changed.connect(invalidate_dependent_cache, sender=model)
+    else:
+        post_save.connect(invalidate_dependent_cache, sender=model)
+        post_delete.connect(invalidate_dependent_cache, sender=model)
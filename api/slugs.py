@@ -0,0 +1,83 @@
+"""Slugs generated in batches, unique against the table and the batch."""
+import re
+
+from slugify import slugify
+
+"""
+SUFFIX_ROOM: characters of a base that may be cut to fit a suffix,
+a dash and up to seven digits.
+"""
+SUFFIX_ROOM = 8
+
+
+def suffixed(base, number, max_length):
+    """`base-number`, the base cut so the slug fits in `max_length`."""
+
+    if number == 1:
+        return base[:max_length]
+    suffix = f'-{number}'
+    return base[:max_length - len(suffix)].rstrip('-') + suffix
+
+
+def base_pattern(base, max_length):
+    if len(base) <= max_length - SUFFIX_ROOM:
+        return f'{re.escape(base)}(-[0-9]+)?$'
+    return re.escape(base[:max_length - SUFFIX_ROOM])
+
+
+def taken_slugs(model, bases, max_length):
+    """Slugs of the table a batch of bases could collide with.
+
+    One query: every slug that is a base or a base with a numeric
+    suffix. Long bases, which get cut to fit a suffix, match by a
+    prefix short enough to survive any cut.
+    """
+
+    bases = {base for base in bases if base}
+    if not bases:
+        return set()
+    pattern = '^({})'.format('|'.join(
+        base_pattern(base, max_length) for base in sorted(bases)
+    ))
+    queryset = model.objects.filter(slug__regex=pattern)
+    return set(queryset.values_list('slug', flat=True))
+
+
+def slug_bases(names, slugs, max_length):
+    """Given slugs and the bases of the ones to generate."""
+
+    return [
+        slug or slugify(name, max_length=max_length)
+        for name, slug in zip(names, slugs)
+    ]
+
+
+def assign_slugs(names, slugs, taken, max_length):
+    """Slugs of a batch, in order: given ones kept, others generated.
+
+    A generated slug gets the first free `-2`, `-3`... suffix if its
+    base is taken by the table or an earlier item, so a batch always
+    gets the same slugs against the same table. Given slugs are never
+    changed; those already taken are returned as None.
+    """
+
+    taken = set(taken)
+    given = {slug for slug in slugs if slug}
+    assigned = []
+    for name, slug in zip(names, slugs):
+        if slug:
+            assigned.append(None if slug in taken else slug)
+            taken.add(slug)
+            continue
+        base = slugify(name, max_length=max_length)
+        if not base:
+            assigned.append(None)
+            continue
+        number = 1
+        slug = suffixed(base, number, max_length)
+        while slug in taken or slug in given:
+            number += 1
+            slug = suffixed(base, number, max_length)
+        taken.add(slug)
+        assigned.append(slug)
+    return assigned
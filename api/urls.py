@@ -7,6 +7,7 @@ from .views import (
     GenreViewSet,
     ReviewViewSet,
     TitleViewSet,
+    user_activity,
 )
 
 router_v1 = DefaultRouter()
@@ -27,4 +28,9 @@ router_v1.register(
 
 urlpatterns = [
     path('v1/', include(router_v1.urls)),
+    path(
+        'v1/users/<str:username>/activity/',
+        user_activity,
+        name='user-activity',
+    ),
 ]
@@ -1,7 +1,12 @@
-from django.db.models import Avg
-from django.http import Http404
+from django.http import Http404, StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.exceptions import MethodNotAllowed, ParseError
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import (
+    MethodNotAllowed,
+    NotFound,
+    ParseError,
+    ValidationError,
+)
 from rest_framework.filters import SearchFilter
 from rest_framework.generics import get_object_or_404
 from rest_framework.mixins import (
@@ -9,12 +14,18 @@ from rest_framework.mixins import (
     DestroyModelMixin,
     ListModelMixin,
 )
-from rest_framework.permissions import SAFE_METHODS
+from rest_framework.permissions import SAFE_METHODS, AllowAny
 from rest_framework.response import Response
-from rest_framework.status import HTTP_204_NO_CONTENT
+from rest_framework.status import HTTP_201_CREATED, HTTP_204_NO_CONTENT
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.viewsets import GenericViewSet, ModelViewSet
 from slugify import slugify
 
+from users.permissions import IsAdmin
+
+from .activity import activity_page, decode_cursor, encode_cursor
+from .cache import CachedListMixin, CachedRetrieveMixin
+from .conditional import ConditionalListMixin, ConditionalRetrieveMixin
 from .const import (
     CATEGORIE_METHOD_PERMISSIONS,
     COMMENT_METHOD_PERMISSIONS,
@@ -22,15 +33,28 @@ from .const import (
     REVIEW_METHOD_PERMISSIONS,
     TITLE_METHOD_PERMISSIONS,
 )
+from .db import with_related
+from .encoders import EncodedListMixin, get_encoder
+from .export import EXPORT_FORMATS, export_lines
+from .facets import FACET_FILTERS, title_facets
 from .filters import TitleFilterSet
-from .models import Categorie, Genre, Review, Title
+from .models import Categorie, Genre, Review, Title, TitleRanking, User
+from .pagination import (
+    CachedCountPagination,
+    FeedPagination,
+    KeysetPagination,
+)
 from .serializers import (
+    CategorieBatchSerializer,
     CategorieSerializer,
     CommentSerializer,
+    GenreBatchSerializer,
     GenreSerializer,
     ReviewSerializer,
+    TitleBatchSerializer,
     TitleSerializer,
     TitleSerializerNoSafeMethods,
+    TitleStatsSerializer,
 )
 
 
@@ -50,6 +74,15 @@ def create_with_slug(self, serializer):
         serializer.save()
 
 
+def bulk_create_with_slugs(self, request):
+    """Create a list of objects, slugs made of names if not passed."""
+
+    serializer = self.bulk_serializer_class(data=request.data, many=True)
+    serializer.is_valid(raise_exception=True)
+    serializer.save()
+    return Response(serializer.data, status=HTTP_201_CREATED)
+
+
 def destroy_with_slug(self, request, **kwargs):
     """Allows you to delete models by the slug field."""
 
@@ -81,17 +114,26 @@ class ListCreateDestroyViewSet(
     pass
 
 
-class CategorieViewSet(ListCreateDestroyViewSet):
+class CategorieViewSet(
+    ConditionalListMixin,
+    CachedListMixin,
+    ListCreateDestroyViewSet,
+):
     """ViewSet of the Categorie model."""
 
     queryset = Categorie.objects.all()
     serializer_class = CategorieSerializer
+    bulk_serializer_class = CategorieBatchSerializer
     filter_backends = (SearchFilter,)
     search_fields = ('=name',)
 
     def perform_create(self, serializer):
         create_with_slug(self, serializer)
 
+    @action(detail=False, methods=('post',))
+    def bulk(self, request):
+        return bulk_create_with_slugs(self, request)
+
     def destroy(self, request, *args, **kwargs):
         return destroy_with_slug(self, request, *args, **kwargs)
 
@@ -99,17 +141,26 @@ class CategorieViewSet(ListCreateDestroyViewSet):
         return get_obj_method_permissions(self, **CATEGORIE_METHOD_PERMISSIONS)
 
 
-class GenreViewSet(ListCreateDestroyViewSet):
+class GenreViewSet(
+    ConditionalListMixin,
+    CachedListMixin,
+    ListCreateDestroyViewSet,
+):
     """ViewSet of the Genre model."""
 
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    bulk_serializer_class = GenreBatchSerializer
     filter_backends = (SearchFilter,)
     search_fields = ('=name',)
 
     def perform_create(self, serializer):
         create_with_slug(self, serializer)
 
+    @action(detail=False, methods=('post',))
+    def bulk(self, request):
+        return bulk_create_with_slugs(self, request)
+
     def destroy(self, request, *args, **kwargs):
         return destroy_with_slug(self, request, *args, **kwargs)
 
@@ -117,59 +168,246 @@ class GenreViewSet(ListCreateDestroyViewSet):
         return get_obj_method_permissions(self, **GENRE_METHOD_PERMISSIONS)
 
 
-class TitleViewSet(ModelViewSet):
+class TitleViewSet(
+    ConditionalListMixin,
+    ConditionalRetrieveMixin,
+    CachedListMixin,
+    CachedRetrieveMixin,
+    EncodedListMixin,
+    ModelViewSet,
+):
     """ViewSet of the Title model."""
 
-    queryset = Title.objects.annotate(rating=Avg("reviews__score"))
+    queryset = Title.objects.select_related('category').prefetch_related(
+        'genre',
+    )
     serializer_class = TitleSerializer
+    pagination_class = CachedCountPagination
     filter_backends = (DjangoFilterBackend,)
     filterset_class = TitleFilterSet
 
     def get_serializer_class(self):
         if self.request.method in SAFE_METHODS:
+            if self.request.query_params.get('stats') in ('true', '1'):
+                return TitleStatsSerializer
             return TitleSerializer
         return TitleSerializerNoSafeMethods
 
     def get_permissions(self):
+        if self.action in ('bulk', 'export'):
+            return (IsAdmin(),)
         return get_obj_method_permissions(self, **TITLE_METHOD_PERMISSIONS)
 
-
-class ReviewViewSet(ModelViewSet):
+    @action(detail=False, methods=('post',))
+    def bulk(self, request):
+        """Create and update a list of titles in one transaction.
+
+        Items with an `id` update that title. Responds with the
+        saved titles in the order of the request, see
+        TitleBatchListSerializer for validation.
+        """
+
+        serializer = TitleBatchSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        pks = [title.pk for title in serializer.save()]
+        encoder = get_encoder(TitleSerializer)
+        encoded = {
+            title['id']: title
+            for title in encoder.encode(
+                encoder.values(Title.objects.filter(pk__in=pks)),
+            )
+        }
+        return Response(
+            [encoded[pk] for pk in pks], status=HTTP_201_CREATED,
+        )
+
+    @action(detail=False)
+    def facets(self, request):
+        """Title counts per category, genre and decade, see api/facets.py.
+
+        Takes the `category`, `genre` and `year` filters of the title
+        list; the others can't be answered from stored counts.
+        """
+
+        unsupported = sorted(
+            set(TitleFilterSet.base_filters) & set(request.query_params)
+            - set(FACET_FILTERS) - {'ordering'}
+        )
+        if unsupported:
+            raise ValidationError({
+                name: ['Facets only take category, genre and year.']
+                for name in unsupported
+            })
+        year = request.query_params.get('year')
+        if year and not year.isdigit():
+            raise ValidationError({'year': ['Enter a number.']})
+        return Response(title_facets(
+            category=request.query_params.get('category'),
+            genre=request.query_params.get('genre'),
+            year=int(year) if year else None,
+        ))
+
+    @action(detail=False)
+    def top(self, request):
+        """Titles by smoothed rating, see api/rankings.py."""
+
+        return self.ranking(TitleRanking.TOP)
+
+    @action(detail=False)
+    def trending(self, request):
+        """Titles by decayed review activity, see api/rankings.py."""
+
+        return self.ranking(TitleRanking.TRENDING)
+
+    def ranking(self, kind):
+        """A page of a stored ranking, of one `?category=` or `?genre=`.
+
+        Titles get their `position` and `score` in the ranking.
+        """
+
+        scopes = [
+            f'{field}:{self.request.query_params[field]}'
+            for field in ('category', 'genre')
+            if self.request.query_params.get(field)
+        ]
+        if len(scopes) > 1:
+            raise ValidationError(
+                'Rankings are either of a category or of a genre.'
+            )
+        page = self.paginate_queryset(
+            TitleRanking.objects
+            .filter(kind=kind, scope=scopes[0] if scopes else '')
+            .values('title', 'position', 'score')
+        )
+        encoder = get_encoder(TitleSerializer)
+        titles = {
+            title['id']: title
+            for title in encoder.encode(encoder.values(
+                Title.objects.filter(pk__in=[row['title'] for row in page]),
+            ))
+        }
+        return self.get_paginated_response([
+            {
+                **titles[row['title']],
+                'position': row['position'],
+                'score': row['score'],
+            }
+            for row in page
+            if row['title'] in titles
+        ])
+
+    @action(detail=False)
+    def export(self, request):
+        """Stream the whole catalog, see api/export.py.
+
+        `?output=ndjson` (default) or `csv`, `?reviews=true` nests
+        reviews and comments into NDJSON titles.
+        """
+
+        export_format = request.query_params.get('output', 'ndjson')
+        with_reviews = request.query_params.get('reviews') in ('true', '1')
+        try:
+            lines = export_lines(export_format, with_reviews)
+        except ValueError as error:
+            raise ValidationError({'output': [str(error)]})
+        response = StreamingHttpResponse(
+            lines, content_type=EXPORT_FORMATS[export_format],
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="titles.{export_format}"'
+        )
+        return response
+
+
+class FeedViewSet(
+    ConditionalListMixin,
+    ConditionalRetrieveMixin,
+    EncodedListMixin,
+    ModelViewSet,
+):
+    """A viewset of a feed nested in a parent object.
+
+    The parent is the `parent_model` object matching
+    `parent_lookups`, model lookups by URL keyword argument.
+    Versions are `update_date` stamps: the parent's for `list()`,
+    the object's own for `retrieve()`.
+    """
+
+    pagination_class = FeedPagination
+    parent_model = None
+    parent_lookups = {}
+
+    def get_parent(self):
+        if not hasattr(self, '_parent'):
+            self._parent = get_object_or_404(self.parent_model, **{
+                lookup: self.kwargs.get(kwarg)
+                for kwarg, lookup in self.parent_lookups.items()
+            })
+        return self._parent
+
+    def get_object(self):
+        if not hasattr(self, '_object'):
+            self._object = super().get_object()
+        return self._object
+
+    def get_version(self):
+        if self.action == 'retrieve':
+            return self.get_object().update_date
+        return self.get_parent().update_date
+
+
+class ReviewViewSet(FeedViewSet):
     """ViewSet of the Review model."""
 
     serializer_class = ReviewSerializer
-
-    def get_title(self):
-        title_id = self.kwargs.get('title_id')
-        return get_object_or_404(Title, id=title_id)
+    parent_model = Title
+    parent_lookups = {'title_id': 'id'}
 
     def get_queryset(self):
-        title = self.get_title()
-        return title.reviews.all()
+        title = self.get_parent()
+        return with_related(title.reviews.all(), 'author')
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, title=self.get_title())
+        serializer.save(author=self.request.user, title=self.get_parent())
 
     def get_permissions(self):
         return get_obj_method_permissions(self, **REVIEW_METHOD_PERMISSIONS)
 
 
-class CommentViewSet(ModelViewSet):
+class CommentViewSet(FeedViewSet):
     """ViewSet of the Comment model."""
 
     serializer_class = CommentSerializer
-
-    def get_review(self):
-        title_id = self.kwargs.get('title_id')
-        review_id = self.kwargs.get('review_id')
-        return get_object_or_404(Review, title__id=title_id, id=review_id)
+    parent_model = Review
+    parent_lookups = {'title_id': 'title__id', 'review_id': 'id'}
 
     def get_queryset(self):
-        review = self.get_review()
-        return review.comments.all()
+        review = self.get_parent()
+        return with_related(review.comments.all(), 'author')
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, review=self.get_review())
+        serializer.save(author=self.request.user, review=self.get_parent())
 
     def get_permissions(self):
         return get_obj_method_permissions(self, **COMMENT_METHOD_PERMISSIONS)
+
+
+@api_view(('GET',))
+@permission_classes((AllowAny,))
+def user_activity(request, username):
+    """Reviews and comments of a user, newest first, by cursor."""
+
+    user = get_object_or_404(User, username=username)
+    cursor = request.query_params.get('cursor')
+    if cursor:
+        try:
+            cursor = decode_cursor(cursor)
+        except ValueError:
+            raise NotFound(KeysetPagination.invalid_cursor_message)
+    items, has_next = activity_page(user.pk, cursor or None)
+    next_link = None
+    if has_next:
+        next_link = replace_query_param(
+            request.build_absolute_uri(), 'cursor', encode_cursor(items[-1]),
+        )
+    return Response({'next': next_link, 'results': items})
@@ -34,6 +34,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.replicas.ReplicaMiddleware',
 ]
 
 CORS_ORIGIN_ALLOW_ALL = True
@@ -63,9 +64,76 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+    },
+    'feed': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db_feed.sqlite3'),
+    },
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db_replica.sqlite3'),
+    },
+}
+
+DATABASE_ROUTERS = ['api.db.FeedRouter', 'api.db.ReplicaRouter']
+
+# DATABASES alias storing reviews and comments, in a file of their own
+# so their writers don't wait for writers of the rest. None keeps them
+# in the default database.
+FEED_DATABASE = None
+
+# DATABASES aliases holding copies of the default database, reads of
+# safe requests go to them, see api/replicas.py.
+REPLICA_DATABASES = []
+# Seconds of writes a replica may miss and still serve reads. Responses
+# cached from it stay cached until the next write to their models.
+REPLICA_MAX_LAG = 0
+# Seconds a client reads from the primary after it wrote, and the
+# signed cookie remembering it.
+REPLICA_PIN_SECONDS = 10
+REPLICA_PIN_COOKIE = 'primary_pin'
+
+# Set on every new SQLite connection, see api/db.py.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'temp_store': 'MEMORY',
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
 
+API_CACHE = 'default'
+
+COUNT_CACHE_TIMEOUT = 60
+
+RESPONSE_CACHE_TIMEOUT = 300
+
+# Rows fetched per database round trip by catalog exports.
+EXPORT_CHUNK_SIZE = 2000
+
+# Items accepted by one request of a bulk write endpoint.
+BULK_WRITE_MAX_ITEMS = 1000
+
+# Titles kept per ranking, rebuilt by `manage.py rank_titles`.
+RANKING_SIZE = 1000
+# Reviews of the mean score every title starts with in top ratings.
+RANKING_PRIOR_REVIEWS = 10
+# Seconds after which a review counts half in trending rankings.
+RANKING_TREND_HALF_LIFE = 24 * 60 * 60
+# Seconds after publication a review is settled into trend activities,
+# longer than any transaction writing reviews runs.
+RANKING_TREND_SETTLE = 10 * 60
+
+# Newest reviews and comments of a user kept in the cache, and for
+# how long, to serve activity pages of profiles read often.
+ACTIVITY_HEAD_SIZE = 50
+ACTIVITY_HEAD_TIMEOUT = 300
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -103,18 +171,44 @@ EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 DEFAULT_FROM_EMAIL = 'from@test.com'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
+# Outbound mail queue, drained by `manage.py send_queued_mail`.
+MAIL_QUEUE_BATCH_SIZE = 100
+MAIL_QUEUE_MAX_ATTEMPTS = 5
+# Seconds before the first retry, doubled after every failure.
+MAIL_QUEUE_RETRY_DELAY = 60
+# Seconds a worker may hold a claimed batch.
+MAIL_QUEUE_LEASE = 300
+
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.ClaimsJWTAuthentication',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
+    'DEFAULT_THROTTLE_RATES': {
+        'auth_ip': '30/min',
+        'auth_email': '5/min',
+        'auth_username': '5/min',
+    },
 }
 
+# CACHES alias holding rate limit buckets shared by all processes,
+# None keeps them in the memory of each process.
+RATE_LIMIT_CACHE = None
+
+# Seconds a signup reuses the confirmation code queued for the address.
+SIGNUP_DEDUP_WINDOW = 60
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=100),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=100),
 }
+
+# Seconds a process trusts a cached token version of a user.
+TOKEN_VERSION_CACHE_TIMEOUT = 30
+
+# Seconds between pulls of token revocations made by other processes.
+TOKEN_REVOCATION_SYNC_INTERVAL = 30
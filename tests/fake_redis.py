@@ -0,0 +1,64 @@
+import time
+
+
+class FakeRedis:
+    """In-process stand-in for the part of redis.Redis the API uses."""
+
+    def __init__(self, location):
+        self.location = location
+        self.data = {}
+
+    @classmethod
+    def from_url(cls, url):
+        return cls(url)
+
+    def _alive(self, key):
+        value, expires = self.data.get(key, (None, None))
+        if expires is not None and expires <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    def get(self, key):
+        return self._alive(key)
+
+    def set(self, key, value, ex=None, nx=False):
+        if nx and self._alive(key) is not None:
+            return None
+        expires = None if ex is None else time.monotonic() + ex
+        if isinstance(value, int):
+            value = str(value).encode()
+        self.data[key] = (value, expires)
+        return True
+
+    def incrby(self, key, amount):
+        value = int(self._alive(key) or 0) + amount
+        _, expires = self.data.get(key, (None, None))
+        self.data[key] = (str(value).encode(), expires)
+        return value
+
+    def mget(self, keys):
+        return [self._alive(key) for key in keys]
+
+    def exists(self, key):
+        return int(self._alive(key) is not None)
+
+    def expire(self, key, seconds):
+        value = self._alive(key)
+        if value is None:
+            return False
+        self.data[key] = (value, time.monotonic() + seconds)
+        return True
+
+    def persist(self, key):
+        value = self._alive(key)
+        if value is None:
+            return False
+        self.data[key] = (value, None)
+        return True
+
+    def delete(self, *keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def flushdb(self):
+        self.data.clear()
@@ -0,0 +1,16 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    from django.core.cache import caches
+
+    from users.authentication import token_versions
+    from users.revocation import revocations
+    from users.throttling import memory_buckets
+
+    for cache in caches.all():
+        cache.clear()
+    token_versions.clear()
+    revocations.clear()
+    memory_buckets.clear()
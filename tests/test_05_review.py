@@ -1,4 +1,6 @@
 import pytest
+from django.db import IntegrityError
+from rest_framework.serializers import ModelSerializer
 
 from .common import (auth_client, create_reviews, create_titles,
                      create_users_api)
@@ -312,3 +314,29 @@ class Test05ReviewAPI:
             f"без токена авторизации возвращается статус 401"
         )
         self.check_permissions(user, "обычного пользователя", reviews, titles)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_other_integrity_errors(self, user_client, admin, monkeypatch):
+        titles, _, _ = create_titles(user_client)
+
+        def fail(self, validated_data):
+            raise IntegrityError("NOT NULL constraint failed")
+
+        monkeypatch.setattr(ModelSerializer, "create", fail)
+        with pytest.raises(IntegrityError):
+            user_client.post(
+                f'/api/v1/titles/{titles[0]["id"]}/reviews/',
+                data={"text": "текст", "score": 5},
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_pub_date_read_only(self, user_client):
+        titles, _, _ = create_titles(user_client)
+        response = user_client.post(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/',
+            data={"text": "текст", "score": 5, "pub_date": "2000-01-01T00:00"},
+        )
+        assert response.status_code == 201
+        assert not response.json()["pub_date"].startswith("2000"), (
+            "Проверьте, что `pub_date` отзыва нельзя задать через API"
+        )
@@ -0,0 +1,75 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from api.models import Title
+
+from .common import auth_client, create_reviews
+
+
+class Test07TitleRating:
+    @pytest.mark.django_db(transaction=True)
+    def test_01_rating_follows_reviews(self, user_client, admin):
+        reviews, titles, user, moderator = create_reviews(user_client, admin)
+        title_id = titles[0]["id"]
+        response = user_client.get(f"/api/v1/titles/{title_id}/")
+        assert response.json()["rating"] == 4.0, (
+            "Проверьте, что рейтинг произведения равен среднему оценок отзывов"
+        )
+        assert "rating_sum" not in response.json(), (
+            "Проверьте, что счётчики рейтинга не отдаются через API"
+        )
+
+        user_client.patch(
+            f"/api/v1/titles/{title_id}/reviews/{reviews[0]['id']}/",
+            data={"score": 8},
+        )
+        title = Title.objects.get(id=title_id)
+        assert (title.rating_sum, title.rating_count) == (15, 3), (
+            "Проверьте, что изменение оценки отзыва обновляет рейтинг"
+        )
+        assert title.rating == 5.0
+
+        user_client.delete(
+            f"/api/v1/titles/{title_id}/reviews/{reviews[1]['id']}/"
+        )
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (12, 2), (
+            "Проверьте, что удаление отзыва обновляет рейтинг"
+        )
+        assert title.rating == 6.0
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_rating_after_author_delete(self, user_client, admin):
+        reviews, titles, user, moderator = create_reviews(user_client, admin)
+        title_id = titles[0]["id"]
+        moderator.delete()
+        user.delete()
+        title = Title.objects.get(id=title_id)
+        assert (title.rating_sum, title.rating_count) == (5, 1), (
+            "Проверьте, что удаление отзывов вместе с автором обновляет "
+            "рейтинг"
+        )
+        assert title.rating == 5.0
+
+        admin.delete()
+        title.refresh_from_db()
+        assert title.rating_count == 0 and title.rating is None, (
+            "Проверьте, что у произведения без отзывов нет рейтинга"
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_recalculate_ratings(self, user_client, admin):
+        reviews, titles, user, moderator = create_reviews(user_client, admin)
+        Title.objects.update(rating_sum=0, rating_count=0, rating=None)
+        call_command("recalculate_ratings", stdout=StringIO())
+        first, second = (
+            Title.objects.get(id=titles[0]["id"]),
+            Title.objects.get(id=titles[1]["id"]),
+        )
+        assert (first.rating_sum, first.rating_count) == (12, 3)
+        assert first.rating == 4.0
+        assert second.rating_count == 0 and second.rating is None
+        response = auth_client(user).get("/api/v1/titles/")
+        assert response.status_code == 200
@@ -0,0 +1,117 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.models import Categorie, Comment, Genre, Review, Title
+
+from .common import auth_client
+
+PAGE_SIZE = 10
+
+
+def seed(size):
+    """Create `size` objects of every kind around one title and review."""
+
+    users = [
+        get_user_model().objects.create(
+            username=f"user{i}", email=f"user{i}@yamdb.fake"
+        )
+        for i in range(size)
+    ]
+    categories = [
+        Categorie.objects.create(name=f"Category {i}", slug=f"category-{i}")
+        for i in range(size)
+    ]
+    genres = [
+        Genre.objects.create(name=f"Genre {i}", slug=f"genre-{i}")
+        for i in range(size)
+    ]
+    titles = []
+    for i in range(size):
+        title = Title.objects.create(
+            name=f"Title {i}", year=2000, category=categories[i]
+        )
+        title.genre.set(genres[: i + 1])
+        titles.append(title)
+    reviews = [
+        Review.objects.create(
+            title=titles[0], author=user, text="review", score=5
+        )
+        for user in users
+    ]
+    for user in users:
+        Comment.objects.create(review=reviews[0], author=user, text="comment")
+    return titles[0], reviews[0], users[0]
+
+
+def read_urls(title, review, user):
+    """Return read endpoints keyed by their route."""
+
+    title_url = f"/api/v1/titles/{title.id}"
+    review_url = f"{title_url}/reviews/{review.id}"
+    comment = review.comments.first()
+    return {
+        "categories/": "/api/v1/categories/",
+        "categories/?search=": "/api/v1/categories/?search=Category 0",
+        "genres/": "/api/v1/genres/",
+        "genres/?search=": "/api/v1/genres/?search=Genre 0",
+        "titles/": "/api/v1/titles/",
+        "titles/?year=": "/api/v1/titles/?year=2000",
+        "titles/?category=": "/api/v1/titles/?category=category-0",
+        "titles/?genre=": "/api/v1/titles/?genre=genre-0",
+        "titles/?name=": "/api/v1/titles/?name=Title",
+        "titles/{id}/": f"{title_url}/",
+        "reviews/": f"{title_url}/reviews/",
+        "reviews/{id}/": f"{review_url}/",
+        "comments/": f"{review_url}/comments/",
+        "comments/{id}/": f"{review_url}/comments/{comment.id}/",
+        "users/": "/api/v1/users/",
+        "users/{username}/": f"/api/v1/users/{user.username}/",
+        "users/me/": "/api/v1/users/me/",
+    }
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200, f"GET `{url}` must return 200"
+    return len(context.captured_queries)
+
+
+def measure(client, size):
+    urls = read_urls(*seed(size))
+    # Warm up per-process state, such as the token revocation list.
+    client.get("/api/v1/users/me/")
+    return {
+        route: count_queries(client, url) for route, url in urls.items()
+    }
+
+
+class Test08ReadQueries:
+    @pytest.mark.django_db(transaction=True)
+    def test_01_small_page(self, admin):
+        client = auth_client(admin)
+        for route, queries in measure(client, 1).items():
+            assert queries <= 6, (
+                f"Проверьте, что GET `{route}` выполняет небольшое постоянное "
+                f"число запросов, выполнено {queries}"
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_full_page(self, admin):
+        client = auth_client(admin)
+        small = measure(client, 1)
+        Comment.objects.all().delete()
+        Review.objects.all().delete()
+        Title.objects.all().delete()
+        Genre.objects.all().delete()
+        Categorie.objects.all().delete()
+        get_user_model().objects.exclude(id=admin.id).delete()
+        full = measure(client, PAGE_SIZE + 2)
+        for route in small:
+            assert full[route] == small[route], (
+                f"Проверьте, что GET `{route}` не выполняет лишних запросов "
+                f"на каждый объект: {small[route]} запросов для одного "
+                f"объекта, {full[route]} для полной страницы"
+            )
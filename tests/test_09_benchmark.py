@@ -0,0 +1,92 @@
+import copy
+
+import pytest
+
+from api.benchmark import (
+    compare_reports,
+    plan_changes,
+    run_benchmark,
+    seed_dataset,
+)
+from api.models import Comment, Review, Title
+
+
+class Test09Benchmark:
+    @pytest.mark.django_db(transaction=True)
+    def test_01_seed_dataset(self):
+        seed_dataset(users=5, titles=4, reviews=20, comments=30)
+        assert Title.objects.count() == 4
+        assert Review.objects.count() == 20
+        assert Comment.objects.count() == 30
+        assert (
+            Review.objects.values("title", "author").distinct().count() == 20
+        ), (
+            "Проверьте, что у каждого сгенерированного отзыва своя пара "
+            "(произведение, автор)"
+        )
+        assert Title.objects.filter(rating__isnull=False).count() == 4, (
+            "Проверьте, что рейтинги сгенерированных произведений посчитаны"
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_report(self):
+        seed_dataset(users=5, titles=4, reviews=20, comments=30)
+        report = run_benchmark(repeat=2)
+        routes = report["routes"]
+        for route in (
+            "GET categorie-list",
+            "GET genre-list",
+            "GET title-list",
+            "GET title-list?genre",
+            "GET title-detail",
+            "GET review-list",
+            "GET review-detail",
+            "GET comment-list",
+            "GET comment-detail",
+            "GET user-list",
+            "GET user-detail",
+            "GET user-me",
+            "POST user-create-with-email",
+            "POST access-token-obtain",
+        ):
+            assert route in routes, f"Проверьте, что `{route}` замеряется"
+            assert routes[route]["status"] == 200, route
+            assert "queries" in routes[route], route
+            assert routes[route]["p95_ms"] >= routes[route]["p50_ms"]
+        assert report["meta"]["rows"]["reviews"] == 20
+        assert routes["GET title-detail"]["queries"] == 0, (
+            "Проверьте, что чтение из кэша с токеном с claims не выполняет "
+            "запросов"
+        )
+        assert routes["GET review-list"]["queries"] > 0
+
+        assert compare_reports(report, report, 0.2) == []
+        slower = copy.deepcopy(report)
+        slower["routes"]["GET title-list"]["queries"] += 1
+        assert compare_reports(report, slower, 0.2) == [
+            "GET title-list: queries "
+            f"{report['routes']['GET title-list']['queries']} -> "
+            f"{slower['routes']['GET title-list']['queries']}"
+        ]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_query_plans(self):
+        seed_dataset(users=5, titles=4, reviews=20, comments=30)
+        report = run_benchmark(repeat=1)
+        routes = report["routes"]
+        for route, index in (
+            ("GET review-list", "review_title_pub_date_idx"),
+            ("GET comment-list", "comment_review_pub_date_idx"),
+        ):
+            plans = " ".join(
+                " ".join(plan) for plan in routes[route]["plans"]
+            )
+            assert index in plans, (
+                f"Проверьте, что `{route}` использует индекс `{index}`"
+            )
+        assert "plans" not in routes["POST access-token-obtain"]
+
+        assert plan_changes(report, report) == []
+        changed = copy.deepcopy(report)
+        changed["routes"]["GET review-list"]["plans"][0] = ["SCAN review"]
+        assert len(plan_changes(report, changed)) == 1
@@ -0,0 +1,90 @@
+import shutil
+from io import StringIO
+
+import pytest
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+
+from api.models import Categorie, Comment, Genre, Review, Title
+
+
+def import_csv(*args):
+    stdout = StringIO()
+    call_command("import_csv", *args, stdout=stdout)
+    return stdout.getvalue()
+
+
+class Test10ImportCSV:
+    @pytest.mark.django_db(transaction=True)
+    def test_01_import_data(self):
+        output = import_csv()
+        assert "rows/s" in output, "Проверьте, что импорт сообщает скорость"
+        assert get_user_model().objects.count() == 5
+        assert Categorie.objects.count() == 3
+        assert Genre.objects.count() == 15
+        assert Title.objects.count() == 32
+        assert Title.genre.through.objects.count() == 42
+        assert Review.objects.count() == 73, (
+            "Проверьте, что повторные отзывы автора на произведение "
+            "пропускаются"
+        )
+        assert Comment.objects.count() == 5
+
+        title = Title.objects.get(name="Побег из Шоушенка")
+        assert title.category.slug == "movie"
+        assert title.genre.filter(slug="drama").exists()
+        reviews = title.reviews.all()
+        assert title.rating_count == reviews.count() > 0, (
+            "Проверьте, что рейтинги пересчитываются после импорта"
+        )
+        assert title.rating == pytest.approx(
+            sum(review.score for review in reviews) / reviews.count()
+        )
+        review = Review.objects.get(text__startswith="Ставлю десять звёзд!")
+        assert review.pub_date.isoformat() == "2019-09-24T21:08:21.567000+00:00", (
+            "Проверьте, что `pub_date` импортируется из CSV"
+        )
+        assert review.author.username == "bingobongo"
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_import_matches_existing(self):
+        get_user_model().objects.create(
+            username="bingobongo", email="bingobongo@yamdb.fake"
+        )
+        Genre.objects.create(name="Драма", slug="drama")
+        import_csv("--drop-indexes", "--batch-size", "7")
+        assert get_user_model().objects.count() == 5, (
+            "Проверьте, что существующие пользователи находятся по username"
+        )
+        assert Genre.objects.count() == 15, (
+            "Проверьте, что существующие жанры находятся по slug"
+        )
+        assert Review.objects.count() == 73, (
+            "Проверьте, что повторные отзывы автора на произведение "
+            "пропускаются"
+        )
+        assert Comment.objects.count() == 5
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_repeated_keys_in_csv(self, tmp_path):
+        path = tmp_path / "data"
+        shutil.copytree(f"{settings.BASE_DIR}/data", path)
+        for name, row in (
+            ("users", "999,bingobongo,other@yamdb.fake,user,,,"),
+            ("genre", "999,Драма,drama"),
+        ):
+            csv_file = path / f"{name}.csv"
+            csv_file.write_text(
+                csv_file.read_text(encoding="utf-8").rstrip("\n")
+                + f"\n{row}\n",
+                encoding="utf-8",
+            )
+        import_csv("--path", str(path))
+        assert get_user_model().objects.count() == 5, (
+            "Проверьте, что повторяющиеся в CSV пользователи импортируются "
+            "один раз"
+        )
+        assert Genre.objects.count() == 15, (
+            "Проверьте, что повторяющиеся в CSV жанры импортируются один раз"
+        )
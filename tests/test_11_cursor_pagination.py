@@ -0,0 +1,129 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.models import Comment, Review, Title
+
+START = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+
+def create_feed(size):
+    title = Title.objects.create(name="Title")
+    users = [
+        get_user_model().objects.create(
+            username=f"user{i}", email=f"user{i}@yamdb.fake"
+        )
+        for i in range(size)
+    ]
+    reviews = [
+        Review.objects.create(
+            title=title,
+            author=user,
+            text="review",
+            score=5,
+            # pairs of reviews share a timestamp to check the tiebreak
+            pub_date=START + timedelta(minutes=i // 2),
+        )
+        for i, user in enumerate(users)
+    ]
+    for i, user in enumerate(users):
+        Comment.objects.create(
+            review=reviews[0],
+            author=user,
+            text="comment",
+            pub_date=START + timedelta(minutes=i // 2),
+        )
+    expected = [
+        review.id
+        for review in sorted(
+            reviews, key=lambda review: (review.pub_date, review.id),
+            reverse=True,
+        )
+    ]
+    return title, reviews, expected
+
+
+def walk(client, url, link="next"):
+    ids, pages = [], []
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200, url
+        data = response.json()
+        assert "count" not in data, (
+            "Проверьте, что страницы с курсором не считают строки"
+        )
+        pages.append(url)
+        ids.extend(item["id"] for item in data["results"])
+        url = data[link]
+    return ids, pages
+
+
+class Test11CursorPagination:
+    @pytest.mark.django_db(transaction=True)
+    def test_01_reviews_feed(self, client):
+        title, reviews, expected = create_feed(25)
+        url = f"/api/v1/titles/{title.id}/reviews/?pagination=cursor"
+        ids, pages = walk(client, url)
+        assert ids == expected, (
+            "Проверьте, что лента с курсором отдаёт каждый отзыв один раз, "
+            "новые первыми, при равенстве дат по id"
+        )
+        assert len(pages) == 3
+
+        last_page = client.get(pages[-1]).json()
+        back, _ = walk(client, last_page["previous"], link="previous")
+        assert back == expected[10:20] + expected[:10], (
+            "Проверьте, что ссылки `previous` ведут по ленте назад"
+        )
+
+        response = client.get(f"/api/v1/titles/{title.id}/reviews/")
+        assert response.json()["count"] == 25, (
+            "Проверьте, что по умолчанию остаётся постраничная пагинация"
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_stable_under_inserts(self, client):
+        title, reviews, expected = create_feed(25)
+        url = f"/api/v1/titles/{title.id}/reviews/?pagination=cursor"
+        first = client.get(url).json()
+        newcomer = get_user_model().objects.create(
+            username="newcomer", email="newcomer@yamdb.fake"
+        )
+        Review.objects.create(title=title, author=newcomer, text="new")
+        rest, _ = walk(client, first["next"])
+        ids = [item["id"] for item in first["results"]] + rest
+        assert ids == expected, (
+            "Проверьте, что добавленные во время обхода строки не сдвигают "
+            "страницы"
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_comments_feed(self, client):
+        title, reviews, _ = create_feed(25)
+        url = (
+            f"/api/v1/titles/{title.id}/reviews/{reviews[0].id}/comments/"
+            "?pagination=cursor"
+        )
+        ids, pages = walk(client, url)
+        assert len(ids) == len(set(ids)) == 25
+        assert len(pages) == 3
+
+        queries = []
+        for page in pages[:2]:
+            with CaptureQueriesContext(connection) as context:
+                client.get(page)
+            queries.append(len(context.captured_queries))
+        assert queries[0] == queries[1], (
+            "Проверьте, что дальние страницы курсора не дороже первой"
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_invalid_cursor(self, client):
+        title, _, _ = create_feed(1)
+        response = client.get(
+            f"/api/v1/titles/{title.id}/reviews/?cursor=garbage"
+        )
+        assert response.status_code == 404
@@ -0,0 +1,87 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.models import Title
+
+from .common import create_reviews, create_titles
+
+
+def get_counting(client, url):
+    """Response data and whether the request ran a COUNT query."""
+
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200, url
+    counted = any(
+        "COUNT(" in query["sql"] for query in context.captured_queries
+    )
+    return response.json(), counted
+
+
+class Test12CachedCounts:
+    @pytest.mark.django_db(transaction=True)
+    def test_01_titles_count_cached(self, client, user_client):
+        titles, categories, genres = create_titles(user_client)
+        data, counted = get_counting(client, "/api/v1/titles/")
+        assert data["count"] == 2 and counted
+        data, counted = get_counting(client, "/api/v1/titles/")
+        assert data["count"] == 2 and not counted, (
+            "Проверьте, что число произведений берётся из кэша"
+        )
+        data, counted = get_counting(client, "/api/v1/titles/?year=2000")
+        assert data["count"] == 1 and counted, (
+            "Проверьте, что число объектов кэшируется для каждого фильтра"
+        )
+
+        user_client.post(
+            "/api/v1/titles/",
+            data={
+                "name": "Новый",
+                "year": 2000,
+                "genre": [genres[0]["slug"]],
+                "category": categories[0]["slug"],
+            },
+        )
+        data, _ = get_counting(client, "/api/v1/titles/?year=2000")
+        assert data["count"] == 2, (
+            "Проверьте, что запись сбрасывает закэшированные счётчики"
+        )
+        user_client.delete(f"/api/v1/genres/{genres[0]['slug']}/")
+        data, _ = get_counting(
+            client, f"/api/v1/titles/?genre={genres[0]['slug']}"
+        )
+        assert data["count"] == 0
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_skip_count(self, client, user_client):
+        create_titles(user_client)
+        for i in range(10):
+            Title.objects.create(name=f"Title {i}")
+        data, counted = get_counting(client, "/api/v1/titles/?count=false")
+        assert not counted and data["count"] is None, (
+            "Проверьте, что `count=false` отключает подсчёт"
+        )
+        assert len(data["results"]) == 10
+        assert data["next"].endswith("count=false&page=2")
+        assert data["previous"] is None
+
+        data, counted = get_counting(client, data["next"])
+        assert not counted and len(data["results"]) == 2
+        assert data["next"] is None and data["previous"] is not None
+        response = client.get("/api/v1/titles/?count=false&page=3")
+        assert response.status_code == 404
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_feed_counts(self, client, user_client, admin):
+        reviews, titles, user, moderator = create_reviews(user_client, admin)
+        url = f"/api/v1/titles/{titles[0]['id']}/reviews/"
+        data, counted = get_counting(client, url)
+        assert data["count"] == 3 and counted
+        data, counted = get_counting(client, url)
+        assert data["count"] == 3 and not counted
+        user_client.delete(f"{url}{reviews[0]['id']}/")
+        data, counted = get_counting(client, url)
+        assert data["count"] == 2 and counted
+        data, counted = get_counting(client, f"{url}?count=false")
+        assert data["count"] is None and not counted
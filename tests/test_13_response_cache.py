@@ -0,0 +1,139 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from api.cache import get_generation
+from api.models import Comment, Review, Title
+
+from .common import create_reviews, create_titles
+
+FAKE_REDIS_CACHES = {
+    "default": {
+        "BACKEND": "api.cache_backends.RedisCache",
+        "LOCATION": "redis://fake/0",
+        "OPTIONS": {"CLIENT_CLASS": "tests.fake_redis.FakeRedis"},
+    }
+}
+
+
+def get_with_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200, url
+    return response.json(), len(context.captured_queries)
+
+
+class Test13ResponseCache:
+    def check_catalog_cache(self, client, user_client):
+        titles, categories, genres = create_titles(user_client)
+        for url in (
+            "/api/v1/categories/",
+            "/api/v1/genres/",
+            "/api/v1/titles/",
+            f"/api/v1/titles/?genre={genres[0]['slug']}",
+            f"/api/v1/titles/{titles[0]['id']}/",
+        ):
+            first, _ = get_with_queries(client, url)
+            second, queries = get_with_queries(client, url)
+            assert first == second and queries == 0, (
+                f"Проверьте, что анонимный GET `{url}` отдаётся из кэша"
+            )
+
+        data, _ = get_with_queries(client, "/api/v1/titles/?year=2020")
+        assert data["count"] == 1, "Проверьте, что фильтры кэшируются отдельно"
+
+        user_client.post("/api/v1/categories/", data={"name": "Музыка"})
+        data, _ = get_with_queries(client, "/api/v1/categories/")
+        assert {"name": "Музыка", "slug": "muzyka"} in data["results"], (
+            "Проверьте, что создание категории сбрасывает кэш списков "
+            "категорий"
+        )
+
+        user_client.delete(f"/api/v1/categories/{categories[0]['slug']}/")
+        data, _ = get_with_queries(client, f"/api/v1/titles/{titles[0]['id']}/")
+        assert data["category"] is None, (
+            "Проверьте, что удаление категории сбрасывает кэш произведений"
+        )
+
+        user_client.patch(
+            f"/api/v1/titles/{titles[0]['id']}/", data={"name": "Другое"}
+        )
+        data, _ = get_with_queries(client, f"/api/v1/titles/{titles[0]['id']}/")
+        assert data["name"] == "Другое", (
+            "Проверьте, что PATCH произведения сбрасывает кэш произведений"
+        )
+
+        user_client.delete(f"/api/v1/titles/{titles[1]['id']}/")
+        data, _ = get_with_queries(client, "/api/v1/titles/")
+        assert data["count"] == 1, (
+            "Проверьте, что DELETE произведения сбрасывает кэш произведений"
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_catalog_cache(self, client, user_client):
+        self.check_catalog_cache(client, user_client)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_redis_backend(self, client, user_client):
+        with override_settings(CACHES=FAKE_REDIS_CACHES):
+            self.check_catalog_cache(client, user_client)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_review_score_changes(self, client, user_client, admin):
+        reviews, titles, user, moderator = create_reviews(user_client, admin)
+        title_url = f"/api/v1/titles/{titles[0]['id']}/"
+        review_url = f"{title_url}reviews/{reviews[0]['id']}/"
+        data, _ = get_with_queries(client, title_url)
+        assert data["rating"] == 4.0
+
+        user_client.patch(review_url, data={"text": "Только текст"})
+        _, queries = get_with_queries(client, title_url)
+        assert queries == 0, (
+            "Проверьте, что правка отзыва без смены оценки не сбрасывает кэш "
+            "произведений"
+        )
+
+        user_client.patch(review_url, data={"score": 8})
+        data, _ = get_with_queries(client, title_url)
+        assert data["rating"] == 5.0, (
+            "Проверьте, что смена оценки отзыва сбрасывает кэш произведений"
+        )
+        user_client.delete(review_url)
+        data, _ = get_with_queries(client, title_url)
+        assert data["rating"] == 3.5
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_invalidated_on_commit(self, client, user_client):
+        titles, _, _ = create_titles(user_client)
+        url = f"/api/v1/titles/{titles[0]['id']}/"
+        get_with_queries(client, url)
+        with transaction.atomic():
+            Title.objects.filter(pk=titles[0]["id"]).update(name="Новое")
+            Title.objects.get(pk=titles[0]["id"]).save()
+            data, queries = get_with_queries(client, url)
+            assert queries == 0, (
+                "Проверьте, что закэшированные ответы живут до коммита записи"
+            )
+        data, _ = get_with_queries(client, url)
+        assert data["name"] == "Новое"
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_user_writes(self, admin):
+        names = [model._meta.label_lower for model in (Review, Comment)]
+        stamps = [get_generation(name) for name in names]
+        get_user_model().objects.create(
+            username="newcomer", email="newcomer@yamdb.fake"
+        )
+        admin.bio = "Новое описание"
+        admin.save()
+        assert [get_generation(name) for name in names] == stamps, (
+            "Проверьте, что новые пользователи и изменения профиля "
+            "не сбрасывают кэш отзывов и комментариев"
+        )
+        admin.username = "renamed"
+        admin.save()
+        assert all(
+            get_generation(name) != stamp
+            for name, stamp in zip(names, stamps)
+        ), "Проверьте, что смена имени пользователя сбрасывает кэш отзывов"
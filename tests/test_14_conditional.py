@@ -0,0 +1,89 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_comments, create_titles
+
+
+def get_etag(client, url):
+    response = client.get(url)
+    assert response.status_code == 200, url
+    assert response.has_header("ETag") and response.has_header(
+        "Last-Modified"
+    ), f"Проверьте, что `{url}` отдаёт ETag и Last-Modified"
+    return response["ETag"]
+
+
+def revalidate(client, url, etag):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    return response.status_code, len(context.captured_queries)
+
+
+class Test14Conditional:
+    @pytest.mark.django_db(transaction=True)
+    def test_01_catalog_not_modified(self, client, user_client):
+        titles, categories, genres = create_titles(user_client)
+        for url in (
+            "/api/v1/categories/",
+            "/api/v1/genres/",
+            "/api/v1/titles/",
+            f"/api/v1/titles/{titles[0]['id']}/",
+        ):
+            etag = get_etag(client, url)
+            status, queries = revalidate(client, url, etag)
+            assert status == 304 and queries == 0, (
+                f"Проверьте, что совпадающий If-None-Match для `{url}` "
+                "возвращает 304 без запросов"
+            )
+
+        response = client.get("/api/v1/titles/")
+        response = client.get(
+            "/api/v1/titles/",
+            HTTP_IF_MODIFIED_SINCE=response["Last-Modified"],
+        )
+        assert response.status_code == 304, (
+            "Проверьте, что учитывается If-Modified-Since"
+        )
+
+        assert get_etag(client, "/api/v1/titles/") != get_etag(
+            client, "/api/v1/titles/?year=2000"
+        ), "Проверьте, что ETag зависит от строки запроса"
+
+        etag = get_etag(client, "/api/v1/titles/")
+        user_client.patch(
+            f"/api/v1/titles/{titles[0]['id']}/", data={"name": "Другое"}
+        )
+        status, _ = revalidate(client, "/api/v1/titles/", etag)
+        assert status == 200, "Проверьте, что запись меняет ETag"
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_feeds_not_modified(self, client, user_client, admin):
+        comments, reviews, titles, user, moderator = create_comments(
+            user_client, admin
+        )
+        reviews_url = f"/api/v1/titles/{titles[0]['id']}/reviews/"
+        review_url = f"{reviews_url}{reviews[0]['id']}/"
+        comments_url = f"{review_url}comments/"
+        comment_url = f"{comments_url}{comments[0]['id']}/"
+        etags = {}
+        for url in (reviews_url, review_url, comments_url, comment_url):
+            etags[url] = get_etag(client, url)
+            status, _ = revalidate(client, url, etags[url])
+            assert status == 304, (
+                f"Проверьте, что совпадающий If-None-Match для `{url}` "
+                "возвращает 304"
+            )
+
+        user_client.patch(comment_url, data={"text": "Изменено"})
+        for url in (comments_url, comment_url):
+            status, _ = revalidate(client, url, etags[url])
+            assert status == 200, (
+                f"Проверьте, что правка комментария меняет ETag `{url}`"
+            )
+
+        user_client.patch(review_url, data={"text": "Изменено"})
+        status, _ = revalidate(client, reviews_url, etags[reviews_url])
+        assert status == 200, (
+            "Проверьте, что правка отзыва меняет ETag списка отзывов"
+        )
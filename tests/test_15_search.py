@@ -0,0 +1,83 @@
+import pytest
+from django.db import connection
+
+from api.models import Title
+from api.search import postgresql_search_sql, search_vector
+
+from .common import create_titles
+
+
+def search(client, text):
+    response = client.get("/api/v1/titles/", {"search": text})
+    assert response.status_code == 200, (
+        "Проверьте, что GET /api/v1/titles/?search= возвращает 200"
+    )
+    return [title["name"] for title in response.json()["results"]]
+
+
+class Test15Search:
+    @pytest.mark.django_db(transaction=True)
+    def test_01_prefix_and_case(self, client, user_client):
+        create_titles(user_client)
+        assert search(client, "пово") == ["Поворот туда"], (
+            "Проверьте, что поиск находит по началу слова"
+        )
+        assert search(client, "ПРОЕКТ") == ["Проект"], (
+            "Проверьте, что поиск не зависит от регистра"
+        )
+        assert search(client, "драма") == ["Проект"], (
+            "Проверьте, что поиск идёт и по описанию"
+        )
+        assert search(client, "поворот драма") == [], (
+            "Проверьте, что должно совпасть каждое слово запроса"
+        )
+        assert search(client, '"*) OR') == [], (
+            "Проверьте, что синтаксис запросов в тексте поиска игнорируется"
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_ranking(self, client, user_client):
+        create_titles(user_client)
+        Title.objects.create(name="Другое", description="Про проект")
+        Title.objects.create(name="Проект проект", description="Проект")
+        assert search(client, "проект") == [
+            "Проект проект",
+            "Проект",
+            "Другое",
+        ], "Проверьте, что лучшие совпадения идут первыми"
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_kept_in_sync(self, client, user_client):
+        titles, _, _ = create_titles(user_client)
+        url = f"/api/v1/titles/{titles[1]['id']}/"
+        user_client.patch(url, data={"name": "Новое имя"})
+        assert search(client, "нов") == ["Новое имя"], (
+            "Проверьте, что переименованные произведения находятся по новому "
+            "названию"
+        )
+        assert search(client, "проект") == [], (
+            "Проверьте, что переименованные произведения не находятся по "
+            "старому названию"
+        )
+        user_client.delete(url)
+        assert search(client, "нов") == [], (
+            "Проверьте, что удалённые произведения не находятся"
+        )
+        Title.objects.bulk_create([Title(name="Массовый импорт")])
+        assert search(client, "масс") == ["Массовый импорт"], (
+            "Проверьте, что добавленные пакетом произведения индексируются"
+        )
+
+    def test_04_postgresql_index_expression(self):
+        queryset = Title.objects.annotate(vector=search_vector())
+        sql, params = queryset.query.get_compiler("default").compile(
+            queryset.query.annotations["vector"]
+        )
+        expression = (sql % tuple(f"'{param}'" for param in params)).replace(
+            f'"{Title._meta.db_table}".', ""
+        )
+        (statement,) = postgresql_search_sql(connection)
+        assert statement.endswith(f"USING gin ({expression})"), (
+            "Проверьте, что GIN-индекс PostgreSQL построен по тому же "
+            "выражению, по которому идёт поиск"
+        )
@@ -0,0 +1,91 @@
+import pytest
+from django.contrib.auth.tokens import default_token_generator
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .common import create_reviews
+
+
+def obtain_client(user):
+    response = APIClient().post(
+        "/api/v1/auth/token/",
+        data={
+            "email": user.email,
+            "confirmation_code": default_token_generator.make_token(user),
+        },
+    )
+    assert response.status_code == 200
+    token = response.json()["token"]
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+    return client, AccessToken(token)
+
+
+class Test16ClaimsAuth:
+    @pytest.mark.django_db(transaction=True)
+    def test_01_claims(self, django_user_model):
+        user = django_user_model.objects.create(
+            username="reader", email="reader@yamdb.fake", role="moderator"
+        )
+        client, token = obtain_client(user)
+        assert token["username"] == "reader"
+        assert token["role"] == "moderator"
+        assert token["is_staff"] is False and token["is_superuser"] is False
+        assert token["ver"] == user.token_version
+
+        client.get("/api/v1/titles/")
+        with CaptureQueriesContext(connection) as context:
+            response = client.get("/api/v1/titles/")
+        assert response.status_code == 200
+        assert len(context.captured_queries) == 0, (
+            "Проверьте, что токен с актуальными claims не загружает "
+            "пользователя"
+        )
+
+        response = client.get("/api/v1/users/me/")
+        assert response.json()["email"] == "reader@yamdb.fake"
+        response = client.patch("/api/v1/users/me/", data={"bio": "Читаю"})
+        assert response.status_code == 200
+        user.refresh_from_db()
+        assert user.bio == "Читаю" and user.email == "reader@yamdb.fake", (
+            "Проверьте, что /users/me/ работает с пользователем из claims"
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_authored_objects(self, user_client, admin):
+        reviews, titles, user, moderator = create_reviews(user_client, admin)
+        client, _ = obtain_client(user)
+        url = f"/api/v1/titles/{titles[0]['id']}/reviews/{reviews[1]['id']}/"
+        response = client.patch(url, data={"text": "Правка"})
+        assert response.status_code == 200, (
+            "Проверьте, что авторы из claims могут править свои отзывы"
+        )
+        response = client.post(
+            f"/api/v1/titles/{titles[1]['id']}/reviews/",
+            data={"text": "Новый", "score": 7},
+        )
+        assert response.status_code == 201
+        assert response.json()["author"] == user.username
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_stale_claims(self, user_client, django_user_model):
+        user = django_user_model.objects.create(
+            username="reader", email="reader@yamdb.fake", role="admin"
+        )
+        client, _ = obtain_client(user)
+        assert client.get("/api/v1/users/").status_code == 200
+
+        user_client.patch("/api/v1/users/reader/", data={"role": "user"})
+        assert client.get("/api/v1/users/").status_code == 403, (
+            "Проверьте, что смена роли действует для выданных токенов"
+        )
+        assert client.get("/api/v1/users/me/").json()["role"] == "user"
+
+        user.refresh_from_db()
+        user.is_active = False
+        user.save()
+        assert client.get("/api/v1/users/me/").status_code == 401, (
+            "Проверьте, что деактивированные пользователи отклоняются"
+        )
@@ -0,0 +1,106 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.models import TokenRevocation
+from users.revocation import revocations
+
+from .test_16_claims_auth import obtain_client
+
+
+def bearer_client(token):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+    return client
+
+
+class Test17Revocation:
+    @pytest.mark.django_db(transaction=True)
+    def test_01_revoke_token(self, django_user_model):
+        user = django_user_model.objects.create(
+            username="reader", email="reader@yamdb.fake"
+        )
+        client, _ = obtain_client(user)
+        other, _ = obtain_client(user)
+        response = client.post("/api/v1/auth/token/revoke/")
+        assert response.status_code == 204
+        assert client.get("/api/v1/users/me/").status_code == 401, (
+            "Проверьте, что отозванный токен отклоняется"
+        )
+        assert other.get("/api/v1/users/me/").status_code == 200, (
+            "Проверьте, что остальные токены пользователя продолжают работать"
+        )
+
+        other.get("/api/v1/titles/")
+        with CaptureQueriesContext(connection) as context:
+            assert client.get("/api/v1/titles/").status_code == 401
+            assert other.get("/api/v1/titles/").status_code == 200
+        assert len(context.captured_queries) == 0, (
+            "Проверьте, что проверка отзыва не обращается к базе данных"
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_revoke_all(self, django_user_model):
+        user = django_user_model.objects.create(
+            username="reader", email="reader@yamdb.fake"
+        )
+        client, _ = obtain_client(user)
+        plain = bearer_client(AccessToken.for_user(user))
+        response = client.post(
+            "/api/v1/auth/token/revoke/", data={"all": True}
+        )
+        assert response.status_code == 204
+        for revoked in (client, plain):
+            assert revoked.get("/api/v1/users/me/").status_code == 401, (
+                "Проверьте, что отзыв всех токенов отклоняет каждый выданный "
+                "токен"
+            )
+        user.refresh_from_db()
+        fresh, _ = obtain_client(user)
+        assert fresh.get("/api/v1/users/me/").status_code == 200, (
+            "Проверьте, что токены, выданные после отзыва, работают"
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_sync(self, django_user_model):
+        user = django_user_model.objects.create(
+            username="reader", email="reader@yamdb.fake"
+        )
+        client, token = obtain_client(user)
+        assert client.get("/api/v1/users/me/").status_code == 200
+        TokenRevocation.objects.create(
+            user=user,
+            jti=token["jti"],
+            expires=timezone.now() + timedelta(days=1),
+        )
+        TokenRevocation.objects.create(
+            user=user,
+            jti="expired",
+            expires=timezone.now() - timedelta(seconds=1),
+        )
+        assert client.get("/api/v1/users/me/").status_code == 200, (
+            "Проверьте, что между синхронизациями отзывы читаются из памяти"
+        )
+        revocations.next_sync = 0
+        assert client.get("/api/v1/users/me/").status_code == 401, (
+            "Проверьте, что отзывы других процессов действуют после "
+            "синхронизации"
+        )
+        assert "expired" not in revocations.tokens, (
+            "Проверьте, что отзывы истёкших токенов не хранятся"
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_command(self, django_user_model):
+        user = django_user_model.objects.create(
+            username="reader", email="reader@yamdb.fake"
+        )
+        client, _ = obtain_client(user)
+        call_command("revoke_tokens", "--user", "reader", "--prune")
+        assert client.get("/api/v1/users/me/").status_code == 401
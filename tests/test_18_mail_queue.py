@@ -0,0 +1,85 @@
+from datetime import timedelta
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from users.mail import deliver_batch, enqueue_mail
+from users.models import QueuedEmail
+
+
+class CountingBackend(EmailBackend):
+    opened = 0
+
+    def open(self):
+        CountingBackend.opened += 1
+        return super().open()
+
+
+class FailingBackend(EmailBackend):
+    def send_messages(self, messages):
+        raise ConnectionError("Mail server is down")
+
+
+class Test18MailQueue:
+    @pytest.mark.django_db(transaction=True)
+    def test_01_signup_enqueues(self, client):
+        response = client.post(
+            "/api/v1/auth/email/",
+            data={"email": "reader@yamdb.fake", "username": "reader"},
+        )
+        assert response.status_code == 200
+        assert mail.outbox == [], (
+            "Проверьте, что регистрация не отправляет письмо в запросе"
+        )
+        assert QueuedEmail.objects.count() == 1
+
+        call_command("send_queued_mail", "--once")
+        assert len(mail.outbox) == 1
+        assert mail.outbox[0].to == ["reader@yamdb.fake"]
+        email = QueuedEmail.objects.get()
+        assert email.sent is not None and email.next_attempt is None
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_batches(self):
+        for i in range(5):
+            enqueue_mail("Subject", "Body", None, [f"user{i}@yamdb.fake"])
+        CountingBackend.opened = 0
+        backend = "tests.test_18_mail_queue.CountingBackend"
+        with override_settings(EMAIL_BACKEND=backend):
+            call_command("send_queued_mail", "--once", "--batch-size", "2")
+        assert len(mail.outbox) == 5
+        assert CountingBackend.opened == 3, (
+            "Проверьте, что каждая пачка писем использует одно соединение"
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_retries(self, settings):
+        settings.EMAIL_BACKEND = "tests.test_18_mail_queue.FailingBackend"
+        settings.MAIL_QUEUE_MAX_ATTEMPTS = 2
+        email = enqueue_mail("Subject", "Body", None, ["user@yamdb.fake"])
+
+        assert deliver_batch() == (0, 1)
+        email.refresh_from_db()
+        assert email.attempts == 1
+        assert "Mail server is down" in email.last_error
+        assert email.next_attempt > timezone.now(), (
+            "Проверьте, что неотправленные письма отправляются повторно"
+        )
+        assert deliver_batch() == (0, 0), (
+            "Проверьте, что письма не отправляются повторно до истечения паузы"
+        )
+
+        QueuedEmail.objects.update(
+            next_attempt=timezone.now() - timedelta(seconds=1)
+        )
+        assert deliver_batch() == (0, 1)
+        email.refresh_from_db()
+        assert email.attempts == 2 and email.next_attempt is None, (
+            "Проверьте, что после MAIL_QUEUE_MAX_ATTEMPTS попыток письма не "
+            "отправляются"
+        )
+        assert email.claim == "" and email.sent is None
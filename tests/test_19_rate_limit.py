@@ -0,0 +1,106 @@
+import pytest
+
+from users.models import QueuedEmail
+from users.throttling import CacheBuckets, MemoryBuckets, take
+
+from .test_13_response_cache import FAKE_REDIS_CACHES
+
+
+def limit(settings, **rates):
+    settings.REST_FRAMEWORK = {
+        **settings.REST_FRAMEWORK,
+        "DEFAULT_THROTTLE_RATES": rates,
+    }
+
+
+def signup(client, email, username):
+    return client.post(
+        "/api/v1/auth/email/", data={"email": email, "username": username}
+    )
+
+
+class Test19RateLimit:
+    def test_01_token_bucket(self):
+        state = None
+        for _ in range(3):
+            allowed, state, wait = take(state, 3, 60, 0)
+            assert allowed and wait == 0
+        allowed, state, wait = take(state, 3, 60, 0)
+        assert not allowed and wait == pytest.approx(20)
+        allowed, state, wait = take(state, 3, 60, 20)
+        assert allowed, "Проверьте, что корзины со временем пополняются"
+
+    @pytest.mark.parametrize("backend", [None, "default"])
+    @pytest.mark.django_db(transaction=True)
+    def test_02_per_email(self, client, settings, backend):
+        settings.RATE_LIMIT_CACHE = backend
+        limit(settings, auth_email="2/min")
+        data = {"email": "reader@yamdb.fake", "confirmation_code": "wrong"}
+        for _ in range(2):
+            response = client.post("/api/v1/auth/token/", data=data)
+            assert response.status_code == 404
+        response = client.post("/api/v1/auth/token/", data=data)
+        assert response.status_code == 429, (
+            "Проверьте, что запросы токена ограничены для каждого email"
+        )
+        assert int(response["Retry-After"]) > 0
+        data["email"] = "other@yamdb.fake"
+        response = client.post("/api/v1/auth/token/", data=data)
+        assert response.status_code == 404, (
+            "Проверьте, что ограничения одного email не действуют на другие"
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_per_ip_and_username(self, client, settings):
+        limit(settings, auth_ip="3/min", auth_username="1/min")
+        assert signup(client, "a@yamdb.fake", "reader").status_code == 200
+        assert signup(client, "b@yamdb.fake", "reader").status_code == 429, (
+            "Проверьте, что регистрации ограничены для каждого username"
+        )
+        assert signup(client, "c@yamdb.fake", "other").status_code == 200
+        assert signup(client, "d@yamdb.fake", "third").status_code == 429, (
+            "Проверьте, что регистрации ограничены для каждого IP"
+        )
+        response = client.post(
+            "/api/v1/auth/email/",
+            data={"email": "e@yamdb.fake", "username": "fourth"},
+            REMOTE_ADDR="10.0.0.2",
+        )
+        assert response.status_code == 200
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_signup_dedup(self, client):
+        for _ in range(3):
+            response = signup(client, "reader@yamdb.fake", "reader")
+            assert response.status_code == 200
+        assert QueuedEmail.objects.count() == 1, (
+            "Проверьте, что повторные регистрации используют письмо из очереди"
+        )
+        signup(client, "other@yamdb.fake", "other")
+        assert QueuedEmail.objects.count() == 2
+
+    @pytest.mark.django_db
+    def test_05_shared_cache_windows(self, settings):
+        settings.CACHES = FAKE_REDIS_CACHES
+        buckets = CacheBuckets("default")
+        assert [buckets.consume("ip", 2, 60, 0)[0] for _ in range(3)] == [
+            True, True, False,
+        ], "Проверьте, что общие ограничения считают запросы атомарно"
+        allowed, wait = buckets.consume("ip", 2, 60, 30)
+        assert not allowed and wait == pytest.approx(30)
+        allowed, _ = buckets.consume("ip", 2, 60, 90)
+        assert allowed, "Проверьте, что предыдущее окно учитывается частично"
+        assert not buckets.consume("ip", 2, 60, 90)[0]
+
+    def test_06_memory_bound(self):
+        buckets = MemoryBuckets(max_buckets=3)
+        buckets.consume("kept", 1, 60, 0)
+        for i in range(10):
+            buckets.consume("kept", 1, 60, i)
+            buckets.consume(f"rotated{i}", 1, 60, i)
+        assert len(buckets.buckets) == 3, (
+            "Проверьте, что число корзин не превышает max_buckets"
+        )
+        assert not buckets.consume("kept", 1, 60, 10)[0], (
+            "Проверьте, что вытесняются давно не использованные корзины"
+        )
@@ -0,0 +1,108 @@
+import asyncio
+import json
+
+import pytest
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+
+from api.asgi import CachedReadMiddleware
+from api.benchmark import run_throughput_benchmark, seed_dataset
+from api.models import Title
+
+from .common import create_titles
+
+
+class CountingApplication:
+    def __init__(self, app):
+        self.app = app
+        self.calls = 0
+
+    async def __call__(self, scope, receive, send):
+        self.calls += 1
+        await self.app(scope, receive, send)
+
+
+def asgi_get(application, path, headers=()):
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"testserver"), *headers],
+        "client": ("127.0.0.1", 0),
+        "server": ("testserver", 80),
+    }
+    response = {"body": b""}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = dict(
+                (name.lower(), value) for name, value in message["headers"]
+            )
+        else:
+            response["body"] += message.get("body", b"")
+
+    asyncio.run(application(scope, receive, send))
+    return response
+
+
+class Test20ASGI:
+    @pytest.mark.django_db(transaction=True)
+    def test_01_cached_reads(self, user_client):
+        titles, _, _ = create_titles(user_client)
+        django_app = CountingApplication(get_asgi_application())
+        application = CachedReadMiddleware(django_app)
+        url = f"/api/v1/titles/{titles[0]['id']}/"
+
+        first = asgi_get(application, url)
+        second = asgi_get(application, url)
+        assert first["status"] == second["status"] == 200
+        assert first["body"] == second["body"]
+        assert django_app.calls == 1, (
+            "Проверьте, что повторные анонимные чтения не доходят до Django"
+        )
+
+        response = asgi_get(
+            application,
+            url,
+            [(b"if-none-match", first["headers"][b"etag"])],
+        )
+        assert response["status"] == 304 and django_app.calls == 1
+
+        title = Title.objects.get(pk=titles[0]["id"])
+        title.name = "Другое"
+        title.save()
+        response = asgi_get(application, url)
+        assert json.loads(response["body"])["name"] == "Другое", (
+            "Проверьте, что запись сбрасывает закэшированные ответы"
+        )
+        assert django_app.calls == 2
+
+        for headers in (
+            [(b"authorization", b"Bearer token")],
+            [(b"accept", b"text/html")],
+            [(b"cookie", f"a=1; {settings.REPLICA_PIN_COOKIE}=x".encode())],
+        ):
+            asgi_get(application, url, headers)
+        assert django_app.calls == 5, (
+            "Проверьте, что чтения с авторизацией, HTML и закреплённые идут в "
+            "Django"
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_throughput_report(self):
+        seed_dataset(users=5, titles=4, reviews=20, comments=30)
+        report = run_throughput_benchmark(clients=2, requests=3)
+        for deployment in ("wsgi", "asgi", "asgi-cached-reads"):
+            assert report[deployment]["requests"] == 6
+            assert report[deployment]["errors"] == 0, deployment
+            assert report[deployment]["rps"] > 0
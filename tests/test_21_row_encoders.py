@@ -0,0 +1,98 @@
+import json
+
+import pytest
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+from api.benchmark import run_serializer_benchmark, seed_dataset
+from api.encoders import RowEncoder, get_encoder
+from api.models import Comment, Review, Title
+from api.serializers import (
+    CommentSerializer,
+    ReviewSerializer,
+    TitleSerializer,
+)
+
+from .common import create_comments
+
+
+def render(data):
+    return json.loads(JSONRenderer().render(data))
+
+
+def assert_equivalent(serializer_class, queryset):
+    queryset = queryset.order_by("pk")
+    expected = render(serializer_class(queryset, many=True).data)
+    encoder = get_encoder(serializer_class)
+    encoded = encoder.encode(encoder.values(queryset))
+    assert encoded == expected, (
+        f"Проверьте, что кодировщик {serializer_class.__name__} "
+        "отдаёт то же, что и сериализатор"
+    )
+    for item, expected_item in zip(encoded, expected):
+        assert list(item) == list(expected_item)
+
+
+class Test21RowEncoders:
+    @pytest.mark.django_db(transaction=True)
+    def test_01_equivalence(self, user_client, admin):
+        create_comments(user_client, admin)
+        Title.objects.create(name="Без категории")
+        Title.objects.update(rating=7.5)
+        Title.objects.filter(name="Проект").update(rating=None)
+
+        assert_equivalent(
+            TitleSerializer,
+            Title.objects.select_related("category").prefetch_related("genre"),
+        )
+        assert_equivalent(
+            ReviewSerializer, Review.objects.select_related("author"),
+        )
+        assert_equivalent(
+            CommentSerializer, Comment.objects.select_related("author"),
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_list_responses(self, client, user_client, admin):
+        _, reviews, titles, _, _ = create_comments(user_client, admin)
+        title = Title.objects.get(pk=titles[0]["id"])
+        review = Review.objects.get(pk=reviews[0]["id"])
+        routes = (
+            ("/api/v1/titles/", TitleSerializer, [
+                Title.objects.get(pk=titles[0]["id"]),
+                Title.objects.get(pk=titles[1]["id"]),
+            ]),
+            (
+                f"/api/v1/titles/{title.pk}/reviews/",
+                ReviewSerializer,
+                title.reviews.order_by("-pub_date", "-id"),
+            ),
+            (
+                f"/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/",
+                CommentSerializer,
+                review.comments.order_by("-pub_date", "-id"),
+            ),
+        )
+        for url, serializer_class, objects in routes:
+            response = client.get(url)
+            assert response.status_code == 200
+            assert response.json()["results"] == render(
+                serializer_class(objects, many=True).data
+            ), f"Проверьте, что GET {url} сохраняет вывод сериализатора"
+
+    def test_03_unsupported_fields(self):
+        class PrimaryKeysSerializer(serializers.ModelSerializer):
+            class Meta:
+                model = Review
+                fields = ("id", "title")
+
+        with pytest.raises(TypeError):
+            RowEncoder(PrimaryKeysSerializer)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_benchmark_report(self):
+        seed_dataset(users=5, titles=4, reviews=20, comments=30)
+        report = run_serializer_benchmark(page_size=10, repeat=2)
+        for name in ("titles", "reviews", "comments"):
+            assert report[name]["encoder_p50_ms"] > 0
+            assert report[name]["speedup"] > 0
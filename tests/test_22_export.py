@@ -0,0 +1,121 @@
+import csv
+import io
+import json
+import re
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.export import export_titles
+from api.models import Title
+
+from .common import auth_client, create_comments, create_users_api
+
+
+def read_stream(response):
+    return b"".join(response.streaming_content).decode()
+
+
+class Test22Export:
+    @pytest.mark.django_db(transaction=True)
+    def test_01_permissions(self, client, user_client):
+        user, _ = create_users_api(user_client)
+        assert client.get("/api/v1/titles/export/").status_code == 401
+        response = auth_client(user).get("/api/v1/titles/export/")
+        assert response.status_code == 403, (
+            "Проверьте, что выгружать каталог могут только администраторы"
+        )
+        response = user_client.get("/api/v1/titles/export/?output=xml")
+        assert response.status_code == 400
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_ndjson(self, client, user_client, admin):
+        _, reviews, titles, _, _ = create_comments(user_client, admin)
+        response = user_client.get("/api/v1/titles/export/?reviews=true")
+        assert response.status_code == 200
+        assert response["Content-Type"] == "application/x-ndjson"
+        exported = [
+            json.loads(line) for line in read_stream(response).splitlines()
+        ]
+
+        listed = client.get("/api/v1/titles/").json()["results"]
+        assert [
+            {key: value for key, value in title.items() if key != "reviews"}
+            for title in exported
+        ] == sorted(listed, key=lambda title: title["id"]), (
+            "Проверьте, что выгруженные произведения совпадают со списком"
+        )
+        title = exported[0]
+        feed = client.get(f"/api/v1/titles/{title['id']}/reviews/").json()
+        assert [
+            {key: value for key, value in review.items() if key != "comments"}
+            for review in title["reviews"]
+        ] == feed["results"]
+        review = next(
+            review for review in title["reviews"]
+            if review["id"] == reviews[0]["id"]
+        )
+        assert len(review["comments"]) == 3
+        assert exported[1]["reviews"] == []
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_csv(self, user_client, admin):
+        create_comments(user_client, admin)
+        response = user_client.get("/api/v1/titles/export/?output=csv")
+        assert response["Content-Type"] == "text/csv"
+        rows = list(csv.DictReader(io.StringIO(read_stream(response))))
+        assert [row["name"] for row in rows] == ["Поворот туда", "Проект"]
+        assert len(rows[0]["genre"].split(",")) == 2
+        assert rows[0]["rating"] == "4.0"
+        response = user_client.get(
+            "/api/v1/titles/export/", {"output": "csv", "reviews": "1"}
+        )
+        assert response.status_code == 400, (
+            "Проверьте, что отзывы вкладываются только в NDJSON"
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_chunks(self, user_client, admin):
+        create_comments(user_client, admin)
+        for i in range(5):
+            Title.objects.create(name=f"Title {i}")
+        with CaptureQueriesContext(connection) as context:
+            titles = list(export_titles(with_reviews=True, chunk_size=2))
+        assert len(titles) == 7
+        assert [title["id"] for title in titles] == sorted(
+            title["id"] for title in titles
+        )
+        assert len(context.captured_queries) == 1 + 4 + 4 + 2, (
+            "Проверьте, что произведения читаются пачками, с одним запросом "
+            "жанров и отзывов на пачку, а комментарии читаются на каждую "
+            "пачку отзывов"
+        )
+        assert [len(title["reviews"]) for title in titles] == [3] + [0] * 6
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_command(self, user_client, admin):
+        create_comments(user_client, admin)
+        out = io.StringIO()
+        call_command("export_catalog", "--reviews", stdout=out)
+        lines = out.getvalue().splitlines()
+        assert len(lines) == 2
+        assert len(json.loads(lines[0])["reviews"]) == 3
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_review_id_chunks(self, user_client, admin, monkeypatch):
+        create_comments(user_client, admin)
+        expected = list(export_titles(with_reviews=True))
+        monkeypatch.setattr(connection.features, "max_query_params", 1)
+        with CaptureQueriesContext(connection) as context:
+            titles = list(export_titles(with_reviews=True))
+        assert titles == expected
+        comment_queries = [
+            query["sql"] for query in context.captured_queries
+            if query["sql"].startswith('SELECT "api_comment"')
+        ]
+        assert len(comment_queries) == 3 and all(
+            re.search(r'"review_id" IN \(\d+\)', sql)
+            for sql in comment_queries
+        ), "Проверьте, что id отзывов не превышают лимит параметров запроса"
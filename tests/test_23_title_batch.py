@@ -0,0 +1,164 @@
+import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from api.bulk import bulk_create_with_pks
+from api.models import Genre, Title
+
+from .common import auth_client, create_titles, create_users_api
+
+URL = "/api/v1/titles/bulk/"
+
+
+def slug_lookups(context, table):
+    return [
+        query["sql"] for query in context.captured_queries
+        if f'WHERE "{table}"."slug" IN' in query["sql"]
+    ]
+
+
+class Test23TitleBatch:
+    @pytest.mark.django_db(transaction=True)
+    def test_01_create_and_update(self, client, user_client):
+        titles, categories, genres = create_titles(user_client)
+        assert client.get("/api/v1/titles/").json()["count"] == 2
+        data = [
+            {
+                "name": "Первый",
+                "year": 1999,
+                "category": categories[0]["slug"],
+                "genre": [genres[0]["slug"], genres[2]["slug"]],
+            },
+            {"id": titles[0]["id"], "name": "Поворот", "genre": []},
+            {"name": "Второй", "genre": [genres[1]["slug"]]},
+            {"id": titles[1]["id"], "category": None},
+        ]
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(URL, data=data, format="json")
+        assert response.status_code == 201, response.json()
+        for table in ("api_categorie", "api_genre"):
+            assert len(slug_lookups(context, table)) == 1, (
+                f"Проверьте, что slug из {table} находятся одним запросом"
+            )
+
+        created, renamed, second, uncategorized = response.json()
+        assert created["id"] and second["id"] > created["id"]
+        assert created["category"]["slug"] == categories[0]["slug"]
+        assert {genre["slug"] for genre in created["genre"]} == {
+            genres[0]["slug"], genres[2]["slug"],
+        }
+        assert renamed["name"] == "Поворот" and renamed["genre"] == []
+        assert renamed["year"] == titles[0]["year"], (
+            "Проверьте, что обновление меняет только переданные поля"
+        )
+        assert uncategorized["category"] is None
+        assert uncategorized["genre"] == [
+            {"name": genres[2]["name"], "slug": genres[2]["slug"]}
+        ]
+        assert set(
+            Genre.objects.filter(titles__pk=second["id"])
+            .values_list("slug", flat=True)
+        ) == {genres[1]["slug"]}
+
+        listed = client.get("/api/v1/titles/").json()
+        assert listed["count"] == 4, (
+            "Проверьте, что пакетная запись сбрасывает кэш списков "
+            "произведений"
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_item_errors(self, user_client):
+        titles, categories, genres = create_titles(user_client)
+        data = [
+            {"name": "Хороший", "category": categories[0]["slug"]},
+            {"name": "Плохой", "category": "missing"},
+            {"year": 2000},
+            {"id": 100500, "name": "Нет такого"},
+            {"name": "Жанры", "genre": [genres[0]["slug"], "missing"]},
+        ]
+        response = user_client.post(URL, data=data, format="json")
+        assert response.status_code == 400
+        errors = response.json()
+        assert len(errors) == len(data), (
+            "Проверьте, что ошибки возвращаются для каждого элемента"
+        )
+        assert errors[0] == {}
+        assert list(errors[1]) == ["category"]
+        assert list(errors[2]) == ["name"]
+        assert list(errors[3]) == ["id"]
+        assert errors[4] == {
+            "genre": ["Object with slug=missing does not exist."]
+        }
+        assert Title.objects.count() == 2, (
+            "Проверьте, что ничего не сохраняется, пока все элементы не "
+            "валидны"
+        )
+
+        response = user_client.post(
+            URL, data=[{"name": "x", "year": 100500}], format="json"
+        )
+        assert response.status_code == 400 and "year" in response.json()[0]
+        response = user_client.post(URL, data={"name": "x"}, format="json")
+        assert response.status_code == 400
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_permissions(self, client, user_client, settings):
+        user, moderator = create_users_api(user_client)
+        data = [{"name": "Новый"}]
+        response = client.post(URL, data=data, content_type="application/json")
+        assert response.status_code == 401
+        for other in (user, moderator):
+            response = auth_client(other).post(URL, data=data, format="json")
+            assert response.status_code == 403
+        settings.BULK_WRITE_MAX_ITEMS = 1
+        response = user_client.post(URL, data=data * 2, format="json")
+        assert response.status_code == 400
+        assert Title.objects.count() == 0
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_bulk_create_with_pks(self):
+        Title.objects.create(name="Старый")
+        with transaction.atomic():
+            titles = bulk_create_with_pks(
+                Title, [Title(name=f"Новый {i}") for i in range(3)]
+            )
+        for title in titles:
+            assert Title.objects.get(pk=title.pk).name == title.name
+        with pytest.raises(transaction.TransactionManagementError):
+            bulk_create_with_pks(Title, [Title(name="Без транзакции")])
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_repeated_genres(self, user_client):
+        _, _, genres = create_titles(user_client)
+        slug = genres[0]["slug"]
+        response = user_client.post(
+            URL, data=[{"name": "Повтор", "genre": [slug, slug]}],
+            format="json",
+        )
+        assert response.status_code == 201, (
+            "Проверьте, что повторяющиеся жанры элемента сохраняются один раз"
+        )
+        title = Title.objects.get(name="Повтор")
+        assert list(title.genre.values_list("slug", flat=True)) == [slug]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_repeated_ids(self, user_client):
+        titles, _, genres = create_titles(user_client)
+        pk = titles[0]["id"]
+        response = user_client.post(
+            URL,
+            data=[
+                {"id": pk, "genre": [genres[0]["slug"]]},
+                {"name": "Новый"},
+                {"id": pk, "genre": [genres[0]["slug"]]},
+            ],
+            format="json",
+        )
+        assert response.status_code == 400
+        errors = response.json()
+        assert errors[1] == {}
+        assert list(errors[0]) == list(errors[2]) == ["id"], (
+            "Проверьте, что дважды обновляемое в пакете произведение "
+            "отклоняется"
+        )
+        assert Title.objects.count() == 2
@@ -0,0 +1,103 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.models import Categorie, Genre
+from api.slugs import assign_slugs
+
+from .common import auth_client, create_users_api
+
+
+class Test24SlugBatch:
+    def test_01_assign_slugs(self):
+        names = ["Драма", "Драма!", "Комедия", "Драма?", "Сказка"]
+        slugs = [None, None, None, None, "drama-3"]
+        assert assign_slugs(names, slugs, {"drama"}, 100) == [
+            "drama-2", "drama-4", "komediia", "drama-5", "drama-3",
+        ], (
+            "Проверьте, что сгенерированные slug пропускают занятые и "
+            "переданные дальше в пакете"
+        )
+        assert assign_slugs(["x"], ["drama"], {"drama"}, 100) == [None]
+        assert assign_slugs(["!!!"], [None], set(), 100) == [None]
+        assert assign_slugs(["a" * 20, "a" * 20], [None, None], set(), 10) == [
+            "a" * 10, "a" * 8 + "-2",
+        ], "Проверьте, что slug с суффиксом укладываются в длину поля"
+
+    @pytest.mark.parametrize(
+        "url, model", [("categories", Categorie), ("genres", Genre)]
+    )
+    @pytest.mark.django_db(transaction=True)
+    def test_02_bulk_create(self, client, user_client, url, model):
+        model.objects.create(name="Драма", slug="drama")
+        model.objects.create(name="Старая драма", slug="drama-2")
+        assert len(client.get(f"/api/v1/{url}/").json()["results"]) == 2
+        data = [{"name": "Драма!"}, {"name": "Ужасы"}, {"name": "Драма?"}]
+        data += [{"name": f"Жанр {i}"} for i in range(50)]
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(
+                f"/api/v1/{url}/bulk/", data=data, format="json"
+            )
+        assert response.status_code == 201, response.json()
+        assert response.json()[:3] == [
+            {"name": "Драма!", "slug": "drama-3"},
+            {"name": "Ужасы", "slug": "uzhasy"},
+            {"name": "Драма?", "slug": "drama-4"},
+        ]
+        selects = [
+            query for query in context.captured_queries
+            if query["sql"].startswith("SELECT")
+            and f'"api_{model._meta.model_name}"' in query["sql"]
+        ]
+        assert len(selects) == 2, (
+            "Проверьте, что slug и названия проверяются одним запросом каждый"
+        )
+        assert model.objects.count() == 55
+        listed = client.get(f"/api/v1/{url}/").json()
+        assert listed["count"] == 55, (
+            "Проверьте, что пакетное создание сбрасывает кэш списков"
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_item_errors(self, user_client):
+        Genre.objects.create(name="Драма", slug="drama")
+        data = [
+            {"name": "Ужасы"},
+            {"name": "Драма"},
+            {"name": "Мистика", "slug": "drama"},
+            {"name": "Ужасы"},
+            {"name": "..."},
+        ]
+        response = user_client.post(
+            "/api/v1/genres/bulk/", data=data, format="json"
+        )
+        assert response.status_code == 400
+        errors = response.json()
+        assert len(errors) == len(data)
+        assert errors[0] == {}
+        assert [list(item) for item in errors[1:]] == [
+            ["name"], ["slug"], ["name"], ["slug"],
+        ]
+        assert Genre.objects.count() == 1, (
+            "Проверьте, что ничего не сохраняется, пока все элементы не "
+            "валидны"
+        )
+        response = user_client.post(
+            "/api/v1/genres/bulk/",
+            data=[{"name": "Мистика"}, {"slug": "noname"}],
+            format="json",
+        )
+        assert response.status_code == 400
+        assert response.json() == [{}, {"name": ["This field is required."]}]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_permissions(self, user_client):
+        user, moderator = create_users_api(user_client)
+        for other in (user, moderator):
+            response = auth_client(other).post(
+                "/api/v1/categories/bulk/",
+                data=[{"name": "Фильм"}],
+                format="json",
+            )
+            assert response.status_code == 403
+        assert Categorie.objects.count() == 0
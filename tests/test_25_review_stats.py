@@ -0,0 +1,105 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.models import SCORE_FIELDS, Review, Title
+from api.ratings import recalculate_title_ratings
+
+from .common import create_reviews
+
+
+def histogram(title):
+    return [getattr(title, field) for field in SCORE_FIELDS]
+
+
+def stored_stats(title_id):
+    title = Title.objects.get(pk=title_id)
+    return (
+        histogram(title),
+        title.review_count,
+        title.last_review_date,
+        title.rating,
+    )
+
+
+class Test25ReviewStats:
+    @pytest.mark.django_db(transaction=True)
+    def test_01_incremental(self, user_client, admin):
+        reviews, titles, _, _ = create_reviews(user_client, admin)
+        title = Title.objects.get(pk=titles[0]["id"])
+        assert histogram(title) == [0, 0, 1, 1, 1, 0, 0, 0, 0, 0]
+        assert title.review_count == 3
+        latest = Review.objects.get(pk=reviews[2]["id"])
+        assert title.last_review_date == latest.pub_date
+
+        review = Review.objects.get(pk=reviews[0]["id"])
+        review.score = 10
+        review.save()
+        assert histogram(Title.objects.get(pk=title.pk)) == [
+            0, 0, 1, 1, 0, 0, 0, 0, 0, 1,
+        ], "Проверьте, что смена оценки переносит отзыв между счётчиками"
+
+        review = Review.objects.get(pk=reviews[1]["id"])
+        review.score = None
+        review.save()
+        title = Title.objects.get(pk=title.pk)
+        assert histogram(title) == [0, 0, 0, 1, 0, 0, 0, 0, 0, 1]
+        assert title.review_count == 3, (
+            "Проверьте, что отзывы без оценки тоже считаются"
+        )
+
+        latest.delete()
+        title = Title.objects.get(pk=title.pk)
+        assert title.review_count == 2
+        assert title.last_review_date == Review.objects.get(
+            pk=reviews[1]["id"]
+        ).pub_date, (
+            "Проверьте, что удаление последнего отзыва возвращает прежнюю дату"
+        )
+
+        stats = stored_stats(title.pk)
+        Title.objects.update(
+            score_4=5, review_count=0, last_review_date=None,
+        )
+        recalculate_title_ratings()
+        assert stored_stats(title.pk) == stats, (
+            "Проверьте, что пересчитанная статистика совпадает с накопленной"
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_optional_fields(self, client, user_client, admin):
+        _, titles, _, _ = create_reviews(user_client, admin)
+        url = f"/api/v1/titles/{titles[0]['id']}/"
+        assert "review_count" not in client.get(url).json()
+        data = client.get(url, {"stats": "true"}).json()
+        assert data["review_count"] == 3 and data["score_5"] == 1
+        assert data["last_review_date"]
+        listed = client.get("/api/v1/titles/", {"stats": "true"}).json()
+        assert listed["results"][0]["score_3"] == 1
+        assert "score_3" not in client.get("/api/v1/titles/").json()[
+            "results"
+        ][0]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_filter_and_order(self, client, user_client, admin):
+        _, titles, _, _ = create_reviews(user_client, admin)
+        Title.objects.create(name="Без оценок")
+        Title.objects.filter(pk=titles[1]["id"]).update(rating=9.0)
+
+        def names(**params):
+            with CaptureQueriesContext(connection) as context:
+                response = client.get("/api/v1/titles/", params)
+            assert response.status_code == 200
+            assert not any(
+                "api_review" in query["sql"]
+                for query in context.captured_queries
+            ), "Проверьте, что списки произведений не агрегируют отзывы"
+            return [title["name"] for title in response.json()["results"]]
+
+        assert names(min_rating=5) == ["Проект"]
+        assert names(min_rating=4) == ["Поворот туда", "Проект"]
+        assert names(ordering="-rating")[:2] == ["Проект", "Поворот туда"]
+        assert names(ordering="-review_count")[0] == "Поворот туда"
+        assert client.get(
+            "/api/v1/titles/", {"ordering": "rating_sum"}
+        ).status_code == 400
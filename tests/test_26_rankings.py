@@ -0,0 +1,138 @@
+from datetime import timedelta
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from api.models import RankingState, Review, Title, TitleTrend
+from api.rankings import (bayesian_score, review_activity, trending_scores,
+                          update_rankings)
+
+from .common import create_reviews
+
+
+def ranking(client, url, **params):
+    response = client.get(f"/api/v1/titles/{url}/", params)
+    assert response.status_code == 200, (
+        f"Проверьте, что GET /api/v1/titles/{url}/ возвращает 200"
+    )
+    return [
+        (title["name"], title["position"])
+        for title in response.json()["results"]
+    ]
+
+
+class Test26Rankings:
+    def test_01_bayesian_score(self):
+        assert bayesian_score(10, 1, 7, 10) < bayesian_score(900, 100, 7, 10)
+        assert bayesian_score(0, 0, 7, 10) == 7
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_top_and_trending(self, client, user_client, admin):
+        reviews, titles, user, _ = create_reviews(user_client, admin)
+        other = Title.objects.get(pk=titles[1]["id"])
+        Review.objects.create(title=other, author=user, text="x", score=10)
+        assert ranking(client, "top") == [], (
+            "Проверьте, что рейтинги отдаются только после расчёта"
+        )
+
+        Title.objects.filter(pk=titles[0]["id"]).update(
+            rating_sum=900, rating_count=100,
+        )
+        Title.objects.create(name="Плохой", rating_sum=100, rating_count=50)
+        call_command("rank_titles")
+        assert ranking(client, "top") == [
+            ("Поворот туда", 1), ("Проект", 2), ("Плохой", 3),
+        ], "Проверьте, что одна десятка не обгоняет сотню девяток"
+        assert ranking(client, "trending") == [
+            ("Поворот туда", 1), ("Проект", 2),
+        ]
+        assert ranking(client, "top", category="books") == [("Проект", 1)]
+        assert ranking(client, "top", genre="comedy") == [
+            ("Поворот туда", 1),
+        ]
+        response = client.get(
+            "/api/v1/titles/top/", {"category": "books", "genre": "drama"}
+        )
+        assert response.status_code == 400
+
+        with CaptureQueriesContext(connection) as context:
+            ranking(client, "trending", genre="drama")
+        assert not any(
+            "api_review" in query["sql"] for query in context.captured_queries
+        ), "Проверьте, что рейтинги читаются без обращения к отзывам"
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_incremental_activity(self, client, user_client, admin):
+        _, titles, user, moderator = create_reviews(user_client, admin)
+        now = timezone.now()
+        settle = timedelta(seconds=settings.RANKING_TREND_SETTLE)
+        assert update_rankings(now)[0] == 0, (
+            "Проверьте, что отзывы учитываются через RANKING_TREND_SETTLE"
+        )
+        assert ranking(client, "trending") == [("Поворот туда", 1)], (
+            "Проверьте, что ещё не учтённые отзывы попадают в тренды"
+        )
+        assert update_rankings(now + settle)[0] == 3
+        assert update_rankings(now + settle)[0] == 0, (
+            "Проверьте, что отзывы учитываются один раз"
+        )
+        trend = TitleTrend.objects.get(title_id=titles[0]["id"])
+        assert trend.activity == pytest.approx(3, rel=1e-3)
+
+        other = Title.objects.get(pk=titles[1]["id"])
+        for author in (user, moderator):
+            Review.objects.create(title=other, author=author, text="x")
+        later = now + timedelta(days=3)
+        Review.objects.filter(title=other).update(pub_date=later)
+        assert update_rankings(later + 2 * settle)[0] == 2
+        assert ranking(client, "trending") == [
+            ("Проект", 1), ("Поворот туда", 2),
+        ], "Проверьте, что старая активность затухает"
+
+        state = RankingState.objects.get()
+        activities = dict(
+            TitleTrend.objects.values_list("title_id", "activity")
+        )
+        much_later = later + timedelta(days=100)
+        update_rankings(much_later)
+        state.refresh_from_db()
+        assert state.epoch == much_later, (
+            "Проверьте, что активность переносится на новую эпоху"
+        )
+        rebased = dict(TitleTrend.objects.values_list("title_id", "activity"))
+        assert rebased[other.pk] / rebased[titles[0]["id"]] == pytest.approx(
+            activities[other.pk] / activities[titles[0]["id"]]
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_late_and_deleted_reviews(self, user_client, admin):
+        reviews, titles, user, _ = create_reviews(user_client, admin)
+        now = timezone.now()
+        settle = timedelta(seconds=settings.RANKING_TREND_SETTLE)
+        update_rankings(now + settle)
+        late = Review.objects.create(
+            title_id=titles[1]["id"], author=user, text="x", score=5,
+        )
+        Review.objects.filter(pk=late.pk).update(pub_date=now + settle / 2)
+        assert update_rankings(now + 2 * settle)[0] == 1, (
+            "Проверьте, что учитываются отзывы, опубликованные до "
+            "прошлого запуска и закоммиченные после него"
+        )
+
+        Review.objects.get(pk=reviews[0]["id"]).delete()
+        Review.objects.get(pk=late.pk).delete()
+        later = now + timedelta(days=1)
+        update_rankings(later)
+        state = RankingState.objects.get()
+        scores = trending_scores(state, later)
+        recounted, _ = review_activity(Review.objects.all(), later)
+        assert [scores.get(title["id"], 0) for title in titles] == (
+            pytest.approx(
+                [recounted.get(title["id"], 0) for title in titles],
+                abs=1e-9,
+            )
+        ), "Проверьте, что удалённые отзывы вычитаются из активности"
@@ -0,0 +1,139 @@
+import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from api.cache import get_generation
+from api.facets import rebuild_facets, title_facets
+from api.models import Categorie, FacetCount, Genre, Title
+
+from .common import create_titles
+
+URL = "/api/v1/titles/facets/"
+
+FILTERS = (
+    {},
+    {"category": "films"},
+    {"genre": "drama"},
+    {"year": 2000},
+    {"category": "books", "genre": "drama", "year": 2020},
+)
+
+
+def counts(facets, facet):
+    key = "decade" if facet == "year" else "slug"
+    return {item[key]: item["count"] for item in facets[facet]}
+
+
+def assert_consistent():
+    stored = [title_facets(**filters) for filters in FILTERS]
+    rebuild_facets()
+    assert stored == [title_facets(**filters) for filters in FILTERS], (
+        "Проверьте, что накопленные счётчики фасетов совпадают с "
+        "пересчитанными"
+    )
+
+
+class Test27Facets:
+    @pytest.mark.django_db(transaction=True)
+    def test_01_counts(self, client, user_client):
+        create_titles(user_client)
+        Title.objects.create(name="Без всего")
+        response = client.get(URL)
+        assert response.status_code == 200
+        facets = response.json()
+        assert facets["category"] == [
+            {"slug": "books", "name": "Книги", "count": 1},
+            {"slug": "films", "name": "Фильм", "count": 1},
+        ]
+        assert counts(facets, "genre") == {
+            "horror": 1, "comedy": 1, "drama": 1,
+        }
+        assert counts(facets, "year") == {2000: 1, 2020: 1}
+
+        facets = client.get(URL, {"genre": "drama"}).json()
+        assert counts(facets, "category") == {"books": 1}, (
+            "Проверьте, что счётчики категорий учитывают фильтр по жанру"
+        )
+        assert counts(facets, "genre") == {
+            "horror": 1, "comedy": 1, "drama": 1,
+        }, "Проверьте, что счётчики жанров не учитывают фильтр по жанру"
+        assert counts(facets, "year") == {2020: 1}
+
+        facets = client.get(URL, {"year": 2000}).json()
+        assert counts(facets, "genre") == {"horror": 1, "comedy": 1}
+        assert counts(facets, "year") == {2000: 1, 2020: 1}
+
+        assert client.get(URL, {"search": "x"}).status_code == 400
+        assert client.get(URL, {"year": "x"}).status_code == 400
+
+        with CaptureQueriesContext(connection) as context:
+            title_facets(category="films", genre="comedy", year=2000)
+        assert len(context.captured_queries) == 1, (
+            "Проверьте, что фасеты считаются одним запросом"
+        )
+        assert_consistent()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_maintained(self, client, user_client):
+        titles, _, _ = create_titles(user_client)
+        client.get(URL)
+        url = f"/api/v1/titles/{titles[0]['id']}/"
+        user_client.patch(
+            url, data={"category": "books", "year": 2001}, format="json"
+        )
+        facets = client.get(URL).json()
+        assert counts(facets, "category") == {"books": 2}, (
+            "Проверьте, что запись произведений обновляет кэш фасетов"
+        )
+        assert_consistent()
+
+        title = Title.objects.get(pk=titles[0]["id"])
+        title.genre.remove(Genre.objects.get(slug="horror"))
+        Genre.objects.get(slug="drama").titles.add(title)
+        assert counts(title_facets(), "genre") == {"comedy": 1, "drama": 2}
+        assert_consistent()
+        Genre.objects.get(slug="drama").titles.clear()
+        assert counts(title_facets(), "genre") == {"comedy": 1}
+        assert_consistent()
+
+        Genre.objects.get(slug="comedy").delete()
+        Categorie.objects.get(slug="books").delete()
+        facets = title_facets()
+        assert facets["genre"] == [] and facets["category"] == []
+        assert counts(facets, "year") == {2000: 1, 2020: 1}
+        assert_consistent()
+
+        Title.objects.get(pk=titles[1]["id"]).delete()
+        assert counts(title_facets(), "year") == {2000: 1}
+        assert_consistent()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_bulk_writes(self, user_client):
+        titles, _, _ = create_titles(user_client)
+        response = user_client.post(
+            "/api/v1/titles/bulk/",
+            data=[
+                {"name": "Новый", "category": "films", "genre": ["drama"]},
+                {"id": titles[1]["id"], "genre": ["horror"]},
+            ],
+            format="json",
+        )
+        assert response.status_code == 201
+        assert counts(title_facets(), "genre") == {
+            "horror": 2, "comedy": 1, "drama": 1,
+        }
+        assert counts(title_facets(), "category") == {"films": 2, "books": 1}
+        assert_consistent()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_invalidated_on_commit(self, user_client):
+        create_titles(user_client)
+        name = FacetCount._meta.label_lower
+        stamp = get_generation(name)
+        with transaction.atomic():
+            Title.objects.create(name="В транзакции", year=2000)
+            assert get_generation(name) == stamp, (
+                "Проверьте, что счётчики фасетов сбрасываются после коммита, "
+                "чтобы параллельные чтения не закэшировали старые"
+            )
+        assert get_generation(name) != stamp
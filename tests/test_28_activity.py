@@ -0,0 +1,116 @@
+import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from api.activity import activity_generation, position, read_activity
+from api.cache import get_generation
+from api.models import Comment, Review
+
+from .common import create_comments
+
+
+def activity(client, username, **params):
+    items = []
+    url = f"/api/v1/users/{username}/activity/"
+    while url:
+        response = client.get(url, params)
+        assert response.status_code == 200
+        data = response.json()
+        items += [(item["type"], item["id"]) for item in data["results"]]
+        url, params = data["next"], {}
+    return items
+
+
+class Test28Activity:
+    @pytest.mark.django_db(transaction=True)
+    def test_01_merged_feed(self, client, user_client, admin):
+        comments, reviews, _, _, _ = create_comments(user_client, admin)
+        review = Review.objects.get(pk=reviews[0]["id"])
+        comment = Comment.objects.get(pk=comments[0]["id"])
+        for _ in range(12):
+            Comment.objects.create(
+                author=admin, review=review, text="ещё",
+            )
+        same = timezone.now()
+        Comment.objects.filter(author=admin).update(pub_date=same)
+        Review.objects.filter(pk=review.pk).update(pub_date=same)
+
+        expected = [("review", review.pk)] + [
+            ("comment", pk) for pk in Comment.objects.filter(
+                author=admin,
+            ).order_by("-id").values_list("id", flat=True)
+        ]
+        assert comment.pk == expected[-1][1]
+        assert activity(client, admin.username) == expected, (
+            "Проверьте, что лента объединяет отзывы и комментарии, новые "
+            "первыми"
+        )
+
+        response = client.get(f"/api/v1/users/{admin.username}/activity/")
+        item = response.json()["results"][0]
+        assert item["title"] == review.title_id and item["score"] == 5
+        assert response.json()["next"]
+
+        assert client.get(
+            "/api/v1/users/nobody/activity/"
+        ).status_code == 404
+        assert client.get(
+            f"/api/v1/users/{admin.username}/activity/", {"cursor": "x"}
+        ).status_code == 404
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_keyset_queries(self, user_client, admin):
+        create_comments(user_client, admin)
+        with CaptureQueriesContext(connection) as context:
+            items = read_activity(admin.pk, None, 2)
+        assert len(items) == 2
+        assert len(context.captured_queries) == 2, (
+            "Проверьте, что каждый поток читается одним запросом"
+        )
+        assert all(
+            "LIMIT 2" in query["sql"] for query in context.captured_queries
+        ), "Проверьте, что потоки читаются не дальше страницы"
+
+        everything = read_activity(admin.pk, None, 10)
+        rest = read_activity(admin.pk, position(items[-1]), 10)
+        assert items + rest == everything, (
+            "Проверьте, что курсор продолжает сразу после последнего элемента"
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_cached_head(self, client, user_client, admin):
+        _, reviews, _, _, _ = create_comments(user_client, admin)
+        url = f"/api/v1/users/{admin.username}/activity/"
+        first = client.get(url).json()
+        with CaptureQueriesContext(connection) as context:
+            assert client.get(url).json() == first
+        assert not any(
+            "api_review" in query["sql"] or "api_comment" in query["sql"]
+            for query in context.captured_queries
+        ), "Проверьте, что начало ленты отдаётся из кэша"
+
+        Comment.objects.create(
+            author=admin,
+            review=Review.objects.get(pk=reviews[0]["id"]),
+            text="новый",
+        )
+        assert len(client.get(url).json()["results"]) == len(
+            first["results"]
+        ) + 1, "Проверьте, что записи пользователя сбрасывают кэш начала ленты"
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_invalidated_on_commit(self, user_client, admin):
+        _, reviews, _, _, _ = create_comments(user_client, admin)
+        name = activity_generation(admin.pk)
+        stamp = get_generation(name)
+        with transaction.atomic():
+            Comment.objects.create(
+                author=admin,
+                review=Review.objects.get(pk=reviews[0]["id"]),
+                text="в транзакции",
+            )
+            assert get_generation(name) == stamp, (
+                "Проверьте, что кэш ленты сбрасывается после коммита"
+            )
+        assert get_generation(name) != stamp
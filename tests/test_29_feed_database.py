@@ -0,0 +1,86 @@
+import pytest
+from django.db import connection, transaction
+
+from api.models import Comment, Review, Title
+from api.ratings import recalculate_title_ratings
+
+from .common import create_comments
+
+FEED = ["default", "feed"]
+
+
+@pytest.fixture
+def feed(settings):
+    settings.FEED_DATABASE = "feed"
+
+
+def stored(model):
+    return (
+        model.objects.using("default").count(),
+        model.objects.using("feed").count(),
+    )
+
+
+class Test29FeedDatabase:
+    @pytest.mark.django_db
+    def test_01_pragmas(self):
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA busy_timeout")
+            assert cursor.fetchone()[0] == 5000, (
+                "Проверьте, что соединения SQLite ждут блокировки"
+            )
+            cursor.execute("PRAGMA synchronous")
+            assert cursor.fetchone()[0] == 1
+
+    @pytest.mark.django_db(transaction=True, databases=FEED)
+    def test_02_routed(self, feed, client, user_client, admin):
+        comments, reviews, titles, user, _ = create_comments(
+            user_client, admin
+        )
+        assert stored(Review) == (0, 3) and stored(Comment) == (0, 3), (
+            "Проверьте, что отзывы и комментарии хранятся в FEED_DATABASE"
+        )
+        url = f"/api/v1/titles/{titles[0]['id']}/reviews/"
+        listed = client.get(url).json()["results"]
+        assert sorted(review["author"] for review in listed) == sorted(
+            review["author"] for review in reviews
+        ), "Проверьте, что списки отзывов читают авторов из основной базы"
+        comment_url = f"{url}{reviews[0]['id']}/comments/"
+        assert client.get(comment_url).json()["results"][0]["author"]
+        assert client.get(
+            f"/api/v1/users/{user.username}/activity/"
+        ).json()["results"][0]["type"] == "comment"
+
+        title = Title.objects.get(pk=titles[0]["id"])
+        assert title.rating == 4.0 and title.review_count == 3
+        Title.objects.update(rating=None, review_count=0, score_5=0)
+        recalculate_title_ratings()
+        title = Title.objects.get(pk=titles[0]["id"])
+        assert (title.rating, title.review_count, title.score_5) == (
+            4.0, 3, 1,
+        ), "Проверьте, что рейтинги пересчитываются по базе ленты"
+
+        export = user_client.get(
+            "/api/v1/titles/export/", {"reviews": "true"}
+        )
+        lines = b"".join(export.streaming_content).decode().splitlines()
+        assert '"qwerty321"' in lines[0]
+
+        response = user_client.delete(f"{url}{reviews[0]['id']}/")
+        assert response.status_code == 204
+        assert stored(Review) == (0, 2) and stored(Comment) == (0, 0)
+        title = Title.objects.get(pk=titles[0]["id"])
+        assert title.review_count == 2 and title.last_review_date
+
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                Title.objects.get(pk=titles[0]["id"]).delete()
+                raise RuntimeError
+        assert stored(Review) == (0, 2), (
+            "Проверьте, что отзывы сохраняются при откате удаления "
+            "произведения"
+        )
+        Title.objects.get(pk=titles[0]["id"]).delete()
+        assert stored(Review) == (0, 0), (
+            "Проверьте, что удаление произведения удаляет его отзывы"
+        )
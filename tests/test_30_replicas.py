@@ -0,0 +1,95 @@
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connections, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.db import reading_from
+from api.models import Title
+from api.replicas import fresh_replicas, sync_replica
+
+from .common import create_titles
+
+REPLICA = ["default", "replica"]
+URL = "/api/v1/titles/"
+
+
+@pytest.fixture
+def replicas(settings):
+    settings.REPLICA_DATABASES = ["replica"]
+
+
+def read(client, **params):
+    """Title count of a list response, and if a replica served it."""
+
+    with CaptureQueriesContext(connections["replica"]) as context:
+        response = client.get(URL, params)
+    assert response.status_code == 200
+    return response.json()["count"], bool(context.captured_queries)
+
+
+class Test30Replicas:
+    @pytest.mark.django_db(transaction=True, databases=REPLICA)
+    def test_01_routing(self, replicas, settings, client, user_client):
+        create_titles(user_client)
+        assert read(client) == (2, False), (
+            "Проверьте, что реплики не читаются до синхронизации"
+        )
+        sync_replica("replica")
+        assert read(client) == (2, True), (
+            "Проверьте, что безопасные запросы читают синхронизированную "
+            "реплику"
+        )
+
+        response = user_client.post(URL, data={"name": "Новый"})
+        assert response.status_code == 201
+        assert settings.REPLICA_PIN_COOKIE in response.cookies
+        assert read(user_client) == (3, False), (
+            "Проверьте, что клиенты читают свои записи из основной базы"
+        )
+        assert read(client) == (3, False), (
+            "Проверьте, что при отставании реплик чтение идёт из основной базы"
+        )
+
+        settings.REPLICA_MAX_LAG = 3600
+        assert read(client, page=1) == (2, True)
+        assert read(user_client, page=1) == (3, False), (
+            "Проверьте, что закреплённые клиенты не получают ответы реплик"
+        )
+        forged = APIClient()
+        forged.cookies[settings.REPLICA_PIN_COOKIE] = "1"
+        assert read(forged, count="true") == (2, True), (
+            "Проверьте, что учитываются только подписанные закрепления"
+        )
+
+    @pytest.mark.django_db(transaction=True, databases=REPLICA)
+    def test_02_writes_of_replica_objects(self, replicas, user_client):
+        titles, _, _ = create_titles(user_client)
+        sync_replica("replica")
+        with reading_from("replica"):
+            title = Title.objects.get(pk=titles[0]["id"])
+            assert title._state.db == "replica"
+            title.name = "Новое имя"
+            title.save()
+        assert Title.objects.get(pk=title.pk).name == "Новое имя", (
+            "Проверьте, что объекты из реплик сохраняются в основную базу"
+        )
+        with reading_from("replica"):
+            assert Title.objects.get(pk=title.pk).name != "Новое имя"
+
+    def test_03_sync_other_backends(self, replicas, monkeypatch):
+        monkeypatch.setattr(connections["replica"], "vendor", "postgresql")
+        with pytest.raises(CommandError, match="only synced on SQLite"):
+            call_command("sync_replicas")
+
+    @pytest.mark.django_db(transaction=True, databases=REPLICA)
+    def test_04_writes_stamped_on_commit(self, replicas):
+        assert fresh_replicas() == []
+        sync_replica("replica")
+        assert fresh_replicas() == ["replica"]
+        with transaction.atomic():
+            Title.objects.create(name="Новый")
+            assert fresh_replicas() == ["replica"]
+        assert fresh_replicas() == [], (
+            "Проверьте, что реплики устаревают вместе с кэшем при коммите"
+        )
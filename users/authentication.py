@@ -0,0 +1,145 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import router
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .models import CLAIM_FIELDS, VERSION_CLAIM
+from .revocation import revocations
+
+User = get_user_model()
+
+
+class ClaimsAccessToken(AccessToken):
+    """Access token carrying the user fields permissions look at."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for field in CLAIM_FIELDS:
+            token[field] = getattr(user, field)
+        token[VERSION_CLAIM] = user.token_version
+        return token
+
+
+class TokenVersionCache:
+    """Token versions of users, each kept for `timeout` seconds."""
+
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self.versions = {}
+
+    def get(self, user_id):
+        version, expires = self.versions.get(user_id, (None, 0))
+        if expires <= time.monotonic():
+            self.versions.pop(user_id, None)
+            return None
+        return version
+
+    def set(self, user_id, version):
+        self.versions[user_id] = (version, time.monotonic() + self.timeout)
+
+    def discard(self, user_id):
+        self.versions.pop(user_id, None)
+
+    def clear(self):
+        self.versions.clear()
+
+
+token_versions = TokenVersionCache(settings.TOKEN_VERSION_CACHE_TIMEOUT)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_token_version(sender, instance, **kwargs):
+    token_versions.discard(instance.pk)
+
+
+def current_token_version(user_id):
+    """Token version of a user, None for a deleted user.
+
+    Read from the primary database, replicas may miss revocations.
+    """
+
+    version = token_versions.get(user_id)
+    if version is None:
+        version = (
+            User.objects
+            .using(router.db_for_write(User))
+            .filter(pk=user_id)
+            .values_list('token_version', flat=True)
+            .first()
+        )
+        if version is not None:
+            token_versions.set(user_id, version)
+    return version
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """JWT authentication building the user from the token claims.
+
+    Tokens issued by ClaimsAccessToken whose version matches the
+    user's current token version get a user instance made of the
+    claims, with the other fields deferred. Current versions are
+    cached in the process for TOKEN_VERSION_CACHE_TIMEOUT seconds,
+    so a fresh token costs no query. Tokens with stale or missing
+    claims load the user row like JWTAuthentication does.
+
+    Revoked tokens are rejected first, see users/revocation.py.
+    """
+
+    def authenticate(self, request):
+        """Authenticate and expose the validated token as request.auth."""
+
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return self.get_user(validated_token), validated_token
+
+    def get_user(self, validated_token):
+        if revocations.is_revoked(validated_token):
+            raise AuthenticationFailed(
+                'Token is revoked', code='token_revoked',
+            )
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+            version = validated_token[VERSION_CLAIM]
+            values = {
+                field: validated_token[field] for field in CLAIM_FIELDS
+            }
+        except KeyError:
+            return super().get_user(validated_token)
+
+        current = current_token_version(user_id)
+        if current is None:
+            raise AuthenticationFailed(
+                'User not found', code='user_not_found',
+            )
+        if version != current:
+            return super().get_user(validated_token)
+        if not values['is_active']:
+            raise AuthenticationFailed(
+                'User is inactive', code='user_inactive',
+            )
+
+        values.update(id=user_id, token_version=version)
+        fields = [
+            field.attname
+            for field in User._meta.concrete_fields
+            if field.attname in values
+        ]
+        return User.from_db(
+            router.db_for_read(User),
+            fields,
+            [values[field] for field in fields],
+        )
@@ -0,0 +1,117 @@
+from datetime import timedelta
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import QueuedEmail
+
+
+def enqueue_mail(subject, message, from_email, recipient_list):
+    """Queue an email, a `send_mail()` that returns without sending."""
+
+    return QueuedEmail.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients='\n'.join(recipient_list),
+        next_attempt=timezone.now(),
+    )
+
+
+def retry_delay(attempts):
+    """Backoff before the next attempt: doubles after every failure."""
+
+    return timedelta(
+        seconds=settings.MAIL_QUEUE_RETRY_DELAY * 2 ** (attempts - 1),
+    )
+
+
+def claim_batch(batch_size):
+    """Lease up to `batch_size` due emails to the calling worker.
+
+    Rows are leased with a conditional UPDATE, so workers sharing
+    the table never send the same email twice within a lease.
+    """
+
+    now = timezone.now()
+    available = Q(claimed_until__isnull=True) | Q(claimed_until__lt=now)
+    due = list(
+        QueuedEmail.objects
+        .filter(available, next_attempt__lte=now)
+        .order_by('next_attempt', 'pk')
+        .values_list('pk', flat=True)[:batch_size]
+    )
+    if not due:
+        return []
+    claim = uuid4().hex
+    QueuedEmail.objects.filter(available, pk__in=due).update(
+        claim=claim,
+        claimed_until=now + timedelta(seconds=settings.MAIL_QUEUE_LEASE),
+    )
+    return list(QueuedEmail.objects.filter(claim=claim).order_by('pk'))
+
+
+def record_failure(email, error):
+    email.attempts += 1
+    email.last_error = str(error)
+    if email.attempts < settings.MAIL_QUEUE_MAX_ATTEMPTS:
+        email.next_attempt = timezone.now() + retry_delay(email.attempts)
+    else:
+        email.next_attempt = None
+
+
+def deliver_batch(batch_size=None):
+    """Send one batch of due emails over a single connection.
+
+    Returns (sent, failed) counts, both zero when nothing is due.
+    """
+
+    emails = claim_batch(batch_size or settings.MAIL_QUEUE_BATCH_SIZE)
+    if not emails:
+        return 0, 0
+
+    sent = failed = 0
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as error:
+        for email in emails:
+            record_failure(email, error)
+        failed = len(emails)
+    else:
+        try:
+            for email in emails:
+                message = EmailMessage(
+                    email.subject,
+                    email.body,
+                    email.from_email,
+                    email.recipients.splitlines(),
+                    connection=connection,
+                )
+                try:
+                    message.send()
+                except Exception as error:
+                    record_failure(email, error)
+                    failed += 1
+                else:
+                    email.sent = timezone.now()
+                    email.next_attempt = None
+                    sent += 1
+        finally:
+            connection.close()
+
+    for email in emails:
+        email.claim = ''
+        email.claimed_until = None
+    QueuedEmail.objects.bulk_update(emails, (
+        'attempts',
+        'last_error',
+        'next_attempt',
+        'sent',
+        'claim',
+        'claimed_until',
+    ))
+    return sent, failed
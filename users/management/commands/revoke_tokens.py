@@ -0,0 +1,54 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.revocation import (
+    prune_revocations,
+    revoke_token,
+    revoke_user_tokens,
+)
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Revoke access tokens: one token, or every token of a user. '
+        'Other processes apply revocations within '
+        'TOKEN_REVOCATION_SYNC_INTERVAL seconds.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--token', help='Access token to revoke.')
+        parser.add_argument(
+            '--user',
+            help='Username whose tokens issued so far are revoked.',
+        )
+        parser.add_argument(
+            '--prune',
+            action='store_true',
+            help='Delete revocations of tokens that have expired.',
+        )
+
+    def handle(self, *args, **options):
+        if not any(options[name] for name in ('token', 'user', 'prune')):
+            raise CommandError('Pass --token, --user or --prune.')
+
+        if options['token']:
+            try:
+                token = AccessToken(options['token'])
+            except TokenError as error:
+                raise CommandError(f'Invalid token: {error}')
+            revoke_token(token)
+            self.stdout.write(f'Revoked token {token["jti"]}.')
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f'User {options["user"]} not found.')
+            revoke_user_tokens(user)
+            self.stdout.write(f'Revoked tokens of {user.username}.')
+        if options['prune']:
+            self.stdout.write(f'Pruned {prune_revocations()} revocations.')
+        self.stdout.write(self.style.SUCCESS('Done.'))
@@ -0,0 +1,81 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from users.mail import deliver_batch
+
+
+def drain(batch_size):
+    """Deliver batches until nothing is due, returns (sent, failed)."""
+
+    sent = failed = 0
+    while True:
+        batch_sent, batch_failed = deliver_batch(batch_size)
+        if not batch_sent and not batch_failed:
+            return sent, failed
+        sent += batch_sent
+        failed += batch_failed
+
+
+def drain_in_thread(batch_size):
+    try:
+        return drain(batch_size)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        'Deliver queued emails in batches over one connection per '
+        'batch, retrying failures with exponential backoff.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.MAIL_QUEUE_BATCH_SIZE,
+            help='Emails per connection.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Worker threads draining the queue in parallel.',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit when nothing is due instead of polling.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Seconds between polls of an empty queue.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = self.drain(
+                options['workers'], options['batch_size'],
+            )
+            if sent or failed:
+                self.stdout.write(f'Sent {sent}, failed {failed}.')
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS('Queue drained.'))
+
+    def drain(self, workers, batch_size):
+        if workers == 1:
+            return drain(batch_size)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(drain_in_thread, [batch_size] * workers))
+        return (
+            sum(sent for sent, _ in results),
+            sum(failed for _, failed in results),
+        )
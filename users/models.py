@@ -9,6 +9,19 @@ class Role(models.TextChoices):
     ADMIN = 'admin'
 
 
+"""
+CLAIM_FIELDS: user fields copied into access tokens as claims,
+changing any of them bumps the token version of the user.
+"""
+CLAIM_FIELDS = ('username', 'role', 'is_staff', 'is_superuser', 'is_active')
+
+"""
+VERSION_CLAIM: claim with the token version of the user the token
+was issued at.
+"""
+VERSION_CLAIM = 'ver'
+
+
 class User(AbstractUser):
     bio = models.TextField(
         _('biography'),
@@ -23,6 +36,11 @@ class User(AbstractUser):
         choices=Role.choices,
         default=Role.USER,
     )
+    token_version = models.PositiveIntegerField(
+        _('token version'),
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         swappable = 'AUTH_USER_MODEL'
@@ -31,6 +49,41 @@ class User(AbstractUser):
     def __str__(self):
         return self.email
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._stored_claims = instance.claims()
+        return instance
+
+    def claims(self):
+        """Loaded values of CLAIM_FIELDS."""
+
+        return {
+            field: self.__dict__[field]
+            for field in CLAIM_FIELDS
+            if field in self.__dict__
+        }
+
+    def save(self, *args, **kwargs):
+        """Save the user, bumping the token version on claim changes.
+
+        Tokens issued before the bump carry stale claims, so they are
+        checked against the database again, see users/authentication.py.
+        """
+
+        stored = getattr(self, '_stored_claims', None)
+        if stored is not None and stored != {
+            field: value
+            for field, value in self.claims().items()
+            if field in stored
+        }:
+            self.token_version += 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'token_version'}
+        super().save(*args, **kwargs)
+        self._stored_claims = self.claims()
+
     @property
     def is_moderator(self):
         return self.is_staff or self.role == Role.MODERATOR
@@ -38,3 +91,90 @@ class User(AbstractUser):
     @property
     def is_admin(self):
         return self.is_superuser or self.role == Role.ADMIN
+
+
+class TokenRevocation(models.Model):
+    """Revoked access tokens.
+
+    A row revokes either one token by its `jti`, or every token of
+    the user whose version claim is below `version`. Rows matter only
+    until `expires`, when the tokens they revoke have expired anyway.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='token_revocations',
+        verbose_name=_('user'),
+    )
+    jti = models.CharField(
+        _('token id'),
+        max_length=255,
+        unique=True,
+        null=True,
+        blank=True,
+    )
+    version = models.PositiveIntegerField(
+        _('lowest valid token version'),
+        null=True,
+        blank=True,
+    )
+    created = models.DateTimeField(
+        _('revocation date'),
+        auto_now_add=True,
+        db_index=True,
+    )
+    expires = models.DateTimeField(
+        _('expiration date'),
+        db_index=True,
+    )
+
+    class Meta:
+        ordering = ('created',)
+        verbose_name = 'Token revocation'
+        verbose_name_plural = 'Token revocations'
+
+    def __str__(self):
+        return self.jti or f'{self.user_id} < {self.version}'
+
+
+class QueuedEmail(models.Model):
+    """Outbound email waiting for the send_queued_mail worker.
+
+    `claim` and `claimed_until` lease a row to one worker, a failed
+    send is retried at `next_attempt` until the attempts run out.
+    """
+
+    subject = models.CharField(_('subject'), max_length=255)
+    body = models.TextField(_('body'))
+    from_email = models.CharField(_('sender'), max_length=255)
+    recipients = models.TextField(_('recipients, one per line'))
+    created = models.DateTimeField(_('creation date'), auto_now_add=True)
+    next_attempt = models.DateTimeField(
+        _('next delivery attempt'),
+        null=True,
+        blank=True,
+        db_index=True,
+    )
+    attempts = models.PositiveSmallIntegerField(_('attempts'), default=0)
+    last_error = models.TextField(_('last error'), blank=True)
+    sent = models.DateTimeField(_('delivery date'), null=True, blank=True)
+    claim = models.CharField(
+        _('worker claim'),
+        max_length=32,
+        blank=True,
+        db_index=True,
+    )
+    claimed_until = models.DateTimeField(
+        _('claim expiration date'),
+        null=True,
+        blank=True,
+    )
+
+    class Meta:
+        ordering = ('created',)
+        verbose_name = 'Queued email'
+        verbose_name_plural = 'Queued emails'
+
+    def __str__(self):
+        return self.subject
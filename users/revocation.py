@@ -0,0 +1,130 @@
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import router, transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import VERSION_CLAIM, TokenRevocation
+
+
+class RevocationList:
+    """In-memory view of TokenRevocation for per-request checks.
+
+    Lookups are dict hits. Entries are evicted when the tokens they
+    revoke expire, and new rows are pulled from the database at most
+    once per `sync_interval` seconds, so revocations made by other
+    processes apply within that interval. Syncs overlap by one
+    interval, so rows committed late are still picked up.
+    """
+
+    def __init__(self, sync_interval):
+        self.sync_interval = sync_interval
+        self.clear()
+
+    def clear(self):
+        self.tokens = {}
+        self.versions = {}
+        self.synced_at = None
+        self.next_sync = 0
+
+    def add(self, revocation):
+        expires = revocation.expires.timestamp()
+        if revocation.jti:
+            self.tokens[revocation.jti] = expires
+        else:
+            version, _ = self.versions.get(revocation.user_id, (0, 0))
+            if revocation.version > version:
+                self.versions[revocation.user_id] = (
+                    revocation.version, expires,
+                )
+
+    def evict(self, now):
+        self.tokens = {
+            jti: expires
+            for jti, expires in self.tokens.items()
+            if expires > now
+        }
+        self.versions = {
+            user_id: entry
+            for user_id, entry in self.versions.items()
+            if entry[1] > now
+        }
+
+    def sync(self):
+        """Pull rows created since the last sync, drop expired entries."""
+
+        started = timezone.now()
+        rows = TokenRevocation.objects.using(
+            router.db_for_write(TokenRevocation),
+        ).filter(expires__gt=started)
+        if self.synced_at is not None:
+            rows = rows.filter(created__gte=(
+                self.synced_at - timedelta(seconds=self.sync_interval)
+            ))
+        for revocation in rows:
+            self.add(revocation)
+        self.evict(started.timestamp())
+        self.synced_at = started
+        self.next_sync = time.monotonic() + self.sync_interval
+
+    def is_revoked(self, token):
+        if time.monotonic() >= self.next_sync:
+            self.sync()
+        expires = self.tokens.get(token.get(api_settings.JTI_CLAIM))
+        if expires is not None and expires > time.time():
+            return True
+        user_id = token.get(api_settings.USER_ID_CLAIM)
+        version, expires = self.versions.get(user_id, (0, 0))
+        return (
+            expires > time.time()
+            and token.get(VERSION_CLAIM, 0) < version
+        )
+
+
+revocations = RevocationList(settings.TOKEN_REVOCATION_SYNC_INTERVAL)
+
+
+def token_expires(token):
+    return datetime.fromtimestamp(token['exp'], tz=dt_timezone.utc)
+
+
+def revoke_token(token):
+    """Revoke one access token."""
+
+    revocation, _ = TokenRevocation.objects.get_or_create(
+        jti=token[api_settings.JTI_CLAIM],
+        defaults={
+            'user_id': token[api_settings.USER_ID_CLAIM],
+            'expires': token_expires(token),
+        },
+    )
+    revocations.add(revocation)
+    return revocation
+
+
+def revoke_user_tokens(user):
+    """Revoke every access token issued to the user so far."""
+
+    with transaction.atomic():
+        user.token_version = F('token_version') + 1
+        user.save(update_fields=('token_version',))
+        user.refresh_from_db(fields=('token_version',))
+        revocation = TokenRevocation.objects.create(
+            user=user,
+            version=user.token_version,
+            expires=timezone.now() + api_settings.ACCESS_TOKEN_LIFETIME,
+        )
+    revocations.add(revocation)
+    return revocation
+
+
+def prune_revocations():
+    """Delete rows whose tokens have expired, returns the count."""
+
+    deleted, _ = TokenRevocation.objects.filter(
+        expires__lte=timezone.now(),
+    ).delete()
+    return deleted
@@ -29,3 +29,7 @@ class UserCreateWithEmailSerializer(serializers.Serializer):
 class AccessTokenObtainSerializer(serializers.Serializer):
     email = serializers.EmailField(required=True)
     confirmation_code = serializers.CharField(required=True)
+
+
+class TokenRevokeSerializer(serializers.Serializer):
+    all = serializers.BooleanField(default=False)
@@ -0,0 +1,147 @@
+import threading
+import time
+from collections import OrderedDict
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """'5/min' -> (5, 60), the rate format of DEFAULT_THROTTLE_RATES."""
+
+    num, period = rate.split('/')
+    return int(num), PERIODS[period[0]]
+
+
+class MemoryBuckets:
+    """Token buckets in process memory, at most `max_buckets`.
+
+    Buckets are kept in the order they were last used, and the least
+    recently used ones are forgotten past `max_buckets`, in constant
+    time per request however many keys a client rotates through.
+    """
+
+    def __init__(self, max_buckets=10000):
+        self.max_buckets = max_buckets
+        self.lock = threading.Lock()
+        self.buckets = OrderedDict()
+
+    def consume(self, key, capacity, duration, now):
+        with self.lock:
+            state = self.buckets.get(key)
+            allowed, state, wait = take(state, capacity, duration, now)
+            self.buckets[key] = state
+            self.buckets.move_to_end(key)
+            while len(self.buckets) > self.max_buckets:
+                self.buckets.popitem(last=False)
+            return allowed, wait
+
+    def clear(self):
+        with self.lock:
+            self.buckets.clear()
+
+
+class CacheBuckets:
+    """Sliding window limits in a shared cache, across processes.
+
+    Requests are counted per window of `duration` seconds with the
+    atomic `add()` and `incr()` of the cache, a request is allowed
+    while the current count plus the previous window's, weighted by
+    the share of it still in the sliding window, is within capacity.
+    Refused requests are uncounted.
+    """
+
+    def __init__(self, alias):
+        self.alias = alias
+
+    def consume(self, key, capacity, duration, now):
+        cache = caches[self.alias]
+        key = f'bucket:{md5(key.encode()).hexdigest()}'
+        window, elapsed = divmod(now, duration)
+        current = f'{key}:{int(window)}'
+        cache.add(current, 0, duration * 2)
+        count = cache.incr(current)
+        previous = cache.get(f'{key}:{int(window) - 1}', 0)
+        weight = 1 - elapsed / duration
+        if count + previous * weight <= capacity:
+            return True, 0
+        cache.decr(current)
+        if count > capacity or not previous:
+            return False, duration - elapsed
+        return False, (1 - (capacity - count) / previous) * duration - elapsed
+
+
+def take(state, capacity, duration, now):
+    """Take one token: (allowed, new state, seconds until a token)."""
+
+    rate = capacity / duration
+    if state is None:
+        tokens = capacity
+    else:
+        tokens, updated, _ = state
+        tokens = min(capacity, tokens + (now - updated) * rate)
+    if tokens >= 1:
+        return True, (tokens - 1, now, duration), 0
+    return False, (tokens, now, duration), (1 - tokens) / rate
+
+
+memory_buckets = MemoryBuckets()
+
+
+def get_buckets():
+    """RATE_LIMIT_CACHE alias of CACHES, process memory when None."""
+
+    if settings.RATE_LIMIT_CACHE is None:
+        return memory_buckets
+    return CacheBuckets(settings.RATE_LIMIT_CACHE)
+
+
+class AuthRateThrottle(BaseThrottle):
+    """Token bucket limits of auth endpoints per IP, email and username.
+
+    Rates are the `auth_ip`, `auth_email` and `auth_username` scopes
+    of DEFAULT_THROTTLE_RATES, a missing or None rate is unlimited.
+    A request takes a token from every bucket it's counted in.
+    """
+
+    scopes = (
+        ('auth_ip', None),
+        ('auth_email', 'email'),
+        ('auth_username', 'username'),
+    )
+
+    def identities(self, request):
+        data = request.data if hasattr(request.data, 'get') else {}
+        for scope, field in self.scopes:
+            if field is None:
+                yield scope, self.get_ident(request)
+                continue
+            value = data.get(field)
+            if isinstance(value, str) and value:
+                yield scope, value.strip().lower()
+
+    def allow_request(self, request, view):
+        rates = api_settings.DEFAULT_THROTTLE_RATES
+        buckets = get_buckets()
+        now = time.time()
+        self.retry_after = 0
+        allowed = True
+        for scope, ident in self.identities(request):
+            rate = rates.get(scope)
+            if rate is None:
+                continue
+            capacity, duration = parse_rate(rate)
+            scope_allowed, wait = buckets.consume(
+                f'{scope}:{ident}', capacity, duration, now,
+            )
+            allowed = allowed and scope_allowed
+            self.retry_after = max(self.retry_after, wait)
+        return allowed
+
+    def wait(self):
+        return self.retry_after
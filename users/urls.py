@@ -2,7 +2,12 @@ from django.conf.urls import include
 from django.urls import path
 from rest_framework.routers import DefaultRouter
 
-from .views import UserViewSet, access_token_obtain, user_create_with_email
+from .views import (
+    UserViewSet,
+    access_token_obtain,
+    access_token_revoke,
+    user_create_with_email,
+)
 
 router_v1 = DefaultRouter()
 router_v1.register('users', UserViewSet, basename='user')
@@ -18,6 +23,11 @@ auth_patterns = [
         access_token_obtain,
         name='access-token-obtain',
     ),
+    path(
+        'token/revoke/',
+        access_token_revoke,
+        name='access-token-revoke',
+    ),
 ]
 
 urlpatterns = [
@@ -1,24 +1,37 @@
+from hashlib import md5
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
 from django.db import IntegrityError
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.decorators import (
+    action,
+    api_view,
+    permission_classes,
+    throttle_classes,
+)
 from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.generics import get_object_or_404
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.serializers import ValidationError
-from rest_framework.status import HTTP_200_OK
+from rest_framework.status import HTTP_200_OK, HTTP_204_NO_CONTENT
 from rest_framework.viewsets import ModelViewSet
-from rest_framework_simplejwt.tokens import AccessToken
 
+from api.cache import get_cache
+
+from .authentication import ClaimsAccessToken
+from .mail import enqueue_mail
 from .permissions import IsAdmin
+from .revocation import revoke_token, revoke_user_tokens
 from .serializers import (
     AccessTokenObtainSerializer,
+    TokenRevokeSerializer,
     UserCreateWithEmailSerializer,
     UserSerializer,
 )
+from .throttling import AuthRateThrottle
 
 User = get_user_model()
 
@@ -40,6 +53,9 @@ class UserViewSet(ModelViewSet):
     )
     def me(self, request, **kwargs):
         user = request.user
+        deferred = user.get_deferred_fields()
+        if deferred:
+            user.refresh_from_db(fields=deferred)
 
         if request.method == 'GET':
             serializer = self.get_serializer(user)
@@ -51,11 +67,25 @@ class UserViewSet(ModelViewSet):
         return Response(serializer.data, status=HTTP_200_OK)
 
 
+def signup_key(email, username):
+    return f'signup:{md5(f"{email}|{username}".encode()).hexdigest()}'
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([AuthRateThrottle])
 def user_create_with_email(request):
+    """Send a confirmation code, creating the user on first signup.
+
+    Repeated signups within SIGNUP_DEDUP_WINDOW seconds reuse the
+    code already queued for the address.
+    """
+
     serializer = UserCreateWithEmailSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
+    key = signup_key(serializer.data['email'], serializer.data['username'])
+    if get_cache().get(key):
+        return Response(serializer.data)
 
     try:
         user, created = User.objects.get_or_create(
@@ -73,7 +103,7 @@ def user_create_with_email(request):
         user.save()
 
     confirmation_code = default_token_generator.make_token(user)
-    send_mail(
+    enqueue_mail(
         'YaMDb: get your confirmation code!',
         (
             f'Hi, {user.username}! Use the code below '
@@ -83,11 +113,13 @@ def user_create_with_email(request):
         None,
         (user.email,),
     )
+    get_cache().set(key, True, settings.SIGNUP_DEDUP_WINDOW)
     return Response(serializer.data)
 
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([AuthRateThrottle])
 def access_token_obtain(request):
     serializer = AccessTokenObtainSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
@@ -105,8 +137,23 @@ def access_token_obtain(request):
             'Confirmation code is invalid.'
         )
 
-    access = AccessToken.for_user(user)
+    access = ClaimsAccessToken.for_user(user)
     data = {
         'token': str(access),
     }
     return Response(data)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def access_token_revoke(request):
+    """Revoke the presented token, or every token of the user."""
+
+    serializer = TokenRevokeSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+
+    if serializer.validated_data['all']:
+        revoke_user_tokens(request.user)
+    else:
+        revoke_token(request.auth)
+    return Response(status=HTTP_204_NO_CONTENT)